@@ -1,14 +1,17 @@
 """Provide an authentication layer for Home Assistant."""
 import asyncio
+import hashlib
 import logging
 from collections import OrderedDict
 from datetime import timedelta
-from typing import Any, Dict, List, Optional, Tuple, cast
+import time
+from typing import Any, Dict, List, Optional, Set, Tuple, cast
 
 import jwt
 
 from homeassistant import data_entry_flow
-from homeassistant.auth.const import ACCESS_TOKEN_EXPIRATION
+from homeassistant.auth.const import (
+    ACCESS_TOKEN_CACHE_SIZE, ACCESS_TOKEN_EXPIRATION)
 from homeassistant.core import callback, HomeAssistant
 from homeassistant.util import dt as dt_util
 
@@ -24,6 +27,10 @@ _LOGGER = logging.getLogger(__name__)
 _MfaModuleDict = Dict[str, MultiFactorAuthModule]
 _ProviderKey = Tuple[str, Optional[str]]
 _ProviderDict = Dict[_ProviderKey, AuthProvider]
+_AccessTokenEntry = Tuple[float, models.RefreshToken]
+
+# Seconds an access token is accepted after it expired
+ACCESS_TOKEN_LEEWAY = 10
 
 
 async def auth_manager_from_config(
@@ -74,6 +81,10 @@ class AuthManager:
         self._store = store
         self._providers = providers
         self._mfa_modules = mfa_modules
+        # Hashes of verified access tokens mapped to their expiration and
+        # refresh token, least recently used first
+        self._access_tokens = \
+            OrderedDict()  # type: OrderedDict[bytes, _AccessTokenEntry]
         self.login_flow = data_entry_flow.FlowManager(
             hass, self._async_create_login_flow,
             self._async_finish_login_flow)
@@ -226,6 +237,7 @@ class AuthManager:
             await asyncio.wait(tasks)
 
         await self._store.async_remove_user(user)
+        self._async_forget_access_tokens(set(user.refresh_tokens))
 
         self.hass.bus.async_fire(EVENT_USER_REMOVED, {
             'user_id': user.id
@@ -251,6 +263,7 @@ class AuthManager:
         if user.is_owner:
             raise ValueError('Unable to deactive the owner')
         await self._store.async_deactivate_user(user)
+        self._async_forget_access_tokens(set(user.refresh_tokens))
 
     async def async_remove_credentials(
             self, credentials: models.Credentials) -> None:
@@ -363,6 +376,7 @@ class AuthManager:
             -> None:
         """Delete a refresh token."""
         await self._store.async_remove_refresh_token(refresh_token)
+        self._async_forget_access_tokens({refresh_token.id})
 
     @callback
     def async_create_access_token(self,
@@ -380,7 +394,20 @@ class AuthManager:
 
     async def async_validate_access_token(
             self, token: str) -> Optional[models.RefreshToken]:
-        """Return refresh token if an access token is valid."""
+        """Return refresh token if an access token is valid.
+
+        Verified access tokens are cached until they expire.
+        """
+        key = hashlib.sha256(token.encode()).digest()
+        cached = self._access_tokens.get(key)
+        if cached is not None:
+            expiration, cached_token = cached
+            if time.time() <= expiration and cached_token.user.is_active:
+                self._access_tokens.move_to_end(key)
+                return cached_token
+            del self._access_tokens[key]
+            return None
+
         try:
             unverif_claims = jwt.decode(token, verify=False)
         except jwt.InvalidTokenError:
@@ -397,10 +424,10 @@ class AuthManager:
             issuer = refresh_token.id
 
         try:
-            jwt.decode(
+            claims = jwt.decode(
                 token,
                 jwt_key,
-                leeway=10,
+                leeway=ACCESS_TOKEN_LEEWAY,
                 issuer=issuer,
                 algorithms=['HS256']
             )
@@ -410,8 +437,22 @@ class AuthManager:
         if refresh_token is None or not refresh_token.user.is_active:
             return None
 
+        if 'exp' in claims:
+            self._access_tokens[key] = (
+                claims['exp'] + ACCESS_TOKEN_LEEWAY, refresh_token)
+            if len(self._access_tokens) > ACCESS_TOKEN_CACHE_SIZE:
+                self._access_tokens.popitem(last=False)
+
         return refresh_token
 
+    @callback
+    def _async_forget_access_tokens(self, refresh_token_ids: Set[str]) \
+            -> None:
+        """Remove the cached access tokens of refresh tokens."""
+        for key, (_, refresh_token) in list(self._access_tokens.items()):
+            if refresh_token.id in refresh_token_ids:
+                del self._access_tokens[key]
+
     async def _async_create_login_flow(
             self, handler: _ProviderKey, *, context: Optional[Dict],
             data: Optional[Any]) -> data_entry_flow.FlowHandler:
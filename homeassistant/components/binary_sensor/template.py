@@ -189,7 +189,7 @@ class BinarySensorTemplate(BinarySensorDevice):
         """Get the state of template."""
         state = None
         try:
-            state = (self._template.async_render().lower() == 'true')
+            state = (self._template.async_render_cached().lower() == 'true')
         except TemplateError as ex:
             if ex.args and ex.args[0].startswith(
                     "UndefinedError: 'None' has no attribute"):
@@ -206,7 +206,7 @@ class BinarySensorTemplate(BinarySensorDevice):
                 continue
 
             try:
-                setattr(self, property_name, template.async_render())
+                setattr(self, property_name, template.async_render_cached())
             except TemplateError as ex:
                 friendly_property_name = property_name[1:].replace('_', ' ')
                 if ex.args and ex.args[0].startswith(
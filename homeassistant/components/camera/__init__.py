@@ -69,6 +69,9 @@ _RND = SystemRandom()
 
 FALLBACK_STREAM_INTERVAL = 1  # seconds
 MIN_STREAM_INTERVAL = 0.5  # seconds
+FRAME_TIMEOUT = 10  # seconds
+
+DATA_FRAME_BROKERS = 'camera_frame_brokers'
 
 CAMERA_SERVICE_SCHEMA = vol.Schema({
     vol.Optional(ATTR_ENTITY_ID): cv.comp_entity_ids,
@@ -105,7 +108,8 @@ async def async_get_image(hass, entity_id, timeout=10):
 
     with suppress(asyncio.CancelledError, asyncio.TimeoutError):
         with async_timeout.timeout(timeout, loop=hass.loop):
-            image = await camera.async_camera_image()
+            image = await async_get_frame_broker(
+                hass, camera.async_camera_image).async_get_frame()
 
             if image:
                 return Image(camera.content_type, image)
@@ -121,9 +125,143 @@ async def async_get_mjpeg_stream(hass, request, entity_id):
     return await camera.handle_async_mjpeg_stream(request)
 
 
+class FrameBroker:
+    """Fetch the frames of a camera once for all its viewers.
+
+    Concurrent requests for a frame share a single call of the image
+    callback. While MJPEG streams are subscribed, a single task polls the
+    frames at the shortest interval of the streams and feeds them to all of
+    them, and the latest frame is served to image requests until the next
+    one is due.
+    """
+
+    def __init__(self, hass, image_cb, key):
+        """Initialize the broker."""
+        self.hass = hass
+        self._image_cb = image_cb
+        self._key = key
+        self._frame = None
+        self._frame_expires = 0
+        self._fetch = None
+        self._next_frame = None
+        self._intervals = []
+        self._poll_task = None
+
+    @property
+    def interval(self):
+        """Return the interval between the polled frames."""
+        return min(self._intervals, default=0)
+
+    async def async_get_frame(self):
+        """Return the latest frame, fetching it if it is not fresh."""
+        if self._frame is not None and \
+                self.hass.loop.time() < self._frame_expires:
+            return self._frame
+
+        return await self._async_fetch_shared()
+
+    async def _async_fetch_shared(self):
+        """Fetch a frame, sharing the fetch in progress."""
+        if self._fetch is None:
+            self._fetch = self.hass.async_create_task(self._async_fetch())
+        # A client going away must not cancel the fetch of the others
+        return await asyncio.shield(self._fetch)
+
+    async def _async_fetch(self):
+        """Fetch a frame from the camera."""
+        try:
+            with async_timeout.timeout(FRAME_TIMEOUT, loop=self.hass.loop):
+                frame = await self._image_cb()
+        finally:
+            self._fetch = None
+            self._async_release_if_idle()
+
+        self._frame = frame
+        self._frame_expires = self.hass.loop.time() + self.interval
+        return frame
+
+    async def async_next_frame(self):
+        """Wait for the next polled frame, None when the stream ended."""
+        return await asyncio.shield(self._next_frame)
+
+    @callback
+    def async_subscribe(self, interval):
+        """Subscribe a stream, returning a callback to unsubscribe it."""
+        self._intervals.append(interval)
+
+        if self._poll_task is None:
+            self._next_frame = self.hass.loop.create_future()
+            self._poll_task = self.hass.async_create_task(self._async_poll())
+
+        @callback
+        def async_unsubscribe():
+            """Unsubscribe the stream."""
+            self._intervals.remove(interval)
+            if not self._intervals and self._poll_task is not None:
+                self._poll_task.cancel()
+                self._poll_task = None
+            self._async_release_if_idle()
+
+        return async_unsubscribe
+
+    async def _async_poll(self):
+        """Poll the frames for the subscribed streams."""
+        next_frame = self._next_frame
+        try:
+            while True:
+                frame = await self._async_fetch_shared()
+                if not frame:
+                    break
+
+                next_frame, self._next_frame = \
+                    self._next_frame, self.hass.loop.create_future()
+                next_frame.set_result(frame)
+                next_frame = self._next_frame
+
+                await asyncio.sleep(self.interval)
+        except asyncio.CancelledError:
+            pass
+        except Exception:  # pylint: disable=broad-except
+            _LOGGER.exception("Error fetching camera frame")
+        finally:
+            # End the streams
+            if not next_frame.done():
+                next_frame.set_result(None)
+            if self._next_frame is next_frame:
+                self._poll_task = None
+
+    @callback
+    def _async_release_if_idle(self):
+        """Forget the broker once it is not used anymore."""
+        if self._intervals or self._fetch is not None:
+            return
+
+        brokers = self.hass.data[DATA_FRAME_BROKERS]
+        if brokers.get(self._key) is self:
+            del brokers[self._key]
+
+
+@callback
+def async_get_frame_broker(hass, image_cb):
+    """Return the frame broker of an image callback."""
+    # Bound methods of the same camera are equal but entities are unhashable
+    owner = getattr(image_cb, '__self__', None)
+    if owner is None:
+        key = image_cb
+    else:
+        key = (id(owner), image_cb.__func__)
+
+    brokers = hass.data.setdefault(DATA_FRAME_BROKERS, {})
+    broker = brokers.get(key)
+    if broker is None:
+        broker = brokers[key] = FrameBroker(hass, image_cb, key)
+    return broker
+
+
 async def async_get_still_stream(request, image_cb, content_type, interval):
     """Generate an HTTP MJPEG stream from camera images.
 
+    The frames are shared with the other streams of the same image callback.
     This method must be run in the event loop.
     """
     response = web.StreamResponse()
@@ -140,23 +278,31 @@ async def async_get_still_stream(request, image_cb, content_type, interval):
                 content_type, len(img_bytes)),
             'utf-8') + img_bytes + b'\r\n')
 
+    broker = async_get_frame_broker(request.app['hass'], image_cb)
+    unsubscribe = broker.async_subscribe(interval)
     last_image = None
 
-    while True:
-        img_bytes = await image_cb()
-        if not img_bytes:
-            break
-
-        if img_bytes != last_image:
-            await write_to_mjpeg_stream(img_bytes)
+    try:
+        # Start with the latest frame if it is still fresh
+        img_bytes = await broker.async_get_frame()
 
-            # Chrome seems to always ignore first picture,
-            # print it twice.
-            if last_image is None:
+        while img_bytes:
+            if img_bytes != last_image:
                 await write_to_mjpeg_stream(img_bytes)
-            last_image = img_bytes
 
-        await asyncio.sleep(interval)
+                # Chrome seems to always ignore first picture,
+                # print it twice.
+                if last_image is None:
+                    await write_to_mjpeg_stream(img_bytes)
+                last_image = img_bytes
+
+            # Skip the frames polled for streams with a shorter interval
+            if interval > broker.interval:
+                await asyncio.sleep(interval - broker.interval)
+
+            img_bytes = await broker.async_next_frame()
+    finally:
+        unsubscribe()
 
     return response
 
@@ -446,7 +592,9 @@ class CameraImageView(CameraView):
         """Serve camera image."""
         with suppress(asyncio.CancelledError, asyncio.TimeoutError):
             with async_timeout.timeout(10, loop=request.app['hass'].loop):
-                image = await camera.async_camera_image()
+                image = await async_get_frame_broker(
+                    request.app['hass'],
+                    camera.async_camera_image).async_get_frame()
 
             if image:
                 return web.Response(body=image,
@@ -5,13 +5,19 @@ For more details about this platform, please refer to the documentation
 https://www.home-assistant.io/components/camera.proxy/
 """
 import asyncio
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
 import logging
+import threading
 
 from datetime import timedelta
 import voluptuous as vol
 
 from homeassistant.components.camera import PLATFORM_SCHEMA, Camera
-from homeassistant.const import CONF_ENTITY_ID, CONF_NAME, CONF_MODE
+from homeassistant.const import (
+    CONF_ENTITY_ID, CONF_NAME, CONF_MODE, EVENT_HOMEASSISTANT_STOP)
+from homeassistant.core import callback
 from homeassistant.exceptions import HomeAssistantError
 from homeassistant.helpers import config_validation as cv
 from homeassistant.util.async_ import run_coroutine_threadsafe
@@ -39,6 +45,13 @@ MODE_CROP = 'crop'
 DEFAULT_BASENAME = "Camera Proxy"
 DEFAULT_QUALITY = 75
 
+DATA_IMAGE_EXECUTOR = 'camera_proxy_image_executor'
+
+# Threads shared by all the proxy cameras to process images
+IMAGE_WORKERS = 2
+# Processed images kept by each proxy camera
+IMAGE_CACHE_SIZE = 4
+
 PLATFORM_SCHEMA = PLATFORM_SCHEMA.extend({
     vol.Required(CONF_ENTITY_ID): cv.entity_id,
     vol.Optional(CONF_NAME): cv.string,
@@ -64,6 +77,24 @@ async def async_setup_platform(
     async_add_entities([ProxyCamera(hass, config)])
 
 
+@callback
+def _async_get_executor(hass):
+    """Return the executor processing the images."""
+    executor = hass.data.get(DATA_IMAGE_EXECUTOR)
+    if executor is None:
+        executor = hass.data[DATA_IMAGE_EXECUTOR] = \
+            ThreadPoolExecutor(max_workers=IMAGE_WORKERS)
+
+        @callback
+        def async_shutdown(event):
+            """Shut down the executor."""
+            executor.shutdown(wait=False)
+
+        hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, async_shutdown)
+
+    return executor
+
+
 def _precheck_image(image, opts):
     """Perform some pre-checks on the given image."""
     from PIL import Image
@@ -106,6 +137,11 @@ def _resize_image(image, opts):
     scale = new_width / float(old_width)
     new_height = int((float(old_height)*float(scale)))
 
+    # Let the JPEG decoder downscale by a power of two, which is much faster
+    # than decoding the full image, as long as it stays larger than needed
+    if img.format == 'JPEG':
+        img.draft(img.mode, (new_width, new_height))
+
     img = img.resize((new_width, new_height), Image.ANTIALIAS)
     imgbuf = io.BytesIO()
     img.save(imgbuf, 'JPEG', optimize=True, quality=quality)
@@ -134,24 +170,24 @@ def _crop_image(image, opts):
     quality = opts.quality or DEFAULT_QUALITY
     (old_width, old_height) = img.size
     old_size = len(image)
-    if opts.top is None:
-        opts.top = 0
-    if opts.left is None:
-        opts.left = 0
-    if opts.max_width is None or opts.max_width > old_width - opts.left:
-        opts.max_width = old_width - opts.left
-    if opts.max_height is None or opts.max_height > old_height - opts.top:
-        opts.max_height = old_height - opts.top
-
-    img = img.crop((opts.left, opts.top,
-                    opts.left+opts.max_width, opts.top+opts.max_height))
+    # The options are shared by all the images, leave them untouched
+    top = opts.top or 0
+    left = opts.left or 0
+    max_width = opts.max_width
+    if max_width is None or max_width > old_width - left:
+        max_width = old_width - left
+    max_height = opts.max_height
+    if max_height is None or max_height > old_height - top:
+        max_height = old_height - top
+
+    img = img.crop((left, top, left+max_width, top+max_height))
     imgbuf = io.BytesIO()
     img.save(imgbuf, 'JPEG', optimize=True, quality=quality)
     newimage = imgbuf.getvalue()
 
     _LOGGER.debug(
         "Cropped image from (%dx%d - %d bytes) to (%dx%d - %d bytes)",
-        old_width, old_height, old_size, opts.max_width, opts.max_height,
+        old_width, old_height, old_size, max_width, max_height,
         len(newimage))
     return newimage
 
@@ -173,6 +209,43 @@ class ImageOpts():
         """Bool evaluation rules."""
         return bool(self.max_width or self.quality)
 
+    @property
+    def key(self):
+        """Return a key identifying the options."""
+        return (self.max_width, self.max_height, self.left, self.top,
+                self.quality, self.force_resize)
+
+
+class ImageCache:
+    """Cache the processed images by source image digest and options.
+
+    Cameras often return the same image several times in a row, which is
+    then processed once. The cache is used by the executor threads.
+    """
+
+    def __init__(self, size):
+        """Initialize the cache."""
+        self._size = size
+        self._images = OrderedDict()
+        self._lock = threading.Lock()
+
+    def process(self, job, image, opts):
+        """Return the processed image, running the job if not cached."""
+        key = (hashlib.sha1(image).digest(), job, opts.key)
+        with self._lock:
+            processed = self._images.get(key)
+            if processed is not None:
+                self._images.move_to_end(key)
+                return processed
+
+        processed = job(image, opts)
+
+        with self._lock:
+            self._images[key] = processed
+            if len(self._images) > self._size:
+                self._images.popitem(last=False)
+        return processed
+
 
 class ProxyCamera(Camera):
     """The representation of a Proxy camera."""
@@ -208,6 +281,17 @@ class ProxyCamera(Camera):
         self._last_image_time = dt_util.utc_from_timestamp(0)
         self._last_image = None
         self._mode = config.get(CONF_MODE)
+        self._image_cache = ImageCache(IMAGE_CACHE_SIZE)
+
+    async def _async_process_image(self, image, opts):
+        """Resize or crop an image in the image executor."""
+        if self._mode == MODE_RESIZE:
+            job = _resize_image
+        else:
+            job = _crop_image
+        return await self.hass.loop.run_in_executor(
+            _async_get_executor(self.hass), self._image_cache.process,
+            job, image, opts)
 
     def camera_image(self):
         """Return camera image."""
@@ -230,12 +314,8 @@ class ProxyCamera(Camera):
             _LOGGER.error("Error getting original camera image")
             return self._last_image
 
-        if self._mode == MODE_RESIZE:
-            job = _resize_image
-        else:
-            job = _crop_image
-        image = await self.hass.async_add_executor_job(
-            job, image.content, self._image_opts)
+        image = await self._async_process_image(
+            image.content, self._image_opts)
 
         if self._cache_images:
             self._last_image = image
@@ -266,9 +346,5 @@ class ProxyCamera(Camera):
         except HomeAssistantError:
             raise asyncio.CancelledError()
 
-        if self._mode == MODE_RESIZE:
-            job = _resize_image
-        else:
-            job = _crop_image
-        return await self.hass.async_add_executor_job(
-            job, image.content, self._stream_opts)
+        return await self._async_process_image(
+            image.content, self._stream_opts)
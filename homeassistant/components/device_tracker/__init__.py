@@ -49,9 +49,14 @@ ENTITY_ID_FORMAT = DOMAIN + '.{}'
 
 YAML_DEVICES = 'known_devices.yaml'
 
+STORAGE_KEY = 'device_tracker.known_devices'
+STORAGE_VERSION = 1
+SAVE_DELAY = 10
+
 CONF_TRACK_NEW = 'track_new_devices'
 DEFAULT_TRACK_NEW = True
 CONF_NEW_DEVICE_DEFAULTS = 'new_device_defaults'
+CONF_STORE_KNOWN_DEVICES = 'store_known_devices'
 
 CONF_CONSIDER_HOME = 'consider_home'
 DEFAULT_CONSIDER_HOME = timedelta(seconds=180)
@@ -94,7 +99,8 @@ PLATFORM_SCHEMA = cv.PLATFORM_SCHEMA.extend({
                  default=DEFAULT_CONSIDER_HOME): vol.All(
                      cv.time_period, cv.positive_timedelta),
     vol.Optional(CONF_NEW_DEVICE_DEFAULTS,
-                 default={}): NEW_DEVICE_DEFAULTS_SCHEMA
+                 default={}): NEW_DEVICE_DEFAULTS_SCHEMA,
+    vol.Optional(CONF_STORE_KNOWN_DEVICES): cv.boolean,
 })
 PLATFORM_SCHEMA_BASE = cv.PLATFORM_SCHEMA_BASE.extend(PLATFORM_SCHEMA.schema)
 SERVICE_SEE_PAYLOAD_SCHEMA = vol.Schema(vol.All(
@@ -154,9 +160,14 @@ async def async_setup(hass: HomeAssistantType, config: ConfigType):
     if track_new is None:
         track_new = defaults.get(CONF_TRACK_NEW, DEFAULT_TRACK_NEW)
 
-    devices = await async_load_config(yaml_path, hass, consider_home)
+    if conf.get(CONF_STORE_KNOWN_DEVICES):
+        store = KnownDevicesStore(hass)
+        devices = await store.async_load(yaml_path, consider_home)
+    else:
+        store = None
+        devices = await async_load_config(yaml_path, hass, consider_home)
     tracker = DeviceTracker(
-        hass, consider_home, track_new, defaults, devices)
+        hass, consider_home, track_new, defaults, devices, store)
 
     async def async_setup_platform(p_type, p_config, disc_info=None):
         """Set up a device tracker platform."""
@@ -246,9 +257,10 @@ class DeviceTracker:
 
     def __init__(self, hass: HomeAssistantType, consider_home: timedelta,
                  track_new: bool, defaults: dict,
-                 devices: Sequence) -> None:
+                 devices: Sequence, store: 'KnownDevicesStore' = None) -> None:
         """Initialize a device tracker."""
         self.hass = hass
+        self.store = store
         self.devices = {dev.dev_id: dev for dev in devices}
         self.mac_to_dev = {dev.mac: dev for dev in devices if dev.mac}
         self.consider_home = consider_home
@@ -342,6 +354,10 @@ class DeviceTracker:
             ATTR_MAC: device.mac,
         })
 
+        if self.store is not None:
+            self.store.async_add(device)
+            return
+
         # update known_devices.yaml
         self.hass.async_create_task(
             self.async_update_config(
@@ -595,6 +611,68 @@ class Device(RestoreEntity):
                         state.attributes[ATTR_LONGITUDE])
 
 
+class KnownDevicesStore:
+    """Store the known devices in the storage instead of YAML.
+
+    New devices are saved in batches and loading the devices does not need
+    to parse YAML. known_devices.yaml is imported the first time.
+    """
+
+    def __init__(self, hass: HomeAssistantType) -> None:
+        """Initialize the store."""
+        self.hass = hass
+        self._store = hass.helpers.storage.Store(STORAGE_VERSION, STORAGE_KEY)
+        self._devices = {}  # type: dict
+
+    async def async_load(self, yaml_path: str,
+                         consider_home: timedelta) -> List[Device]:
+        """Load the devices.
+
+        This method is a coroutine.
+        """
+        data = await self._store.async_load()
+
+        if data is None:
+            devices = await async_load_config(
+                yaml_path, self.hass, consider_home)
+            for device in devices:
+                config = _device_config(device)
+                if device.consider_home != consider_home:
+                    config[CONF_CONSIDER_HOME] = \
+                        device.consider_home.total_seconds()
+                self._devices[device.dev_id] = config
+
+            await self._store.async_save(self._data_to_save())
+            if devices:
+                _LOGGER.info("Imported %s devices from %s, changes to it "
+                             "are no longer loaded", len(devices), yaml_path)
+            return devices
+
+        self._devices = data['devices']
+        return [
+            Device(self.hass,
+                   timedelta(seconds=config[CONF_CONSIDER_HOME])
+                   if CONF_CONSIDER_HOME in config else consider_home,
+                   config['track'], dev_id, config[CONF_MAC],
+                   config[CONF_NAME], picture=config['picture'],
+                   icon=config[CONF_ICON],
+                   hide_if_away=config[CONF_AWAY_HIDE])
+            for dev_id, config in self._devices.items()]
+
+    @callback
+    def async_add(self, device: Device) -> None:
+        """Add a new device."""
+        self._devices[device.dev_id] = _device_config(device)
+        self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+
+    @callback
+    def _data_to_save(self) -> dict:
+        """Return the data of the store."""
+        return {
+            'devices': dict(self._devices),
+        }
+
+
 class DeviceScanner:
     """Device scanner object."""
 
@@ -744,19 +822,23 @@ def async_setup_scanner_platform(hass: HomeAssistantType, config: ConfigType,
     hass.async_create_task(async_device_tracker_scan(None))
 
 
+def _device_config(device: Device) -> dict:
+    """Return the configuration of a device."""
+    return {
+        ATTR_NAME: device.name,
+        ATTR_MAC: device.mac,
+        ATTR_ICON: device.icon,
+        'picture': device.config_picture,
+        'track': device.track,
+        CONF_AWAY_HIDE: device.away_hide,
+    }
+
+
 def update_config(path: str, dev_id: str, device: Device):
     """Add device to YAML configuration file."""
     with open(path, 'a') as out:
-        device = {device.dev_id: {
-            ATTR_NAME: device.name,
-            ATTR_MAC: device.mac,
-            ATTR_ICON: device.icon,
-            'picture': device.config_picture,
-            'track': device.track,
-            CONF_AWAY_HIDE: device.away_hide,
-        }}
         out.write('\n')
-        out.write(dump(device))
+        out.write(dump({device.dev_id: _device_config(device)}))
 
 
 def get_gravatar_for_email(email: str):
@@ -1,8 +1,10 @@
 """Provide pre-made queries on top of the recorder component."""
 from collections import defaultdict
 from datetime import timedelta
+import heapq
 from itertools import groupby
 import logging
+from operator import attrgetter
 import time
 
 import voluptuous as vol
@@ -10,10 +12,12 @@ import voluptuous as vol
 from homeassistant.const import (
     HTTP_BAD_REQUEST, CONF_DOMAINS, CONF_ENTITIES, CONF_EXCLUDE, CONF_INCLUDE)
 import homeassistant.util.dt as dt_util
-from homeassistant.components import recorder, script
+from homeassistant.components import recorder, script, websocket_api
 from homeassistant.components.http import HomeAssistantView
 from homeassistant.const import ATTR_HIDDEN
-from homeassistant.components.recorder.util import session_scope, execute
+from homeassistant.components.recorder.util import (
+    session_scope, execute, execute_numeric, execute_stream,
+    numeric_to_native)
 import homeassistant.helpers.config_validation as cv
 
 _LOGGER = logging.getLogger(__name__)
@@ -23,6 +27,8 @@ DEPENDENCIES = ['recorder', 'http']
 
 CONF_ORDER = 'use_include_order'
 
+WS_TYPE_HISTORY_PERIOD = 'history/period'
+
 CONFIG_SCHEMA = vol.Schema({
     DOMAIN: recorder.FILTER_SCHEMA.extend({
         vol.Optional(CONF_ORDER, default=False): cv.boolean,
@@ -34,7 +40,8 @@ IGNORE_DOMAINS = ('zone', 'scene',)
 
 
 def get_significant_states(hass, start_time, end_time=None, entity_ids=None,
-                           filters=None, include_start_time_state=True):
+                           filters=None, include_start_time_state=True,
+                           include_numeric_states=True):
     """
     Return states changes during UTC period start_time - end_time.
 
@@ -46,23 +53,16 @@ def get_significant_states(hass, start_time, end_time=None, entity_ids=None,
     from homeassistant.components.recorder.models import States
 
     with session_scope(hass=hass) as session:
-        query = session.query(States).filter(
-            (States.domain.in_(SIGNIFICANT_DOMAINS) |
-             (States.last_changed == States.last_updated)) &
-            (States.last_updated > start_time))
-
-        if filters:
-            query = filters.apply(query, entity_ids)
-
-        if end_time is not None:
-            query = query.filter(States.last_updated < end_time)
+        query = _significant_states_query(
+            session, start_time, end_time, entity_ids, filters)
+        states = execute(query.order_by(States.last_updated))
 
-        query = query.order_by(States.last_updated)
+        if include_numeric_states:
+            states = _merge_numeric_states(
+                states, _numeric_states_during_period(
+                    session, start_time, end_time, entity_ids, filters))
 
-        states = (
-            state for state in execute(query)
-            if (_is_significant(state) and
-                not state.attributes.get(ATTR_HIDDEN, False)))
+        states = _filter_significant(states)
 
     if _LOGGER.isEnabledFor(logging.DEBUG):
         elapsed = time.perf_counter() - timer_start
@@ -74,6 +74,60 @@ def get_significant_states(hass, start_time, end_time=None, entity_ids=None,
         include_start_time_state)
 
 
+def stream_significant_states(hass, start_time, end_time=None,
+                              entity_ids=None, filters=None,
+                              include_start_time_state=True,
+                              include_numeric_states=True):
+    """Yield the significant states during a period as a list per entity.
+
+    Unlike get_significant_states the states are read from the database in
+    batches ordered by entity, so only the states of the current entity are
+    held in memory. The lists are yielded in entity_id order.
+    """
+    from homeassistant.components.recorder.models import (
+        NumericStates, States)
+
+    initial_states = {}
+    if include_start_time_state:
+        for state in get_states(hass, start_time, entity_ids, filters=filters):
+            initial_states[state.entity_id] = state.evolve(
+                last_changed=start_time, last_updated=start_time)
+
+    # Popped from the end while the entities are passed in order
+    pending = sorted(initial_states, reverse=True)
+
+    with session_scope(hass=hass) as session:
+        query = _significant_states_query(
+            session, start_time, end_time, entity_ids, filters).order_by(
+                States.entity_id, States.last_updated)
+
+        states = execute_stream(query)
+
+        if include_numeric_states:
+            numeric_query = _numeric_period_query(
+                session, start_time, end_time, entity_ids, filters).order_by(
+                    NumericStates.entity_id, NumericStates.last_updated)
+
+            states = heapq.merge(
+                states, execute_stream(numeric_query, numeric_to_native()),
+                key=attrgetter('entity_id', 'last_updated'))
+
+        states = _filter_significant(states)
+
+        for entity_id, group in groupby(states, attrgetter('entity_id')):
+            while pending and pending[-1] < entity_id:
+                yield [initial_states.pop(pending.pop())]
+
+            state_list = []
+            if pending and pending[-1] == entity_id:
+                state_list.append(initial_states.pop(pending.pop()))
+            state_list.extend(group)
+            yield state_list
+
+    while pending:
+        yield [initial_states.pop(pending.pop())]
+
+
 def state_changes_during_period(hass, start_time, end_time=None,
                                 entity_id=None):
     """Return states changes during UTC period start_time - end_time."""
@@ -92,15 +146,18 @@ def state_changes_during_period(hass, start_time, end_time=None,
 
         entity_ids = [entity_id] if entity_id is not None else None
 
-        states = execute(
-            query.order_by(States.last_updated))
+        states = _merge_numeric_states(
+            execute(query.order_by(States.last_updated)),
+            _numeric_states_during_period(
+                session, start_time, end_time, entity_ids))
 
     return states_to_json(hass, states, start_time, entity_ids)
 
 
 def get_last_state_changes(hass, number_of_states, entity_id):
     """Return the last number_of_states."""
-    from homeassistant.components.recorder.models import States
+    from homeassistant.components.recorder.models import (
+        NumericStates, States)
 
     start_time = dt_util.utcnow()
 
@@ -116,7 +173,18 @@ def get_last_state_changes(hass, number_of_states, entity_id):
         states = execute(
             query.order_by(States.last_updated.desc()).limit(number_of_states))
 
-    return states_to_json(hass, reversed(states),
+        numeric_states = execute_numeric(
+            _numeric_query(session, entity_ids).filter(
+                NumericStates.last_changed == NumericStates.last_updated
+            ).order_by(
+                NumericStates.last_updated.desc()).limit(number_of_states))
+
+        states = list(_merge_numeric_states(
+            reversed(states), reversed(numeric_states)))
+        if number_of_states is not None:
+            states = states[-number_of_states:]
+
+    return states_to_json(hass, states,
                           start_time,
                           entity_ids,
                           include_start_time_state=False)
@@ -192,10 +260,123 @@ def get_states(hass, utc_point_in_time, entity_ids=None, run=None,
         if filters:
             query = filters.apply(query, entity_ids)
 
-        return [state for state in execute(query)
+        states = {state.entity_id: state for state in execute(query)}
+
+        # The latest state wins if an entity is in both tables, this
+        # happens when compact numeric states are turned on or off.
+        for state in _numeric_states_at(
+                session, utc_point_in_time, entity_ids, run, filters):
+            if (state.entity_id not in states or
+                    states[state.entity_id].last_updated <
+                    state.last_updated):
+                states[state.entity_id] = state
+
+        return [state for state in states.values()
                 if not state.attributes.get(ATTR_HIDDEN, False)]
 
 
+def _significant_states_query(session, start_time, end_time=None,
+                              entity_ids=None, filters=None):
+    """Return a query for the significant states during a period."""
+    from homeassistant.components.recorder.models import States
+
+    query = session.query(States).filter(
+        (States.domain.in_(SIGNIFICANT_DOMAINS) |
+         (States.last_changed == States.last_updated)) &
+        (States.last_updated > start_time))
+
+    if filters:
+        query = filters.apply(query, entity_ids)
+
+    if end_time is not None:
+        query = query.filter(States.last_updated < end_time)
+
+    return query
+
+
+def _filter_significant(states):
+    """Filter out insignificant and hidden states."""
+    return (
+        state for state in states
+        if (_is_significant(state) and
+            not state.attributes.get(ATTR_HIDDEN, False)))
+
+
+def _numeric_query(session, entity_ids=None, filters=None):
+    """Return a query for numeric states with their attributes."""
+    from homeassistant.components.recorder.models import (
+        NumericStates, StateAttributes)
+
+    query = session.query(NumericStates, StateAttributes).outerjoin(
+        StateAttributes,
+        NumericStates.attributes_id == StateAttributes.attributes_id)
+
+    if filters:
+        query = filters.apply(query, entity_ids, NumericStates)
+    elif entity_ids is not None:
+        query = query.filter(NumericStates.entity_id.in_(entity_ids))
+
+    return query
+
+
+def _numeric_period_query(session, start_time, end_time=None,
+                          entity_ids=None, filters=None):
+    """Return a query for the numeric state changes during a period."""
+    from homeassistant.components.recorder.models import NumericStates
+
+    query = _numeric_query(session, entity_ids, filters).filter(
+        (NumericStates.last_changed == NumericStates.last_updated) &
+        (NumericStates.last_updated > start_time))
+
+    if end_time is not None:
+        query = query.filter(NumericStates.last_updated < end_time)
+
+    return query
+
+
+def _numeric_states_during_period(session, start_time, end_time=None,
+                                  entity_ids=None, filters=None):
+    """Return the numeric states during UTC period start_time - end_time."""
+    from homeassistant.components.recorder.models import NumericStates
+
+    query = _numeric_period_query(
+        session, start_time, end_time, entity_ids, filters)
+
+    return execute_numeric(query.order_by(NumericStates.last_updated))
+
+
+def _numeric_states_at(session, utc_point_in_time, entity_ids, run,
+                       filters):
+    """Return the numeric states at a specific point in time."""
+    from sqlalchemy import func
+    from homeassistant.components.recorder.models import NumericStates
+
+    most_recent_ids = session.query(
+        func.max(NumericStates.numeric_state_id).label('max_id')
+    ).filter(
+        (NumericStates.last_updated >= run.start) &
+        (NumericStates.last_updated < utc_point_in_time))
+
+    if entity_ids:
+        most_recent_ids = most_recent_ids.filter(
+            NumericStates.entity_id.in_(entity_ids))
+
+    most_recent_ids = most_recent_ids.group_by(
+        NumericStates.entity_id).subquery()
+
+    query = _numeric_query(session, entity_ids, filters).join(
+        most_recent_ids,
+        NumericStates.numeric_state_id == most_recent_ids.c.max_id)
+
+    return execute_numeric(query)
+
+
+def _merge_numeric_states(states, numeric_states):
+    """Merge states and numeric states ordered by last_updated."""
+    return heapq.merge(
+        states, numeric_states, key=attrgetter('last_updated'))
+
+
 def states_to_json(
         hass,
         states,
@@ -218,9 +399,8 @@ def states_to_json(
     timer_start = time.perf_counter()
     if include_start_time_state:
         for state in get_states(hass, start_time, entity_ids, filters=filters):
-            state.last_changed = start_time
-            state.last_updated = start_time
-            result[state.entity_id].append(state)
+            result[state.entity_id].append(state.evolve(
+                last_changed=start_time, last_updated=start_time))
 
     if _LOGGER.isEnabledFor(logging.DEBUG):
         elapsed = time.perf_counter() - timer_start
@@ -253,7 +433,10 @@ async def async_setup(hass, config):
         filters.included_domains = include.get(CONF_DOMAINS, [])
     use_include_order = conf.get(CONF_ORDER)
 
+    hass.data[DOMAIN] = (filters, use_include_order)
     hass.http.register_view(HistoryPeriodView(filters, use_include_order))
+    hass.components.websocket_api.async_register_command(
+        websocket_history_period)
     await hass.components.frontend.async_register_built_in_panel(
         'history', 'history', 'hass:poll-box')
 
@@ -306,32 +489,321 @@ class HistoryPeriodView(HomeAssistantView):
             entity_ids = entity_ids.lower().split(',')
         include_start_time_state = 'skip_initial_state' not in request.query
 
+        max_points = request.query.get('max_points')
+        if max_points:
+            try:
+                max_points = int(max_points)
+            except ValueError:
+                max_points = 0
+            if max_points < 1:
+                return self.json_message(
+                    'Invalid max_points', HTTP_BAD_REQUEST)
+
         hass = request.app['hass']
 
-        result = await hass.async_add_job(
-            get_significant_states, hass, start_time, end_time,
-            entity_ids, self.filters, include_start_time_state)
-        result = list(result.values())
+        args = (hass, start_time, end_time, entity_ids, self.filters,
+                include_start_time_state, max_points)
+
+        # Reordering needs the full result, otherwise the history is
+        # streamed to the client per entity.
+        if self.use_include_order:
+            response = await self.json_stream(
+                request, get_history, *args, True)
+        else:
+            response = await self.json_stream(request, stream_history, *args)
+
         if _LOGGER.isEnabledFor(logging.DEBUG):
             elapsed = time.perf_counter() - timer_start
-            _LOGGER.debug(
-                'Extracted %d states in %fs', sum(map(len, result)), elapsed)
+            _LOGGER.debug('Streamed history in %fs', elapsed)
 
-        # Optionally reorder the result to respect the ordering given
-        # by any entities explicitly included in the configuration.
+        return response
 
-        if self.use_include_order:
-            sorted_result = []
-            for order_entity in self.filters.included_entities:
-                for state_list in result:
-                    if state_list[0].entity_id == order_entity:
-                        sorted_result.append(state_list)
-                        result.remove(state_list)
-                        break
-            sorted_result.extend(result)
-            result = sorted_result
 
-        return await hass.async_add_job(self.json, result)
+def get_history(hass, start_time, end_time=None, entity_ids=None,
+                filters=None, include_start_time_state=True,
+                max_points=None, use_include_order=False):
+    """Return the significant states as a list of state lists per entity.
+
+    If max_points is given, numeric histories are downsampled to at most
+    max_points buckets.
+    """
+    if not max_points:
+        result = get_significant_states(
+            hass, start_time, end_time, entity_ids, filters,
+            include_start_time_state)
+    else:
+        if end_time is None:
+            end_time = dt_util.utcnow()
+
+        # Numeric states are downsampled by the database
+        buckets = get_numeric_buckets(
+            hass, start_time, end_time, max_points, entity_ids, filters)
+        result = get_significant_states(
+            hass, start_time, end_time, entity_ids, filters,
+            include_start_time_state, include_numeric_states=False)
+
+        for entity_id, state_list in result.items():
+            result[entity_id] = _merge_buckets(
+                downsample_states(state_list, start_time, end_time,
+                                  max_points),
+                buckets.pop(entity_id, []))
+        result.update(buckets)
+
+    result = list(result.values())
+
+    # Optionally reorder the result to respect the ordering given
+    # by any entities explicitly included in the configuration.
+
+    if use_include_order:
+        sorted_result = []
+        for order_entity in filters.included_entities:
+            for state_list in result:
+                if _entity_id(state_list[0]) == order_entity:
+                    sorted_result.append(state_list)
+                    result.remove(state_list)
+                    break
+        sorted_result.extend(result)
+        result = sorted_result
+
+    return result
+
+
+def stream_history(hass, start_time, end_time=None, entity_ids=None,
+                   filters=None, include_start_time_state=True,
+                   max_points=None):
+    """Yield the significant states as a state list per entity.
+
+    If max_points is given, numeric histories are downsampled to at most
+    max_points buckets.
+    """
+    if not max_points:
+        yield from stream_significant_states(
+            hass, start_time, end_time, entity_ids, filters,
+            include_start_time_state)
+        return
+
+    if end_time is None:
+        end_time = dt_util.utcnow()
+
+    # Numeric states are downsampled by the database, there are at most
+    # max_points buckets per entity.
+    buckets = get_numeric_buckets(
+        hass, start_time, end_time, max_points, entity_ids, filters)
+    # Popped from the end while the entities are passed in order
+    pending = sorted(buckets, reverse=True)
+
+    for state_list in stream_significant_states(
+            hass, start_time, end_time, entity_ids, filters,
+            include_start_time_state, include_numeric_states=False):
+        entity_id = state_list[0].entity_id
+        while pending and pending[-1] < entity_id:
+            yield buckets.pop(pending.pop())
+
+        state_list = downsample_states(
+            state_list, start_time, end_time, max_points)
+        if pending and pending[-1] == entity_id:
+            state_list = _merge_buckets(
+                state_list, buckets.pop(pending.pop()))
+        yield state_list
+
+    while pending:
+        yield buckets.pop(pending.pop())
+
+
+def get_numeric_buckets(hass, start_time, end_time, max_points,
+                        entity_ids=None, filters=None):
+    """Return the numeric state changes during a period in buckets.
+
+    The period is split in max_points buckets of equal length and the
+    database aggregates the numeric states of each entity per bucket, so
+    at most max_points rows per entity are read. The buckets are returned
+    per entity_id in the layout of downsample_states.
+    """
+    from sqlalchemy import func
+    from homeassistant.components.recorder.models import (
+        NumericStates, StateAttributes, TimeBucket, process_timestamp)
+
+    if end_time <= start_time:
+        return {}
+
+    bucket_length = (end_time - start_time).total_seconds() / max_points
+    result = defaultdict(list)
+    attributes = {}
+
+    def to_native(row):
+        """Convert a bucket row and the attributes of its last state."""
+        if row.StateAttributes is None:
+            attrs = {}
+        else:
+            attrs = attributes.get(row.StateAttributes.attributes_id)
+            if attrs is None:
+                attrs = attributes[row.StateAttributes.attributes_id] = \
+                    row.StateAttributes.to_native()
+
+        last_updated = process_timestamp(row.last_updated)
+        return {
+            'entity_id': row.entity_id,
+            'state': row.mean,
+            'attributes': dict(attrs),
+            'last_changed': last_updated,
+            'last_updated': last_updated,
+            'min': row.min,
+            'max': row.max,
+        }
+
+    with session_scope(hass=hass) as session:
+        query = session.query(
+            NumericStates.entity_id,
+            func.min(NumericStates.last_updated).label('last_updated'),
+            func.min(NumericStates.state).label('min'),
+            func.max(NumericStates.state).label('max'),
+            func.avg(NumericStates.state).label('mean'),
+            func.max(NumericStates.numeric_state_id).label('last_id'),
+        ).filter(
+            (NumericStates.last_changed == NumericStates.last_updated) &
+            (NumericStates.last_updated > start_time) &
+            (NumericStates.last_updated < end_time))
+
+        if filters:
+            query = filters.apply(query, entity_ids, NumericStates)
+        elif entity_ids is not None:
+            query = query.filter(NumericStates.entity_id.in_(entity_ids))
+
+        buckets = query.group_by(
+            NumericStates.entity_id,
+            TimeBucket(NumericStates.last_updated, start_time, bucket_length)
+        ).subquery()
+
+        # The attributes of the last state in the bucket are kept
+        query = session.query(
+            buckets.c.entity_id, buckets.c.last_updated, buckets.c.min,
+            buckets.c.max, buckets.c.mean, StateAttributes,
+        ).select_from(buckets).join(
+            NumericStates, NumericStates.numeric_state_id == buckets.c.last_id
+        ).outerjoin(
+            StateAttributes,
+            NumericStates.attributes_id == StateAttributes.attributes_id
+        ).order_by(buckets.c.entity_id, buckets.c.last_updated)
+
+        for bucket in execute(query, to_native):
+            result[bucket['entity_id']].append(bucket)
+
+    return dict(result)
+
+
+def _entity_id(state):
+    """Return the entity_id of a state or a downsampled bucket."""
+    if isinstance(state, dict):
+        return state['entity_id']
+    return state.entity_id
+
+
+def _last_updated(state):
+    """Return the last_updated of a state or a downsampled bucket."""
+    if isinstance(state, dict):
+        return state['last_updated']
+    return state.last_updated
+
+
+def _merge_buckets(states, buckets):
+    """Merge the states of an entity and its numeric buckets by time.
+
+    An entity only has both when compact numeric states were turned on or
+    off during the period, or states contains the state at the start time.
+    """
+    if not states:
+        return buckets
+    return list(heapq.merge(states, buckets, key=_last_updated))
+
+
+def downsample_states(states, start_time, end_time, max_points):
+    """Reduce a list of numeric states to at most max_points buckets.
+
+    The period is split in max_points buckets of equal length. Each bucket
+    is returned in the State.as_dict format with the mean of its states as
+    state and their min and max added. Lists with a non numeric state are
+    returned unchanged.
+    """
+    if len(states) <= max_points or end_time <= start_time:
+        return states
+
+    try:
+        values = [float(state.state) for state in states]
+    except ValueError:
+        return states
+
+    bucket_length = (end_time - start_time) / max_points
+    buckets = []
+    bucket_index = None
+
+    for state, value in zip(states, values):
+        index = int((state.last_updated - start_time) / bucket_length)
+        index = min(max(index, 0), max_points - 1)
+
+        if index != bucket_index:
+            bucket_index = index
+            bucket = {
+                'entity_id': state.entity_id,
+                'last_changed': state.last_updated,
+                'last_updated': state.last_updated,
+                'min': value,
+                'max': value,
+                'sum': value,
+                'count': 1,
+            }
+            buckets.append(bucket)
+        else:
+            bucket['min'] = min(bucket['min'], value)
+            bucket['max'] = max(bucket['max'], value)
+            bucket['sum'] += value
+            bucket['count'] += 1
+
+        # The attributes of the last state in the bucket are kept
+        bucket['attributes'] = state.attributes
+
+    for bucket in buckets:
+        bucket['state'] = bucket.pop('sum') / bucket.pop('count')
+        bucket['attributes'] = dict(bucket['attributes'])
+
+    return buckets
+
+
+@websocket_api.async_response
+@websocket_api.websocket_command({
+    vol.Required('type'): WS_TYPE_HISTORY_PERIOD,
+    vol.Required('start_time'): str,
+    vol.Optional('end_time'): str,
+    vol.Optional('entity_ids'): cv.entity_ids,
+    vol.Optional('skip_initial_state', default=False): cv.boolean,
+    vol.Optional('max_points'): vol.All(vol.Coerce(int), vol.Range(min=1)),
+})
+async def websocket_history_period(hass, connection, msg):
+    """Handle a history period request."""
+    start_time = dt_util.parse_datetime(msg['start_time'])
+    if start_time is None:
+        connection.send_message(websocket_api.error_message(
+            msg['id'], 'invalid_start_time', 'Invalid start_time'))
+        return
+    start_time = dt_util.as_utc(start_time)
+
+    if 'end_time' in msg:
+        end_time = dt_util.parse_datetime(msg['end_time'])
+        if end_time is None:
+            connection.send_message(websocket_api.error_message(
+                msg['id'], 'invalid_end_time', 'Invalid end_time'))
+            return
+        end_time = dt_util.as_utc(end_time)
+    else:
+        end_time = start_time + timedelta(days=1)
+
+    history_filters, use_include_order = hass.data[DOMAIN]
+
+    result = await hass.async_add_job(
+        get_history, hass, start_time, end_time, msg.get('entity_ids'),
+        history_filters, not msg['skip_initial_state'],
+        msg.get('max_points'), use_include_order)
+
+    connection.send_message(websocket_api.result_message(msg['id'], result))
 
 
 class Filters:
@@ -344,7 +816,7 @@ class Filters:
         self.included_entities = []
         self.included_domains = []
 
-    def apply(self, query, entity_ids=None):
+    def apply(self, query, entity_ids=None, model=None):
         """Apply the include/exclude filter on domains and entities on query.
 
         Following rules apply:
@@ -354,43 +826,47 @@ class Filters:
           entities and domains from all the entities in the system.
         * if include and exclude is defined - select the entities specified in
           the include and filter out the ones from the exclude list.
+
+        The filter is applied to the columns of model, States by default.
         """
-        from homeassistant.components.recorder.models import States
+        if model is None:
+            from homeassistant.components.recorder.models import States
+            model = States
 
         # specific entities requested - do not in/exclude anything
         if entity_ids is not None:
-            return query.filter(States.entity_id.in_(entity_ids))
-        query = query.filter(~States.domain.in_(IGNORE_DOMAINS))
+            return query.filter(model.entity_id.in_(entity_ids))
+        query = query.filter(~model.domain.in_(IGNORE_DOMAINS))
 
         filter_query = None
         # filter if only excluded domain is configured
         if self.excluded_domains and not self.included_domains:
-            filter_query = ~States.domain.in_(self.excluded_domains)
+            filter_query = ~model.domain.in_(self.excluded_domains)
             if self.included_entities:
-                filter_query &= States.entity_id.in_(self.included_entities)
+                filter_query &= model.entity_id.in_(self.included_entities)
         # filter if only included domain is configured
         elif not self.excluded_domains and self.included_domains:
-            filter_query = States.domain.in_(self.included_domains)
+            filter_query = model.domain.in_(self.included_domains)
             if self.included_entities:
-                filter_query |= States.entity_id.in_(self.included_entities)
+                filter_query |= model.entity_id.in_(self.included_entities)
         # filter if included and excluded domain is configured
         elif self.excluded_domains and self.included_domains:
-            filter_query = ~States.domain.in_(self.excluded_domains)
+            filter_query = ~model.domain.in_(self.excluded_domains)
             if self.included_entities:
-                filter_query &= (States.domain.in_(self.included_domains) |
-                                 States.entity_id.in_(self.included_entities))
+                filter_query &= (model.domain.in_(self.included_domains) |
+                                 model.entity_id.in_(self.included_entities))
             else:
-                filter_query &= (States.domain.in_(self.included_domains) & ~
-                                 States.domain.in_(self.excluded_domains))
+                filter_query &= (model.domain.in_(self.included_domains) & ~
+                                 model.domain.in_(self.excluded_domains))
         # no domain filter just included entities
         elif not self.excluded_domains and not self.included_domains and \
                 self.included_entities:
-            filter_query = States.entity_id.in_(self.included_entities)
+            filter_query = model.entity_id.in_(self.included_entities)
         if filter_query is not None:
             query = query.filter(filter_query)
         # finally apply excluded entities filter if configured
         if self.excluded_entities:
-            query = query.filter(~States.entity_id.in_(self.excluded_entities))
+            query = query.filter(~model.entity_id.in_(self.excluded_entities))
         return query
 
 
@@ -1,44 +1,254 @@
 """Static file handling for HTTP component."""
+import asyncio
+from email.utils import formatdate
+import mimetypes
+import os
 from pathlib import Path
+from typing import Dict, Optional  # noqa: F401
 
+import attr
 from aiohttp import hdrs
-from aiohttp.web import FileResponse
+from aiohttp.web import FileResponse, Response, StreamResponse
 from aiohttp.web_exceptions import HTTPNotFound, HTTPForbidden
 from aiohttp.web_urldispatcher import StaticResource
 
 CACHE_TIME = 31 * 86400  # = 1 month
 CACHE_HEADERS = {hdrs.CACHE_CONTROL: "public, max-age={}".format(CACHE_TIME)}
 
+# Encodings of the precompressed siblings of files, in order of preference
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+@attr.s(slots=True, frozen=True)
+class StaticFile:
+    """A file in a static directory."""
+
+    path = attr.ib(type=Path)
+    size = attr.ib(type=int)
+    mtime = attr.ib(type=float)
+    etag = attr.ib(type=str)
+    content_type = attr.ib(type=str)
+    encoding = attr.ib(type=Optional[str])
+    # Precompressed siblings by encoding
+    variants = attr.ib(type=dict, factory=dict)
+
+
+def _static_file(path, stat, encoding=None, variants=None):
+    """Create a static file from the result of stat."""
+    content_type, guessed_encoding = mimetypes.guess_type(str(path))
+    return StaticFile(
+        path=path, size=stat.st_size, mtime=stat.st_mtime,
+        etag='"{:x}-{:x}"'.format(stat.st_mtime_ns, stat.st_size),
+        content_type=content_type or 'application/octet-stream',
+        encoding=encoding or guessed_encoding, variants=variants or {})
+
+
+def _scan_directory(root, rel_dir, follow_symlinks):
+    """Return the files of a directory by name, None for subdirectories.
+
+    Returns None if the directory does not exist or is outside of root.
+    """
+    directory = root.joinpath(rel_dir)
+    try:
+        directory = directory.resolve()
+        if not follow_symlinks:
+            directory.relative_to(root)
+        entries = list(os.scandir(str(directory)))
+    except (ValueError, OSError):
+        return None
+
+    index = {}  # type: Dict[str, Optional[StaticFile]]
+    stats = {}
+    for entry in entries:
+        try:
+            if not follow_symlinks and entry.is_symlink():
+                Path(entry.path).resolve().relative_to(root)
+            if entry.is_dir():
+                index[entry.name] = None
+            elif entry.is_file():
+                stats[entry.name] = entry.stat()
+        except (ValueError, OSError):
+            continue
+
+    for name, stat in stats.items():
+        variants = {}
+        for encoding, suffix in ENCODINGS:
+            variant_stat = stats.get(name + suffix)
+            if variant_stat is not None:
+                variants[encoding] = _static_file(
+                    directory / (name + suffix), variant_stat, encoding)
+        index[name] = _static_file(directory / name, stat, variants=variants)
+
+    return index
+
+
+def _accepted_encodings(request):
+    """Return the content codings accepted by the client."""
+    accepted = set()
+    for coding in request.headers.get(hdrs.ACCEPT_ENCODING, '').split(','):
+        coding, _, params = coding.partition(';')
+        if params.replace(' ', '') in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000'):
+            continue
+        accepted.add(coding.strip().lower())
+    return accepted
+
+
+def _etag_matches(if_none_match, etag):
+    """Return if an If-None-Match header matches an entity tag."""
+    for tag in if_none_match.split(','):
+        tag = tag.strip()
+        if tag.startswith('W/'):
+            tag = tag[2:]
+        if tag in ('*', etag):
+            return True
+    return False
+
+
+def _open(path):
+    """Open a file, returning it with its current size."""
+    fobj = path.open('rb')
+    return fobj, os.fstat(fobj.fileno()).st_size
+
 
 # https://github.com/PyCQA/astroid/issues/633
 # pylint: disable=duplicate-bases
 class CachingStaticResource(StaticResource):
-    """Static Resource handler that will add cache headers."""
+    """Static Resource handler that will add cache headers.
+
+    The files of each directory are looked up once in the executor and
+    indexed with their entity tags and precompressed siblings, which are
+    served to the clients that accept them. The served file is checked
+    with stat on each request, so files edited in place are not answered
+    with a stale entity tag.
+    """
+
+    def __init__(self, *args, **kwargs):
+        """Initialize the resource."""
+        super().__init__(*args, **kwargs)
+        self._directories = {}  # type: Dict[str, Dict[str, Optional[StaticFile]]]  # noqa: E501
+        self._scans = {}  # type: Dict[str, asyncio.Future]
+
+    async def _async_scan(self, rel_dir):
+        """Index a directory, sharing the scan between requests."""
+        scan = self._scans.get(rel_dir)
+        if scan is None:
+            scan = self._scans[rel_dir] = \
+                asyncio.get_event_loop().run_in_executor(
+                    None, _scan_directory, self._directory, rel_dir,
+                    self._follow_symlinks)
+            scan.add_done_callback(
+                lambda _: self._scans.pop(rel_dir, None))
+
+        index = await scan
+        if index is not None:
+            self._directories[rel_dir] = index
+        return index
 
     async def _handle(self, request):
         rel_url = request.match_info['filename']
-        try:
-            filename = Path(rel_url)
-            if filename.anchor:
-                # rel_url is an absolute name like
-                # /static/\\machine_name\c$ or /static/D:\path
-                # where the static dir is totally different
-                raise HTTPForbidden()
-            filepath = self._directory.joinpath(filename).resolve()
-            if not self._follow_symlinks:
-                filepath.relative_to(self._directory)
-        except (ValueError, FileNotFoundError) as error:
-            # relatively safe
-            raise HTTPNotFound() from error
-        except Exception as error:
-            # perm error or other kind!
-            request.app.logger.exception(error)
-            raise HTTPNotFound() from error
+        if Path(rel_url).anchor:
+            # rel_url is an absolute name like
+            # /static/\\machine_name\c$ or /static/D:\path
+            # where the static dir is totally different
+            raise HTTPForbidden()
+
+        rel_path = os.path.normpath(rel_url)
+        if rel_path == os.curdir:
+            return await super()._handle(request)
+        if rel_path.split(os.sep)[0] == os.pardir:
+            raise HTTPNotFound()
+
+        rel_dir, name = os.path.split(rel_path)
+        index = self._directories.get(rel_dir)
+        if index is None or name not in index:
+            # Files may have been added since the directory was indexed
+            index = await self._async_scan(rel_dir)
+            if index is None or name not in index:
+                raise HTTPNotFound()
 
+        static_file = index[name]
         # on opening a dir, load its contents if allowed
-        if filepath.is_dir():
+        if static_file is None:
             return await super()._handle(request)
-        if filepath.is_file():
+
+        accepted = _accepted_encodings(request)
+        for encoding, _ in ENCODINGS:
+            if encoding in accepted and encoding in static_file.variants:
+                selected = static_file.variants[encoding]
+                break
+        else:
+            selected = static_file
+
+        # Files can be edited in place, check the indexed file is current
+        try:
+            stat = await asyncio.get_event_loop().run_in_executor(
+                None, os.stat, str(selected.path))
+        except OSError as error:
+            self._directories.pop(rel_dir, None)
+            raise HTTPNotFound() from error
+
+        current = _static_file(selected.path, stat, selected.encoding)
+        if current.etag != selected.etag:
+            await self._async_scan(rel_dir)
+            selected = current
+
+        headers = dict(CACHE_HEADERS)
+        headers[hdrs.ETAG] = selected.etag
+        headers[hdrs.LAST_MODIFIED] = formatdate(selected.mtime, usegmt=True)
+        if static_file.variants:
+            headers[hdrs.VARY] = hdrs.ACCEPT_ENCODING
+
+        if_none_match = request.headers.get(hdrs.IF_NONE_MATCH)
+        if if_none_match is not None:
+            not_modified = _etag_matches(if_none_match, selected.etag)
+        else:
+            modified_since = request.if_modified_since
+            not_modified = (modified_since is not None and
+                            int(selected.mtime) <= modified_since.timestamp())
+        if not_modified:
+            return Response(status=304, headers=headers)
+
+        headers[hdrs.CONTENT_TYPE] = static_file.content_type
+        if selected.encoding is not None:
+            headers[hdrs.CONTENT_ENCODING] = selected.encoding
+
+        if hdrs.RANGE in request.headers:
             return FileResponse(
-                filepath, chunk_size=self._chunk_size, headers=CACHE_HEADERS)
-        raise HTTPNotFound
+                static_file.path, chunk_size=self._chunk_size,
+                headers=CACHE_HEADERS)
+
+        return await self._async_send(request, rel_dir, selected, headers)
+
+    async def _async_send(self, request, rel_dir, static_file, headers):
+        """Stream a file, reading it in the executor."""
+        loop = asyncio.get_event_loop()
+        try:
+            fobj, size = await loop.run_in_executor(
+                None, _open, static_file.path)
+        except OSError as error:
+            self._directories.pop(rel_dir, None)
+            raise HTTPNotFound() from error
+
+        try:
+            if size != static_file.size:
+                # The file changed, index the directory again next time
+                self._directories.pop(rel_dir, None)
+
+            response = StreamResponse(headers=headers)
+            response.content_length = size
+            await response.prepare(request)
+
+            if request.method != hdrs.METH_HEAD:
+                remaining = size
+                while remaining > 0:
+                    chunk = await loop.run_in_executor(
+                        None, fobj.read, min(self._chunk_size, remaining))
+                    if not chunk:
+                        break
+                    await response.write(chunk)
+                    remaining -= len(chunk)
+
+            await response.write_eof()
+            return response
+        finally:
+            await loop.run_in_executor(None, fobj.close)
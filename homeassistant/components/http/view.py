@@ -2,6 +2,7 @@
 import asyncio
 import json
 import logging
+import threading
 
 from aiohttp import web
 from aiohttp.web_exceptions import (
@@ -18,6 +19,11 @@ from .const import KEY_AUTHENTICATED, KEY_REAL_IP, KEY_HASS
 
 _LOGGER = logging.getLogger(__name__)
 
+# Serialized JSON is buffered up to this many bytes before it is written
+STREAM_CHUNK_SIZE = 64 * 1024
+# Number of chunks serialized ahead of the writes to the client
+STREAM_QUEUE_SIZE = 4
+
 
 class HomeAssistantView:
     """Base view for all views."""
@@ -52,6 +58,45 @@ class HomeAssistantView:
         response.enable_compression()
         return response
 
+    async def json_stream(self, request, generate, *args):
+        """Stream a JSON array response.
+
+        generate is called with args in the executor and returns an iterable
+        of array items. The items are serialized one by one in the executor
+        and passed in chunks through a bounded queue to the event loop, which
+        writes them to the client. The full result is never held in memory
+        and the executor job is done once all items have been read.
+        """
+        hass = request.app[KEY_HASS]
+        queue = asyncio.Queue(STREAM_QUEUE_SIZE)
+        stop = threading.Event()
+        job = hass.async_add_executor_job(
+            _serialize_json_stream, hass.loop, queue, stop, generate, args)
+
+        # The response is only prepared when the first chunk is written, an
+        # error before that still results in a regular error response.
+        response = web.StreamResponse()
+        response.content_type = CONTENT_TYPE_JSON
+        response.enable_compression()
+
+        try:
+            while True:
+                chunk = await queue.get()
+                if chunk is None:
+                    break
+                if not response.prepared:
+                    await response.prepare(request)
+                await response.write(chunk)
+        finally:
+            stop.set()
+            # Unblock the job if it is waiting for room in the queue
+            while not queue.empty():
+                queue.get_nowait()
+
+        await job
+        await response.write_eof()
+        return response
+
     def json_message(self, message, status_code=200, message_code=None,
                      headers=None):
         """Return a JSON message response."""
@@ -84,6 +129,58 @@ class HomeAssistantView:
             app['allow_cors'](route)
 
 
+def _serialize_json_stream(loop, queue, stop, generate, args):
+    """Serialize the items of generate as a JSON array into queue.
+
+    Putting a chunk blocks while the queue is full. Stops early when stop
+    is set and ends with None in the queue otherwise. The items are closed
+    when done, which releases the database session of a generator that was
+    not read until the end.
+    """
+    def put(data):
+        """Put data in the queue from the executor."""
+        asyncio.run_coroutine_threadsafe(queue.put(data), loop).result()
+
+    items = generate(*args)
+    try:
+        chunk = [b'[']
+        size = 0
+        separator = b''
+
+        for item in items:
+            if stop.is_set():
+                return
+
+            try:
+                msg = json.dumps(
+                    item, sort_keys=True, cls=JSONEncoder, allow_nan=False
+                ).encode('UTF-8')
+            except (ValueError, TypeError) as err:
+                _LOGGER.error(
+                    'Unable to serialize to JSON: %s\n%s', err, item)
+                raise HTTPInternalServerError
+
+            chunk.append(separator)
+            chunk.append(msg)
+            separator = b','
+            size += len(msg)
+
+            if size >= STREAM_CHUNK_SIZE:
+                put(b''.join(chunk))
+                chunk = []
+                size = 0
+
+        chunk.append(b']')
+        put(b''.join(chunk))
+
+    finally:
+        close = getattr(items, 'close', None)
+        if close is not None:
+            close()
+        if not stop.is_set():
+            put(None)
+
+
 def request_handler_factory(view, handler):
     """Wrap the handler classes."""
     assert asyncio.iscoroutinefunction(handler) or is_callback(handler), \
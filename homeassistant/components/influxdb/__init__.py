@@ -1,11 +1,16 @@
 """Support for sending data to an Influx database."""
+from concurrent.futures import ThreadPoolExecutor
+import gzip
+import itertools
 import logging
+import os
 import re
 import queue
 import threading
 import time
 import math
 
+import attr
 import requests.exceptions
 import voluptuous as vol
 
@@ -14,10 +19,14 @@ from homeassistant.const import (
     CONF_PASSWORD, CONF_PORT, CONF_SSL, CONF_USERNAME, CONF_VERIFY_SSL,
     EVENT_STATE_CHANGED, EVENT_HOMEASSISTANT_STOP, STATE_UNAVAILABLE,
     STATE_UNKNOWN)
+from homeassistant.components import websocket_api
+from homeassistant.core import callback
 from homeassistant.helpers import state as state_helper
 import homeassistant.helpers.config_validation as cv
 from homeassistant.helpers.entity_values import EntityValues
 
+from .line_protocol import point_to_line
+
 REQUIREMENTS = ['influxdb==5.2.0']
 
 _LOGGER = logging.getLogger(__name__)
@@ -31,6 +40,7 @@ CONF_COMPONENT_CONFIG = 'component_config'
 CONF_COMPONENT_CONFIG_GLOB = 'component_config_glob'
 CONF_COMPONENT_CONFIG_DOMAIN = 'component_config_domain'
 CONF_RETRY_COUNT = 'max_retries'
+CONF_SPILL_TO_DISK = 'spill_to_disk'
 
 DEFAULT_DATABASE = 'home_assistant'
 DEFAULT_VERIFY_SSL = True
@@ -39,9 +49,18 @@ DOMAIN = 'influxdb'
 TIMEOUT = 5
 RETRY_DELAY = 20
 QUEUE_BACKLOG_SECONDS = 30
+# New events are dropped when this many events wait to be written
+QUEUE_MAX_SIZE = 10000
 
 BATCH_TIMEOUT = 1
-BATCH_BUFFER_SIZE = 100
+BATCH_BUFFER_SIZE = 1000
+# Maximum size of the lines of a batch before compression
+BATCH_MAX_BYTES = 512 * 1024
+MAX_IN_FLIGHT = 4
+GZIP_LEVEL = 5
+
+SPILL_DIR = '.influxdb'
+MAX_SPILL_BYTES = 50 * 1024 * 1024
 
 COMPONENT_CONFIG_SCHEMA_ENTRY = vol.Schema({
     vol.Optional(CONF_OVERRIDE_MEASUREMENT): cv.string,
@@ -66,6 +85,7 @@ CONFIG_SCHEMA = vol.Schema({
         vol.Optional(CONF_PORT): cv.port,
         vol.Optional(CONF_SSL): cv.boolean,
         vol.Optional(CONF_RETRY_COUNT, default=0): cv.positive_int,
+        vol.Optional(CONF_SPILL_TO_DISK, default=False): cv.boolean,
         vol.Optional(CONF_DEFAULT_MEASUREMENT): cv.string,
         vol.Optional(CONF_OVERRIDE_MEASUREMENT): cv.string,
         vol.Optional(CONF_TAGS, default={}):
@@ -228,10 +248,19 @@ def setup(hass, config):
 
         return json
 
+    if conf[CONF_SPILL_TO_DISK]:
+        spill_path = hass.config.path(SPILL_DIR)
+    else:
+        spill_path = None
+
     instance = hass.data[DOMAIN] = InfluxThread(
-        hass, influx, event_to_json, max_tries)
+        hass, influx, event_to_json, max_tries, conf[CONF_DB_NAME],
+        spill_path)
     instance.start()
 
+    hass.add_job(
+        websocket_api.async_register_command, hass, websocket_writer_stats)
+
     def shutdown(event):
         """Shut down the thread."""
         instance.queue.put(None)
@@ -243,45 +272,108 @@ def setup(hass, config):
     return True
 
 
+@websocket_api.websocket_command({
+    vol.Required('type'): 'influxdb/writer_stats',
+})
+@websocket_api.require_admin
+@callback
+def websocket_writer_stats(hass, connection, msg):
+    """Return the metrics of the InfluxDB writer."""
+    connection.send_result(msg['id'], hass.data[DOMAIN].get_stats())
+
+
+@attr.s(slots=True)
+class WriterStats:
+    """Class to hold metrics about the writes to the database."""
+
+    written = attr.ib(type=int, default=0)
+    dropped = attr.ib(type=int, default=0)
+    lost = attr.ib(type=int, default=0)
+    batches = attr.ib(type=int, default=0)
+    in_flight = attr.ib(type=int, default=0)
+    spilled_bytes = attr.ib(type=int, default=0)
+    max_queue_latency = attr.ib(type=float, default=0.0)
+    last_write_latency = attr.ib(type=float, default=0.0)
+    max_write_latency = attr.ib(type=float, default=0.0)
+
+
 class InfluxThread(threading.Thread):
-    """A threaded event handler class."""
+    """A threaded event handler class.
 
-    def __init__(self, hass, influx, event_to_json, max_tries):
+    Events are encoded in the line protocol and written in gzip compressed
+    batches, up to MAX_IN_FLIGHT batches at the same time. If spilling is
+    enabled, batches that could not be written because the database is not
+    reachable are saved to disk and written once it is reachable again.
+    """
+
+    def __init__(self, hass, influx, event_to_json, max_tries, database,
+                 spill_path=None):
         """Initialize the listener."""
         threading.Thread.__init__(self, name='InfluxDB')
-        self.queue = queue.Queue()
+        self.queue = queue.Queue(maxsize=QUEUE_MAX_SIZE)
         self.influx = influx
         self.event_to_json = event_to_json
         self.max_tries = max_tries
+        self.database = database
+        self.spill_path = spill_path
         self.write_errors = 0
         self.shutdown = False
+        self.stats = WriterStats()
+        self._lock = threading.Lock()
+        self._replay_lock = threading.Lock()
+        self._spill_ids = itertools.count()
+        self._in_flight = threading.BoundedSemaphore(MAX_IN_FLIGHT)
+        self._executor = ThreadPoolExecutor(max_workers=MAX_IN_FLIGHT)
+
+        if spill_path is not None and os.path.isdir(spill_path):
+            self.stats.spilled_bytes = sum(
+                os.path.getsize(os.path.join(spill_path, name))
+                for name in os.listdir(spill_path))
+
         hass.bus.listen(EVENT_STATE_CHANGED, self._event_listener)
 
     def _event_listener(self, event):
         """Listen for new messages on the bus and queue them for Influx."""
         item = (time.monotonic(), event)
-        self.queue.put(item)
+        try:
+            self.queue.put_nowait(item)
+        except queue.Full:
+            with self._lock:
+                if not self.stats.dropped:
+                    _LOGGER.warning("Queue is full, dropping new events")
+                self.stats.dropped += 1
 
     @staticmethod
     def batch_timeout():
         """Return number of seconds to wait for more events."""
         return BATCH_TIMEOUT
 
-    def get_events_json(self):
-        """Return a batch of events formatted for writing."""
+    def get_events_lines(self):
+        """Return a batch of events encoded in the line protocol."""
         queue_seconds = QUEUE_BACKLOG_SECONDS + self.max_tries*RETRY_DELAY
 
         count = 0
-        json = []
+        size = 0
+        lines = []
+        deadline = None
+        max_age = 0
 
         dropped = 0
 
         try:
-            while len(json) < BATCH_BUFFER_SIZE and not self.shutdown:
-                timeout = None if count == 0 else self.batch_timeout()
+            while len(lines) < BATCH_BUFFER_SIZE and \
+                    size < BATCH_MAX_BYTES and not self.shutdown:
+                if deadline is None:
+                    timeout = None
+                else:
+                    timeout = max(0, deadline - time.monotonic())
                 item = self.queue.get(timeout=timeout)
                 count += 1
 
+                # The batch is written at most a timeout after its first event
+                if deadline is None:
+                    deadline = time.monotonic() + self.batch_timeout()
+
                 if item is None:
                     self.shutdown = True
                 else:
@@ -290,8 +382,11 @@ class InfluxThread(threading.Thread):
 
                     if age < queue_seconds:
                         event_json = self.event_to_json(event)
-                        if event_json:
-                            json.append(event_json)
+                        line = event_json and point_to_line(event_json)
+                        if line:
+                            lines.append(line)
+                            size += len(line) + 1
+                            max_age = max(max_age, age)
                     else:
                         dropped += 1
 
@@ -301,38 +396,167 @@ class InfluxThread(threading.Thread):
         if dropped:
             _LOGGER.warning("Catching up, dropped %d old events", dropped)
 
-        return count, json
+        with self._lock:
+            self.stats.dropped += dropped
+            self.stats.max_queue_latency = max(
+                self.stats.max_queue_latency, max_age)
 
-    def write_to_influxdb(self, json):
-        """Write preprocessed events to influxdb, with retry."""
+        return count, lines
+
+    def _post(self, body):
+        """Post a compressed body of lines to influxdb."""
+        self.influx.request(
+            url='write', method='POST', params={'db': self.database},
+            data=body, expected_response_code=204, headers={
+                'Content-Type': 'application/octet-stream',
+                'Content-Encoding': 'gzip',
+            })
+
+    def write_to_influxdb(self, body, count):
+        """Write a compressed batch of count events, with retry."""
         from influxdb import exceptions
 
         for retry in range(self.max_tries+1):
+            start = time.monotonic()
             try:
-                self.influx.write_points(json)
+                self._post(body)
+            except (exceptions.InfluxDBClientError,
+                    exceptions.InfluxDBServerError, IOError) as err:
+                error = err
+                if retry < self.max_tries:
+                    time.sleep(RETRY_DELAY)
+                continue
 
+            latency = time.monotonic() - start
+            with self._lock:
                 if self.write_errors:
                     _LOGGER.error("Resumed, lost %d events", self.write_errors)
                     self.write_errors = 0
+                self.stats.written += count
+                self.stats.batches += 1
+                self.stats.last_write_latency = latency
+                self.stats.max_write_latency = max(
+                    self.stats.max_write_latency, latency)
+
+            _LOGGER.debug("Wrote %d events", count)
+            self._write_spilled()
+            return
 
-                _LOGGER.debug("Wrote %d events", len(json))
-                break
-            except (exceptions.InfluxDBClientError, IOError):
-                if retry < self.max_tries:
-                    time.sleep(RETRY_DELAY)
+        # Batches rejected by the database are not kept
+        if self.spill_path is not None and \
+                not isinstance(error, exceptions.InfluxDBClientError) and \
+                self._spill(body, count):
+            return
+
+        with self._lock:
+            if not self.write_errors:
+                _LOGGER.error("Write error: %s", error)
+            self.write_errors += count
+            self.stats.lost += count
+
+    def _spill(self, body, count):
+        """Save a batch to disk, return if there was room for it."""
+        with self._lock:
+            if self.stats.spilled_bytes + len(body) > MAX_SPILL_BYTES:
+                return False
+            if not self.stats.spilled_bytes:
+                _LOGGER.warning("Database is not reachable, saving events "
+                                "to %s", self.spill_path)
+            self.stats.spilled_bytes += len(body)
+            # Spilled batches are written again in order of their names
+            name = '{:016d}-{:06d}-{}.gz'.format(
+                int(time.time() * 1000), next(self._spill_ids) % 1000000,
+                count)
+
+        try:
+            os.makedirs(self.spill_path, exist_ok=True)
+            with open(os.path.join(self.spill_path, name), 'wb') as out:
+                out.write(body)
+        except OSError:
+            _LOGGER.exception("Unable to save events to %s", self.spill_path)
+            with self._lock:
+                self.stats.spilled_bytes -= len(body)
+            return False
+
+        return True
+
+    def _write_spilled(self):
+        """Write the spilled batches to influxdb."""
+        from influxdb import exceptions
+
+        if not self.stats.spilled_bytes or \
+                not self._replay_lock.acquire(blocking=False):
+            return
+
+        try:
+            for name in sorted(os.listdir(self.spill_path)):
+                path = os.path.join(self.spill_path, name)
+                with open(path, 'rb') as spilled:
+                    body = spilled.read()
+                count = int(name[:-len('.gz')].rsplit('-', 1)[1])
+
+                try:
+                    self._post(body)
+                except exceptions.InfluxDBClientError as err:
+                    _LOGGER.error("Dropped %d saved events: %s", count, err)
+                    with self._lock:
+                        self.stats.lost += count
+                except (exceptions.InfluxDBServerError, IOError):
+                    # Written after the next successful write
+                    return
                 else:
-                    if not self.write_errors:
-                        _LOGGER.exception("Write error")
-                    self.write_errors += len(json)
+                    with self._lock:
+                        self.stats.written += count
+                        self.stats.batches += 1
+
+                os.remove(path)
+                with self._lock:
+                    self.stats.spilled_bytes -= len(body)
+
+            _LOGGER.info("Wrote the events saved to %s", self.spill_path)
+        except (OSError, ValueError, IndexError):
+            _LOGGER.exception("Unable to write the events saved to %s",
+                              self.spill_path)
+        finally:
+            self._replay_lock.release()
+
+    def _write_batch(self, count, lines):
+        """Compress and write a batch of lines."""
+        try:
+            body = gzip.compress(
+                '\n'.join(lines).encode('utf-8'), GZIP_LEVEL)
+            self.write_to_influxdb(body, len(lines))
+        except Exception:  # pylint: disable=broad-except
+            _LOGGER.exception("Unexpected error writing to InfluxDB")
+        finally:
+            with self._lock:
+                self.stats.in_flight -= 1
+            self._in_flight.release()
+            for _ in range(count):
+                self.queue.task_done()
+
+    def get_stats(self):
+        """Return the metrics of the writer."""
+        with self._lock:
+            return dict(attr.asdict(self.stats),
+                        queue_size=self.queue.qsize())
 
     def run(self):
         """Process incoming events."""
         while not self.shutdown:
-            count, json = self.get_events_json()
-            if json:
-                self.write_to_influxdb(json)
-            for _ in range(count):
-                self.queue.task_done()
+            count, lines = self.get_events_lines()
+            if not lines:
+                for _ in range(count):
+                    self.queue.task_done()
+                continue
+
+            # Wait for a write to finish if too many are in flight
+            self._in_flight.acquire()
+            with self._lock:
+                self.stats.in_flight += 1
+            self._executor.submit(self._write_batch, count, lines)
+
+        self._executor.shutdown()
 
     def block_till_done(self):
         """Block till all events processed."""
@@ -0,0 +1,60 @@
+"""Encode points in the InfluxDB line protocol."""
+from datetime import datetime, timedelta, timezone
+from numbers import Integral
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+MICROSECOND = timedelta(microseconds=1)
+
+
+def _escape_key(key):
+    """Escape a measurement, tag key, tag value or field key."""
+    return str(key).replace('\\', '\\\\').replace(' ', '\\ ').replace(
+        ',', '\\,').replace('=', '\\=').replace('\n', '\\n')
+
+
+def _escape_field_value(value):
+    """Encode a field value."""
+    if isinstance(value, str):
+        return '"{}"'.format(value.replace('\\', '\\\\').replace(
+            '"', '\\"').replace('\n', '\\n'))
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, Integral):
+        return '{}i'.format(value)
+    return repr(float(value))
+
+
+def _timestamp(time):
+    """Return a timestamp in nanoseconds."""
+    if isinstance(time, Integral):
+        return time
+
+    if time.tzinfo is None:
+        time = time.replace(tzinfo=timezone.utc)
+
+    return (time - EPOCH) // MICROSECOND * 1000
+
+
+def point_to_line(point):
+    """Encode a point to a line, None if it has no fields.
+
+    Tags and fields are sorted as recommended for the best performance of
+    the server.
+    """
+    fields = ','.join(
+        '{}={}'.format(_escape_key(key), _escape_field_value(value))
+        for key, value in sorted(point['fields'].items()))
+    if not fields:
+        return None
+
+    key = [_escape_key(point['measurement'])]
+    for tag, value in sorted(point['tags'].items()):
+        value = _escape_key(value)
+        # Tags without value are not allowed
+        if value:
+            key.append('{}={}'.format(_escape_key(tag), value))
+
+    if 'time' not in point:
+        return '{} {}'.format(','.join(key), fields)
+
+    return '{} {} {}'.format(','.join(key), fields, _timestamp(point['time']))
@@ -144,12 +144,9 @@ class LogbookView(HomeAssistantView):
         end_day = start_day + timedelta(days=period)
         hass = request.app['hass']
 
-        def json_events():
-            """Fetch events and generate JSON."""
-            return self.json(
-                _get_events(hass, self.config, start_day, end_day, entity_id))
-
-        return await hass.async_add_job(json_events)
+        return await self.json_stream(
+            request, _generate_events, hass, self.config, start_day, end_day,
+            entity_id)
 
 
 def humanify(hass, events):
@@ -392,15 +389,24 @@ def _generate_filter_from_config(config):
 
 def _get_events(hass, config, start_day, end_day, entity_id=None):
     """Get events for a period of time."""
+    return list(
+        _generate_events(hass, config, start_day, end_day, entity_id))
+
+
+def _generate_events(hass, config, start_day, end_day, entity_id=None):
+    """Yield the logbook entries for a period of time.
+
+    The database rows are fetched in batches while the entries are consumed.
+    """
     from homeassistant.components.recorder.models import Events, States
-    from homeassistant.components.recorder.util import session_scope
+    from homeassistant.components.recorder.util import (
+        execute_stream, session_scope)
 
     entities_filter = _generate_filter_from_config(config)
 
     def yield_events(query):
         """Yield Events that are not filtered away."""
-        for row in query.yield_per(500):
-            event = row.to_native()
+        for event in execute_stream(query):
             if _keep_event(event, entities_filter):
                 yield event
 
@@ -419,7 +425,7 @@ def _get_events(hass, config, start_day, end_day, entity_id=None):
                      States.entity_id.in_(entity_ids))
                     | (States.state_id.is_(None)))
 
-        return list(humanify(hass, yield_events(query)))
+        yield from humanify(hass, yield_events(query))
 
 
 def _keep_event(event, entities_filter):
@@ -15,7 +15,8 @@ import os
 import socket
 import ssl
 import time
-from typing import Any, Callable, List, Optional, Union, cast  # noqa: F401
+from typing import (  # noqa: F401
+    Any, Callable, Dict, List, Optional, Union, cast)
 
 import attr
 import requests.certs
@@ -43,6 +44,7 @@ from homeassistant.components import websocket_api
 from . import config_flow  # noqa pylint: disable=unused-import
 from .const import CONF_BROKER, CONF_DISCOVERY, DEFAULT_DISCOVERY
 from .server import HBMQTT_CONFIG_SCHEMA
+from .trie import TopicTrie
 
 REQUIREMENTS = ['paho-mqtt==1.4.0']
 
@@ -445,6 +447,7 @@ async def async_setup(hass: HomeAssistantType, config: ConfigType) -> bool:
     hass.data[DATA_MQTT_HASS_CONFIG] = config
 
     websocket_api.async_register_command(hass, websocket_subscribe)
+    websocket_api.async_register_command(hass, websocket_publish_diagnostics)
 
     if conf is None:
         # If we have a config entry, setup is done by that config entry.
@@ -617,6 +620,18 @@ async def async_setup_entry(hass, entry):
     return True
 
 
+@attr.s(slots=True)
+class PublishStats:
+    """Class to hold metrics about the publish queue."""
+
+    published = attr.ib(type=int, default=0)
+    batches = attr.ib(type=int, default=0)
+    coalesced = attr.ib(type=int, default=0)
+    max_queue_depth = attr.ib(type=int, default=0)
+    last_latency = attr.ib(type=float, default=0.0)
+    max_latency = attr.ib(type=float, default=0.0)
+
+
 @attr.s(slots=True, frozen=True)
 class Subscription:
     """Class to hold data about an active subscription."""
@@ -646,6 +661,14 @@ class MQTT:
         self.port = port
         self.keepalive = keepalive
         self.subscriptions = []  # type: List[Subscription]
+        self._subscription_trie = TopicTrie()
+        self.publish_stats = PublishStats()
+        # Messages waiting to be handed to paho with their queue time
+        self._publish_queue = []  # type: List[List[Any]]
+        # Index in the queue of the last message of a topic
+        self._publish_topics = {}  # type: Dict[str, int]
+        self._publish_done = None  # type: Optional[asyncio.Future]
+        self._publishing = False
         self.birth_message = birth_message
         self.connected = False
         self._mqttc = None  # type: mqtt.Client
@@ -683,12 +706,86 @@ class MQTT:
                             qos: int, retain: bool) -> None:
         """Publish a MQTT message.
 
+        Messages are queued and handed to paho in batches. A retained message
+        replaces a queued retained message on the same topic, unless another
+        message to the topic was queued after it. Returns when the message
+        is handed to paho.
+
         This method must be run in the event loop and returns a coroutine.
         """
-        async with self._paho_lock:
-            _LOGGER.debug("Transmitting message on %s: %s", topic, payload)
-            await self.hass.async_add_job(
-                self._mqttc.publish, topic, payload, qos, retain)
+        message = Message(topic, payload, qos, retain)
+        stats = self.publish_stats
+        index = self._publish_topics.get(topic) if retain else None
+
+        if index is not None and self._publish_queue[index][0].retain:
+            # Last value wins, keep the queue time of the replaced message
+            self._publish_queue[index][0] = message
+            stats.coalesced += 1
+        else:
+            # Keep the order of the messages to a topic
+            self._publish_topics[topic] = len(self._publish_queue)
+            self._publish_queue.append([message, self.hass.loop.time()])
+            stats.max_queue_depth = max(
+                stats.max_queue_depth, len(self._publish_queue))
+
+        if self._publish_done is None:
+            self._publish_done = self.hass.loop.create_future()
+        done = self._publish_done
+
+        if not self._publishing:
+            self._publishing = True
+            self.hass.async_create_task(self._async_publish_queue())
+
+        await done
+
+    async def _async_publish_queue(self) -> None:
+        """Hand the queued messages to paho until the queue is empty.
+
+        Messages queued while a batch is published form the next batch.
+        """
+        stats = self.publish_stats
+
+        try:
+            while self._publish_queue:
+                batch = self._publish_queue
+                done = self._publish_done
+                self._publish_queue = []
+                self._publish_topics = {}
+                self._publish_done = None
+
+                try:
+                    async with self._paho_lock:
+                        await self.hass.async_add_job(
+                            self._publish_batch, batch)
+                except Exception as err:  # pylint: disable=broad-except
+                    done.set_exception(err)
+                    continue
+
+                latency = self.hass.loop.time() - batch[0][1]
+                stats.batches += 1
+                stats.published += len(batch)
+                stats.last_latency = latency
+                stats.max_latency = max(stats.max_latency, latency)
+                done.set_result(None)
+        finally:
+            self._publishing = False
+
+    def _publish_batch(self, batch: List[List[Any]]) -> None:
+        """Hand a batch of messages to paho."""
+        for message, _ in batch:
+            _LOGGER.debug("Transmitting message on %s: %s",
+                          message.topic, message.payload)
+            try:
+                self._mqttc.publish(*attr.astuple(message))
+            except ValueError as err:
+                _LOGGER.error("Unable to publish to %s: %s",
+                              message.topic, err)
+
+    @callback
+    def async_publish_diagnostics(self) -> dict:
+        """Return the state of the publish queue."""
+        return dict(attr.asdict(self.publish_stats),
+                    queue_depth=len(self._publish_queue))
 
     async def async_connect(self) -> bool:
         """Connect to the host. Does process messages yet.
@@ -736,6 +833,7 @@ class MQTT:
 
         subscription = Subscription(topic, msg_callback, qos, encoding)
         self.subscriptions.append(subscription)
+        self._subscription_trie.add(topic, subscription)
 
         await self._async_perform_subscription(topic, qos)
 
@@ -745,6 +843,7 @@ class MQTT:
             if subscription not in self.subscriptions:
                 raise HomeAssistantError("Can't remove subscription twice")
             self.subscriptions.remove(subscription)
+            self._subscription_trie.remove(topic, subscription)
 
             if any(other.topic == topic for other in self.subscriptions):
                 # Other subscriptions on topic remaining - don't unsubscribe.
@@ -815,10 +914,7 @@ class MQTT:
         _LOGGER.debug("Received message on %s%s: %s", msg.topic,
                       " (retained)" if msg.retain else "", msg.payload)
 
-        for subscription in self.subscriptions:
-            if not _match_topic(subscription.topic, msg.topic):
-                continue
-
+        for subscription in self._subscription_trie.match(msg.topic):
             payload = msg.payload  # type: SubscribePayloadType
             if subscription.encoding is not None:
                 try:
@@ -870,18 +966,6 @@ def _raise_on_error(result_code: int) -> None:
             'Error talking to MQTT: {}'.format(mqtt.error_string(result_code)))
 
 
-def _match_topic(subscription: str, topic: str) -> bool:
-    """Test if topic matches subscription."""
-    from paho.mqtt.matcher import MQTTMatcher
-    matcher = MQTTMatcher()
-    matcher[subscription] = True
-    try:
-        next(matcher.iter_match(topic))
-        return True
-    except StopIteration:
-        return False
-
-
 class MqttAttributes(Entity):
     """Mixin used for platforms that support JSON attributes."""
 
@@ -1117,3 +1201,16 @@ async def websocket_subscribe(hass, connection, msg):
         hass, msg['topic'], forward_messages)
 
     connection.send_message(websocket_api.result_message(msg['id']))
+
+
+@websocket_api.websocket_command({
+    vol.Required('type'): 'mqtt/publish_diagnostics',
+})
+@websocket_api.require_admin
+@callback
+def websocket_publish_diagnostics(hass, connection, msg):
+    """Return the state of the MQTT publish queue."""
+    mqtt = hass.data.get(DATA_MQTT)
+    connection.send_result(
+        msg['id'],
+        mqtt.async_publish_diagnostics() if mqtt is not None else None)
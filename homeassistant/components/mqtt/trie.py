@@ -0,0 +1,113 @@
+"""Index MQTT subscriptions by topic filter."""
+from itertools import count
+from typing import Any, Dict, List, Tuple  # noqa: F401
+
+
+class _TopicNode:
+    """A level of the topic filters."""
+
+    __slots__ = ('children', 'values')
+
+    def __init__(self) -> None:
+        """Initialize the node."""
+        self.children = {}  # type: Dict[str, _TopicNode]
+        # Values of the filters ending at this level, in insertion order
+        self.values = []  # type: List[Tuple[int, Any]]
+
+
+class TopicTrie:
+    """Match topics against topic filters with + and # wildcards.
+
+    Matching a topic takes time proportional to the number of levels of the
+    topic instead of the number of filters.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the trie."""
+        self._root = _TopicNode()
+        self._order = count()
+
+    def add(self, topic_filter: str, value: Any) -> None:
+        """Add a value for a topic filter."""
+        node = self._root
+        for level in topic_filter.split('/'):
+            child = node.children.get(level)
+            if child is None:
+                child = node.children[level] = _TopicNode()
+            node = child
+
+        node.values.append((next(self._order), value))
+
+    def remove(self, topic_filter: str, value: Any) -> None:
+        """Remove a value of a topic filter.
+
+        Raises ValueError if the value was not added for the filter.
+        """
+        path = [self._root]
+        levels = topic_filter.split('/')
+        for level in levels:
+            node = path[-1].children.get(level)
+            if node is None:
+                raise ValueError(topic_filter)
+            path.append(node)
+
+        values = path[-1].values
+        for index, (_, other) in enumerate(values):
+            if other == value:
+                del values[index]
+                break
+        else:
+            raise ValueError(topic_filter)
+
+        # Prune the levels that are no longer used
+        for depth in range(len(levels), 0, -1):
+            node = path[depth]
+            if node.values or node.children:
+                break
+            del path[depth - 1].children[levels[depth - 1]]
+
+    def match(self, topic: str) -> List[Any]:
+        """Return the values of the filters matching topic.
+
+        The values are returned in the order they were added.
+        """
+        matches = []  # type: List[Tuple[int, Any]]
+        nodes = [self._root]
+
+        for index, level in enumerate(topic.split('/')):
+            # Wildcards do not match the first level of $ topics
+            wildcards = index > 0 or not level.startswith('$')
+            next_nodes = []
+
+            for node in nodes:
+                child = node.children.get(level)
+                if child is not None:
+                    next_nodes.append(child)
+
+                if not wildcards:
+                    continue
+
+                child = node.children.get('+')
+                if child is not None:
+                    next_nodes.append(child)
+
+                child = node.children.get('#')
+                if child is not None:
+                    matches.extend(child.values)
+
+            nodes = next_nodes
+            if not nodes:
+                break
+        else:
+            for node in nodes:
+                matches.extend(node.values)
+
+                # The multi level wildcard includes the parent level
+                child = node.children.get('#')
+                if child is not None:
+                    matches.extend(child.values)
+
+        if len(matches) > 1:
+            matches.sort(key=lambda match: match[0])
+
+        return [value for _, value in matches]
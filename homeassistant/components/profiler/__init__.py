@@ -0,0 +1,129 @@
+"""Support for profiling the event loop and the jobs run on it."""
+import logging
+
+import voluptuous as vol
+
+from homeassistant.components import websocket_api
+from homeassistant.const import EVENT_HOMEASSISTANT_STOP
+from homeassistant.core import callback
+from homeassistant.helpers import discovery
+import homeassistant.helpers.config_validation as cv
+from homeassistant.util.json import save_json
+from homeassistant.util.profiling import (
+    CATEGORY_LISTENER, CATEGORY_PLATFORM_UPDATE, CATEGORY_SERVICE,
+    DEFAULT_SAMPLE_RATE, Profiler)
+
+_LOGGER = logging.getLogger(__name__)
+
+DOMAIN = 'profiler'
+
+ATTR_RESET = 'reset'
+
+CONF_LAG_INTERVAL = 'lag_interval'
+CONF_SAMPLE_RATE = 'sample_rate'
+
+DEFAULT_LAG_INTERVAL = 1
+
+PROFILE_FILE = 'profiler.json'
+
+SERVICE_DUMP = 'dump'
+
+WS_TYPE_STATS = 'profiler/stats'
+
+CONFIG_SCHEMA = vol.Schema({
+    DOMAIN: vol.Schema({
+        vol.Optional(CONF_SAMPLE_RATE, default=DEFAULT_SAMPLE_RATE):
+            vol.All(vol.Coerce(float), vol.Range(min=0, max=1)),
+        vol.Optional(CONF_LAG_INTERVAL, default=DEFAULT_LAG_INTERVAL):
+            vol.All(vol.Coerce(float), vol.Range(min=0.01)),
+    }),
+}, extra=vol.ALLOW_EXTRA)
+
+SERVICE_DUMP_SCHEMA = vol.Schema({
+    vol.Optional(ATTR_RESET, default=False): cv.boolean,
+})
+
+
+async def async_setup(hass, config):
+    """Set up the profiler."""
+    conf = config.get(DOMAIN)
+    if conf is None:
+        conf = CONFIG_SCHEMA({DOMAIN: {}})[DOMAIN]
+
+    profiler = hass.profiler = Profiler(conf[CONF_SAMPLE_RATE])
+    stop_lag_tracking = async_track_loop_lag(
+        hass, profiler, conf[CONF_LAG_INTERVAL])
+
+    @callback
+    def async_stop_profiler(event):
+        """Stop collecting durations."""
+        stop_lag_tracking()
+        hass.profiler = None
+
+    hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, async_stop_profiler)
+
+    async def async_dump(service):
+        """Write the collected durations to the profile file."""
+        for category in (CATEGORY_LISTENER, CATEGORY_SERVICE,
+                         CATEGORY_PLATFORM_UPDATE):
+            for name, stats in profiler.top(category):
+                _LOGGER.info("Slowest %s %s: %d samples, %.1f ms mean,"
+                             " %.1f ms max", category, name, stats.count,
+                             stats.mean * 1000, stats.max * 1000)
+
+        data = profiler.as_dict()
+        if service.data[ATTR_RESET]:
+            profiler.reset()
+
+        await hass.async_add_executor_job(
+            save_json, hass.config.path(PROFILE_FILE), data)
+
+    hass.services.async_register(
+        DOMAIN, SERVICE_DUMP, async_dump, schema=SERVICE_DUMP_SCHEMA)
+
+    hass.components.websocket_api.async_register_command(
+        websocket_profiler_stats)
+
+    hass.async_create_task(discovery.async_load_platform(
+        hass, 'sensor', DOMAIN, {}, config))
+
+    return True
+
+
+@callback
+def async_track_loop_lag(hass, profiler, interval):
+    """Record how late the event loop runs a callback every interval.
+
+    Returns a function to stop tracking.
+    """
+    handle = None
+
+    @callback
+    def check_lag(expected):
+        """Record the lag and schedule the next check."""
+        nonlocal handle
+        now = hass.loop.time()
+        profiler.loop_lag.add(max(now - expected, 0))
+        handle = hass.loop.call_later(interval, check_lag, now + interval)
+
+    handle = hass.loop.call_later(
+        interval, check_lag, hass.loop.time() + interval)
+
+    @callback
+    def stop():
+        """Stop tracking the loop lag."""
+        handle.cancel()
+
+    return stop
+
+
+@websocket_api.websocket_command({
+    vol.Required('type'): WS_TYPE_STATS,
+})
+@websocket_api.require_admin
+@callback
+def websocket_profiler_stats(hass, connection, msg):
+    """Return the collected durations."""
+    profiler = hass.profiler
+    connection.send_result(
+        msg['id'], profiler.as_dict() if profiler is not None else None)
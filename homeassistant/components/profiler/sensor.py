@@ -0,0 +1,148 @@
+"""Sensors exposing the durations collected by the profiler."""
+from homeassistant.helpers.entity import Entity
+from homeassistant.util.profiling import (
+    CATEGORY_LISTENER, CATEGORY_PLATFORM_UPDATE, CATEGORY_SERVICE)
+
+DEPENDENCIES = ['profiler']
+
+ATTR_HISTOGRAM = 'histogram'
+ATTR_MAX = 'max'
+ATTR_SAMPLES = 'samples'
+ATTR_SLOWEST = 'slowest'
+
+# Maximum length of a state
+MAX_STATE_LENGTH = 255
+
+CATEGORY_NAMES = {
+    CATEGORY_LISTENER: 'Slowest listener',
+    CATEGORY_SERVICE: 'Slowest service',
+    CATEGORY_PLATFORM_UPDATE: 'Slowest platform update',
+}
+
+
+async def async_setup_platform(hass, config, async_add_entities,
+                               discovery_info=None):
+    """Set up the profiler sensors."""
+    if discovery_info is None:
+        return
+
+    sensors = [LoopLagSensor(hass)]
+    sensors.extend(SlowestJobSensor(hass, category)
+                   for category in CATEGORY_NAMES)
+    async_add_entities(sensors)
+
+
+def _milliseconds(seconds):
+    """Convert seconds to rounded milliseconds."""
+    return round(seconds * 1000, 1)
+
+
+class LoopLagSensor(Entity):
+    """Representation of the event loop lag since the last update."""
+
+    def __init__(self, hass):
+        """Initialize the sensor."""
+        self.hass = hass
+        self._state = None
+        self._attributes = {}
+        self._count = 0
+        self._total = 0.0
+
+    @property
+    def name(self):
+        """Return the name of the sensor."""
+        return 'Event loop lag'
+
+    @property
+    def state(self):
+        """Return the mean lag in ms since the last update."""
+        return self._state
+
+    @property
+    def unit_of_measurement(self):
+        """Return the unit of measurement."""
+        return 'ms'
+
+    @property
+    def icon(self):
+        """Return the icon of the sensor."""
+        return 'mdi:timer-sand'
+
+    @property
+    def device_state_attributes(self):
+        """Return the state attributes."""
+        return self._attributes
+
+    async def async_update(self):
+        """Compute the mean lag of the checks since the last update."""
+        profiler = self.hass.profiler
+        if profiler is None:
+            return
+
+        stats = profiler.loop_lag
+
+        # The profiler was reset
+        if stats.count < self._count:
+            self._count = 0
+            self._total = 0.0
+
+        count = stats.count - self._count
+        if count:
+            self._state = _milliseconds(
+                (stats.total - self._total) / count)
+
+        self._count = stats.count
+        self._total = stats.total
+        self._attributes = {
+            ATTR_SAMPLES: stats.count,
+            ATTR_MAX: _milliseconds(stats.max),
+            ATTR_HISTOGRAM: stats.as_dict()[ATTR_HISTOGRAM],
+        }
+
+
+class SlowestJobSensor(Entity):
+    """Representation of the job of a category with most time spent."""
+
+    def __init__(self, hass, category):
+        """Initialize the sensor."""
+        self.hass = hass
+        self._category = category
+        self._state = None
+        self._attributes = {}
+
+    @property
+    def name(self):
+        """Return the name of the sensor."""
+        return CATEGORY_NAMES[self._category]
+
+    @property
+    def state(self):
+        """Return the name of the job with most time spent."""
+        return self._state
+
+    @property
+    def icon(self):
+        """Return the icon of the sensor."""
+        return 'mdi:speedometer'
+
+    @property
+    def device_state_attributes(self):
+        """Return the state attributes."""
+        return self._attributes
+
+    async def async_update(self):
+        """Get the jobs with most time spent."""
+        profiler = self.hass.profiler
+        if profiler is None:
+            return
+
+        top = profiler.top(self._category)
+        self._state = top[0][0][:MAX_STATE_LENGTH] if top else None
+        self._attributes = {
+            ATTR_SLOWEST: [{
+                'name': name,
+                ATTR_SAMPLES: stats.count,
+                'mean': _milliseconds(stats.mean),
+                ATTR_MAX: _milliseconds(stats.max),
+            } for name, stats in top],
+        }
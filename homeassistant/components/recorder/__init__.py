@@ -3,11 +3,12 @@ import asyncio
 from collections import namedtuple
 import concurrent.futures
 from datetime import datetime, timedelta
+import json
 import logging
 import queue
 import threading
 import time
-from typing import Any, Dict, Optional  # noqa: F401
+from typing import Any, Dict, List, Optional  # noqa: F401
 
 import voluptuous as vol
 
@@ -18,6 +19,7 @@ from homeassistant.const import (
 from homeassistant.core import CoreState, HomeAssistant, callback
 import homeassistant.helpers.config_validation as cv
 from homeassistant.helpers.entityfilter import generate_filter
+from homeassistant.helpers.json import JSONEncoder
 from homeassistant.helpers.typing import ConfigType
 import homeassistant.util.dt as dt_util
 
@@ -48,9 +50,17 @@ CONF_DB_URL = 'db_url'
 CONF_PURGE_KEEP_DAYS = 'purge_keep_days'
 CONF_PURGE_INTERVAL = 'purge_interval'
 CONF_EVENT_TYPES = 'event_types'
+CONF_COMMIT_INTERVAL = 'commit_interval'
+CONF_NUMERIC_STATES = 'compact_numeric_states'
 
 CONNECT_RETRY_WAIT = 3
 
+# Maximum number of events written in a single transaction
+COMMIT_MAX_EVENTS = 1000
+
+# Maximum number of attribute ids remembered for numeric states
+ATTRIBUTES_CACHE_SIZE = 2048
+
 FILTER_SCHEMA = vol.Schema({
     vol.Optional(CONF_EXCLUDE, default={}): vol.Schema({
         vol.Optional(CONF_DOMAINS): vol.All(cv.ensure_list, [cv.string]),
@@ -70,6 +80,9 @@ CONFIG_SCHEMA = vol.Schema({
         vol.Optional(CONF_PURGE_INTERVAL, default=1):
             vol.All(vol.Coerce(int), vol.Range(min=0)),
         vol.Optional(CONF_DB_URL): cv.string,
+        vol.Optional(CONF_COMMIT_INTERVAL, default=1):
+            vol.All(vol.Coerce(float), vol.Range(min=0)),
+        vol.Optional(CONF_NUMERIC_STATES, default=False): cv.boolean,
     })
 }, extra=vol.ALLOW_EXTRA)
 
@@ -100,6 +113,8 @@ async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
     conf = config.get(DOMAIN, {})
     keep_days = conf.get(CONF_PURGE_KEEP_DAYS)
     purge_interval = conf.get(CONF_PURGE_INTERVAL)
+    commit_interval = conf.get(CONF_COMMIT_INTERVAL)
+    numeric_states = conf.get(CONF_NUMERIC_STATES)
 
     db_url = conf.get(CONF_DB_URL, None)
     if not db_url:
@@ -110,7 +125,8 @@ async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
     exclude = conf.get(CONF_EXCLUDE, {})
     instance = hass.data[DATA_INSTANCE] = Recorder(
         hass=hass, keep_days=keep_days, purge_interval=purge_interval,
-        uri=db_url, include=include, exclude=exclude)
+        uri=db_url, include=include, exclude=exclude,
+        commit_interval=commit_interval, numeric_states=numeric_states)
     instance.async_initialize()
     instance.start()
 
@@ -133,13 +149,19 @@ class Recorder(threading.Thread):
 
     def __init__(self, hass: HomeAssistant, keep_days: int,
                  purge_interval: int, uri: str,
-                 include: Dict, exclude: Dict) -> None:
+                 include: Dict, exclude: Dict,
+                 commit_interval: float = 0,
+                 numeric_states: bool = False) -> None:
         """Initialize the recorder."""
         threading.Thread.__init__(self, name='Recorder')
 
         self.hass = hass
         self.keep_days = keep_days
         self.purge_interval = purge_interval
+        self.commit_interval = commit_interval
+        self.numeric_states = numeric_states
+        # Serialized attributes of numeric states mapped to their id
+        self._attributes_ids = {}  # type: Dict[str, int]
         self.queue = queue.Queue()  # type: Any
         self.recording_start = dt_util.utcnow()
         self.db_url = uri
@@ -168,9 +190,8 @@ class Recorder(threading.Thread):
 
     def run(self):
         """Start processing events to save."""
-        from .models import States, Events
+        from .models import Events
         from homeassistant.components import persistent_notification
-        from sqlalchemy import exc
 
         tries = 1
         connected = False
@@ -260,16 +281,37 @@ class Recorder(threading.Thread):
 
             self.hass.helpers.event.track_point_in_time(async_purge, run)
 
+        # Events waiting to be written in the next transaction
+        pending = []  # type: List[Any]
+        commit_deadline = 0.0
+
         while True:
-            event = self.queue.get()
+            if pending:
+                try:
+                    event = self.queue.get(timeout=max(
+                        0, commit_deadline - time.monotonic()))
+                except queue.Empty:
+                    # Queue drained or commit interval passed
+                    self._commit_events(pending)
+                    continue
+            else:
+                event = self.queue.get()
 
             if event is None:
+                self._commit_events(pending)
                 self._close_run()
                 self._close_connection()
                 self.queue.task_done()
                 return
             if isinstance(event, PurgeTask):
-                purge.purge_old_data(self, event.keep_days, event.repack)
+                self._commit_events(pending)
+                if purge.purge_old_data(
+                        self, event.keep_days, event.repack):
+                    # Purge removes attributes that are no longer used
+                    self._attributes_ids.clear()
+                else:
+                    # Continue purging after the events queued meanwhile
+                    self.queue.put(event)
                 self.queue.task_done()
                 continue
             elif event.event_type == EVENT_TIME_CHANGED:
@@ -285,53 +327,151 @@ class Recorder(threading.Thread):
                     self.queue.task_done()
                     continue
 
-            tries = 1
-            updated = False
-            while not updated and tries <= 10:
-                if tries != 1:
-                    time.sleep(CONNECT_RETRY_WAIT)
+            if not pending:
+                commit_deadline = time.monotonic() + self.commit_interval
+            pending.append(event)
+
+            if len(pending) >= COMMIT_MAX_EVENTS:
+                self._commit_events(pending)
+
+    @callback
+    def event_listener(self, event):
+        """Listen for new events and put them in the process queue."""
+        self.queue.put(event)
+
+    def _commit_events(self, events):
+        """Write events and their states in a single transaction.
+
+        Marks the events as done in the queue and clears the list.
+        """
+        from sqlalchemy import exc
+
+        if not events:
+            return
+
+        tries = 1
+        updated = False
+        while not updated and tries <= 10:
+            if tries != 1:
+                time.sleep(CONNECT_RETRY_WAIT)
+            try:
+                with session_scope(session=self.get_session()) as session:
+                    self._write_events(session, events)
+
+                updated = True
+
+            except exc.OperationalError as err:
+                _LOGGER.error("Error in database connectivity: %s. "
+                              "(retrying in %s seconds)", err,
+                              CONNECT_RETRY_WAIT)
+                tries += 1
+                # Attributes added in the rolled back transaction are gone
+                self._attributes_ids.clear()
+
+            except exc.SQLAlchemyError:
+                updated = True
+                self._attributes_ids.clear()
+                if len(events) == 1:
+                    _LOGGER.exception("Error saving event: %s", events[0])
+                else:
+                    # Save the events that can be saved
+                    _LOGGER.warning("Error saving %d events, saving them "
+                                    "one by one", len(events))
+                    self._write_events_one_by_one(events)
+
+        if not updated:
+            _LOGGER.error("Error in database update. Could not save "
+                          "after %d tries. Giving up", tries)
+
+        for _ in events:
+            self.queue.task_done()
+        events.clear()
+
+    def _write_events_one_by_one(self, events):
+        """Write each event in its own transaction, skipping failures."""
+        from sqlalchemy import exc
+
+        for event in events:
+            try:
+                with session_scope(session=self.get_session()) as session:
+                    self._write_events(session, [event])
+            except exc.SQLAlchemyError:
+                _LOGGER.exception("Error saving event: %s", event)
+                self._attributes_ids.clear()
+
+    def _write_events(self, session, events):
+        """Add events and the states they carry to the session."""
+        from .models import States, Events, NumericStates
+
+        dbevents = []
+        dbstates = []
+        for event in events:
+            if (self.numeric_states and
+                    event.event_type == EVENT_STATE_CHANGED and
+                    NumericStates.is_numeric(event.data.get('new_state'))):
+                # Numeric states are stored without their event, the
+                # logbook does not show changes of sensors with a unit
                 try:
-                    with session_scope(session=self.get_session()) as session:
-                        try:
-                            dbevent = Events.from_event(event)
-                            session.add(dbevent)
-                            session.flush()
-                        except (TypeError, ValueError):
-                            _LOGGER.warning(
-                                "Event is not JSON serializable: %s", event)
-
-                        if event.event_type == EVENT_STATE_CHANGED:
-                            try:
-                                dbstate = States.from_event(event)
-                                dbstate.event_id = dbevent.event_id
-                                session.add(dbstate)
-                            except (TypeError, ValueError):
-                                _LOGGER.warning(
-                                    "State is not JSON serializable: %s",
+                    dbstates.append(self._numeric_state(session, event))
+                except (TypeError, ValueError):
+                    _LOGGER.warning("State is not JSON serializable: %s",
                                     event.data.get('new_state'))
+                continue
 
-                    updated = True
+            try:
+                dbevents.append((event, Events.from_event(event)))
+            except (TypeError, ValueError):
+                _LOGGER.warning("Event is not JSON serializable: %s", event)
 
-                except exc.OperationalError as err:
-                    _LOGGER.error("Error in database connectivity: %s. "
-                                  "(retrying in %s seconds)", err,
-                                  CONNECT_RETRY_WAIT)
-                    tries += 1
+        # Flush once to have the database assign all event ids
+        session.add_all([dbevent for _, dbevent in dbevents])
+        session.flush()
 
-                except exc.SQLAlchemyError:
-                    updated = True
-                    _LOGGER.exception("Error saving event: %s", event)
+        for event, dbevent in dbevents:
+            if event.event_type != EVENT_STATE_CHANGED:
+                continue
 
-            if not updated:
-                _LOGGER.error("Error in database update. Could not save "
-                              "after %d tries. Giving up", tries)
+            try:
+                dbstate = States.from_event(event)
+            except (TypeError, ValueError):
+                _LOGGER.warning("State is not JSON serializable: %s",
+                                event.data.get('new_state'))
+                continue
 
-            self.queue.task_done()
+            dbstate.event_id = dbevent.event_id
+            dbstates.append(dbstate)
 
-    @callback
-    def event_listener(self, event):
-        """Listen for new events and put them in the process queue."""
-        self.queue.put(event)
+        session.bulk_save_objects(dbstates)
+
+    def _numeric_state(self, session, event):
+        """Create a numeric state referencing deduplicated attributes."""
+        from .models import NumericStates, StateAttributes
+
+        shared_attrs = json.dumps(
+            dict(event.data['new_state'].attributes), cls=JSONEncoder,
+            sort_keys=True)
+        dbstate = NumericStates.from_event(event)
+
+        attributes_id = self._attributes_ids.get(shared_attrs)
+        if attributes_id is None:
+            attrs_hash = StateAttributes.hash_shared_attrs(shared_attrs)
+            dbattributes = session.query(StateAttributes).filter(
+                (StateAttributes.hash == attrs_hash) &
+                (StateAttributes.shared_attrs == shared_attrs)).first()
+
+            if dbattributes is None:
+                dbattributes = StateAttributes(
+                    hash=attrs_hash, shared_attrs=shared_attrs)
+                session.add(dbattributes)
+                session.flush()
+
+            attributes_id = dbattributes.attributes_id
+            if len(self._attributes_ids) >= ATTRIBUTES_CACHE_SIZE:
+                self._attributes_ids.clear()
+            self._attributes_ids[shared_attrs] = attributes_id
+
+        dbstate.attributes_id = attributes_id
+        return dbstate
 
     def block_till_done(self):
         """Block till all events processed."""
@@ -2,13 +2,20 @@
 import json
 from datetime import datetime
 import logging
+import math
+import zlib
 
 from sqlalchemy import (
-    Boolean, Column, DateTime, ForeignKey, Index, Integer, String, Text,
-    distinct)
+    BigInteger, Boolean, Column, DateTime, Float, ForeignKey, Index, Integer,
+    String, Text, distinct, literal)
+from sqlalchemy.dialects import mysql
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.orm import column_property
+from sqlalchemy.sql.expression import FunctionElement
 
 import homeassistant.util.dt as dt_util
+from homeassistant.const import ATTR_UNIT_OF_MEASUREMENT
 from homeassistant.core import (
     Context, Event, EventOrigin, State, split_entity_id)
 from homeassistant.helpers.json import JSONEncoder
@@ -19,6 +26,9 @@ Base = declarative_base()
 
 SCHEMA_VERSION = 7
 
+# Domain of the states that can be stored in the numeric states table
+NUMERIC_DOMAIN = 'sensor'
+
 _LOGGER = logging.getLogger(__name__)
 
 
@@ -60,7 +70,7 @@ class Events(Base):  # type: ignore
                 self.event_type,
                 json.loads(self.event_data),
                 EventOrigin(self.origin),
-                _process_timestamp(self.time_fired),
+                process_timestamp(self.time_fired),
                 context=context,
             )
         except ValueError:
@@ -134,8 +144,8 @@ class States(Base):   # type: ignore
             return State(
                 self.entity_id, self.state,
                 json.loads(self.attributes),
-                _process_timestamp(self.last_changed),
-                _process_timestamp(self.last_updated),
+                process_timestamp(self.last_changed),
+                process_timestamp(self.last_updated),
                 context=context,
                 # Temp, because database can still store invalid entity IDs
                 # Remove with 1.0 or in 2020.
@@ -147,6 +157,137 @@ class States(Base):   # type: ignore
             return None
 
 
+class StateAttributes(Base):   # type: ignore
+    """State attributes shared between numeric states."""
+
+    __tablename__ = 'state_attributes'
+    attributes_id = Column(Integer, primary_key=True)
+    hash = Column(BigInteger, index=True)
+    shared_attrs = Column(Text)
+
+    @staticmethod
+    def hash_shared_attrs(shared_attrs):
+        """Return the hash used to look up serialized attributes."""
+        # Python's str hash is randomized per process, use a stable one
+        return zlib.crc32(shared_attrs.encode())
+
+    def to_native(self):
+        """Convert to the attributes dictionary."""
+        try:
+            return json.loads(self.shared_attrs)
+        except ValueError:
+            # When json.loads fails
+            _LOGGER.exception("Error converting row to attributes: %s", self)
+            return {}
+
+
+class NumericStates(Base):   # type: ignore
+    """Compact history of numeric sensor states."""
+
+    __tablename__ = 'numeric_states'
+    numeric_state_id = Column(Integer, primary_key=True)
+    entity_id = Column(String(255))
+    # MySQL FLOAT is single precision, meter totals need a double
+    state = Column(Float().with_variant(
+        mysql.DOUBLE(asdecimal=False), 'mysql'))
+    attributes_id = Column(
+        Integer, ForeignKey('state_attributes.attributes_id'), index=True)
+    last_changed = Column(DateTime(timezone=True), default=datetime.utcnow)
+    last_updated = Column(DateTime(timezone=True), default=datetime.utcnow,
+                          index=True)
+
+    # Numeric states are only stored for sensors, this allows filtering
+    # numeric and regular states on domain the same way.
+    domain = column_property(literal(NUMERIC_DOMAIN))
+
+    __table_args__ = (
+        Index('ix_numeric_states_entity_id_last_updated',
+              'entity_id', 'last_updated'),
+    )
+
+    @staticmethod
+    def is_numeric(state):
+        """Return if a state can be stored as a numeric state."""
+        if (state is None or state.domain != NUMERIC_DOMAIN or
+                ATTR_UNIT_OF_MEASUREMENT not in state.attributes):
+            return False
+
+        try:
+            value = float(state.state)
+        except ValueError:
+            return False
+
+        # NaN is stored as NULL and infinity is not supported by all
+        # databases, keep these in the states table as text. So are states
+        # like '21.0' that would not be restored as the same string.
+        return math.isfinite(value) and _format_numeric(value) == state.state
+
+    @staticmethod
+    def from_event(event):
+        """Create object from a state_changed event of a numeric state."""
+        state = event.data['new_state']
+
+        return NumericStates(
+            entity_id=event.data['entity_id'],
+            state=float(state.state),
+            last_changed=state.last_changed,
+            last_updated=state.last_updated,
+        )
+
+    def to_native(self, attributes):
+        """Convert to an HA state object using the given attributes."""
+        return State(
+            self.entity_id, _format_numeric(self.state), attributes,
+            process_timestamp(self.last_changed),
+            process_timestamp(self.last_updated),
+            # Temp, because database can still store invalid entity IDs
+            # Remove with 1.0 or in 2020.
+            temp_invalid_id_bypass=True
+        )
+
+
+class TimeBucket(FunctionElement):  # pylint: disable=too-many-ancestors
+    """Index of the bucket of a time in a period split in equal buckets.
+
+    TimeBucket(column, start, seconds) is the number of whole periods of
+    seconds between start and the time in column. Timestamp arithmetic
+    differs between the databases, so it is compiled for each dialect.
+    """
+
+    type = Float()
+    name = 'time_bucket'
+
+
+@compiles(TimeBucket)
+def _compile_time_bucket(element, compiler, **kwargs):
+    """Compile a time bucket using the SQL standard EXTRACT."""
+    column, start, seconds = (
+        compiler.process(clause, **kwargs) for clause in element.clauses)
+    return 'FLOOR(EXTRACT(EPOCH FROM {} - {}) / {})'.format(
+        column, start, seconds)
+
+
+@compiles(TimeBucket, 'sqlite')
+def _compile_time_bucket_sqlite(element, compiler, **kwargs):
+    """Compile a time bucket, SQLite stores times as text."""
+    column, start, seconds = (
+        compiler.process(clause, **kwargs) for clause in element.clauses)
+    # SQLite keeps times in milliseconds, rounding drops the error of the
+    # julianday floats. Times are not before start, casting truncates like
+    # FLOOR.
+    return ('CAST(ROUND((julianday({}) - julianday({})) * 86400000) / '
+            '({} * 1000) AS INTEGER)').format(column, start, seconds)
+
+
+@compiles(TimeBucket, 'mysql')
+def _compile_time_bucket_mysql(element, compiler, **kwargs):
+    """Compile a time bucket using TIMESTAMPDIFF."""
+    column, start, seconds = (
+        compiler.process(clause, **kwargs) for clause in element.clauses)
+    return 'FLOOR(TIMESTAMPDIFF(MICROSECOND, {}, {}) / 1000000 / {})'.format(
+        start, column, seconds)
+
+
 class RecorderRuns(Base):   # type: ignore
     """Representation of recorder run."""
 
@@ -195,7 +336,14 @@ class SchemaChanges(Base):   # type: ignore
     changed = Column(DateTime(timezone=True), default=datetime.utcnow)
 
 
-def _process_timestamp(ts):
+def _format_numeric(value):
+    """Format a numeric state value as a state string."""
+    if value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def process_timestamp(ts):
     """Process a timestamp into datetime object."""
     if ts is None:
         return None
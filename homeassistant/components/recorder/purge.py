@@ -8,10 +8,23 @@ from .util import session_scope
 
 _LOGGER = logging.getLogger(__name__)
 
+# Maximum number of rows deleted from a table in one purge run
+MAX_ROWS_TO_PURGE = 1000
+
+# SQLite auto_vacuum mode that allows vacuuming incrementally
+SQLITE_AUTO_VACUUM_INCREMENTAL = 2
+
 
 def purge_old_data(instance, purge_days, repack):
-    """Purge events and states older than purge_days ago."""
-    from .models import States, Events
+    """Purge events and states older than purge_days ago.
+
+    At most MAX_ROWS_TO_PURGE rows are deleted from each table per run so
+    the recorder can write new events in between runs.
+
+    Returns True if all old data was purged, False if purge_old_data needs
+    to be called again to continue.
+    """
+    from .models import States, Events, NumericStates, StateAttributes
     from sqlalchemy.exc import SQLAlchemyError
 
     purge_before = dt_util.utcnow() - timedelta(days=purge_days)
@@ -19,20 +32,81 @@ def purge_old_data(instance, purge_days, repack):
 
     try:
         with session_scope(session=instance.get_session()) as session:
-            deleted_rows = session.query(States) \
-                .filter((States.last_updated < purge_before)) \
-                .delete(synchronize_session=False)
-            _LOGGER.debug("Deleted %s states", deleted_rows)
+            # States reference events, delete them first
+            if _purge_rows(session, States, States.state_id,
+                           States.last_updated < purge_before):
+                return False
 
-            deleted_rows = session.query(Events) \
-                .filter((Events.time_fired < purge_before)) \
+            if _purge_rows(session, Events, Events.event_id,
+                           Events.time_fired < purge_before):
+                return False
+
+            if _purge_rows(session, NumericStates,
+                           NumericStates.numeric_state_id,
+                           NumericStates.last_updated < purge_before):
+                return False
+
+            used_attributes = session.query(NumericStates.attributes_id) \
+                .filter(NumericStates.attributes_id.isnot(None)) \
+                .distinct()
+            deleted_rows = session.query(StateAttributes) \
+                .filter(~StateAttributes.attributes_id.in_(used_attributes)) \
                 .delete(synchronize_session=False)
-            _LOGGER.debug("Deleted %s events", deleted_rows)
+            _LOGGER.debug("Deleted %s state attributes", deleted_rows)
 
         # Execute sqlite vacuum command to free up space on disk
         if repack and instance.engine.driver == 'pysqlite':
-            _LOGGER.debug("Vacuuming SQLite to free space")
-            instance.engine.execute("VACUUM")
+            _repack_sqlite(instance.engine)
 
     except SQLAlchemyError as err:
         _LOGGER.warning("Error purging history: %s.", err)
+
+    return True
+
+
+def _purge_rows(session, model, id_column, purge_filter):
+    """Delete a batch of rows matching purge_filter.
+
+    Returns True if there might be more rows left to purge.
+    """
+    # Delete by id range, the ids of the batch are not passed as parameters
+    # because databases limit the number of parameters.
+    row_ids = [row[0] for row in session.query(id_column)
+               .filter(purge_filter)
+               .order_by(id_column)
+               .limit(MAX_ROWS_TO_PURGE)]
+
+    if not row_ids:
+        return False
+
+    deleted_rows = session.query(model) \
+        .filter(purge_filter & (id_column <= row_ids[-1])) \
+        .delete(synchronize_session=False)
+    _LOGGER.debug("Deleted %s rows from %s", deleted_rows,
+                  model.__tablename__)
+
+    return len(row_ids) == MAX_ROWS_TO_PURGE
+
+
+def _repack_sqlite(engine):
+    """Free up unused space of a SQLite database.
+
+    File databases use a new connection for each execute, the pragmas and
+    the vacuum have to run on one connection to apply to each other.
+    """
+    with engine.connect() as conn:
+        auto_vacuum = conn.execute("PRAGMA auto_vacuum").scalar()
+
+        if auto_vacuum == SQLITE_AUTO_VACUUM_INCREMENTAL:
+            _LOGGER.debug("Incrementally vacuuming SQLite to free space")
+            # The pragma frees a page per step and returns no columns, so
+            # pysqlite only steps it once on execute. executescript steps
+            # it until all free pages are released.
+            conn.connection.executescript("PRAGMA incremental_vacuum")
+            return
+
+        # Changing the auto_vacuum mode takes effect after a full vacuum,
+        # later repacks can then vacuum incrementally.
+        _LOGGER.debug("Vacuuming SQLite to free space")
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.execute("VACUUM")
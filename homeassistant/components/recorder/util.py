@@ -9,6 +9,7 @@ _LOGGER = logging.getLogger(__name__)
 
 RETRIES = 3
 QUERY_RETRY_WAIT = 0.1
+YIELD_PER = 500
 
 
 @contextmanager
@@ -53,19 +54,25 @@ def commit(session, work):
     return False
 
 
-def execute(qry):
+def execute(qry, to_native=None):
     """Query the database and convert the objects to HA native form.
 
+    to_native converts a result row, by default the to_native method of the
+    row is used.
+
     This method also retries a few times in the case of stale connections.
     """
     from sqlalchemy.exc import SQLAlchemyError
 
+    if to_native is None:
+        to_native = _row_to_native
+
     for tryno in range(0, RETRIES):
         try:
             timer_start = time.perf_counter()
             result = [
                 row for row in
-                (row.to_native() for row in qry)
+                (to_native(row) for row in qry)
                 if row is not None]
 
             if _LOGGER.isEnabledFor(logging.DEBUG):
@@ -81,3 +88,57 @@ def execute(qry):
             if tryno == RETRIES - 1:
                 raise
             time.sleep(QUERY_RETRY_WAIT)
+
+
+def execute_stream(qry, to_native=None, batch_size=YIELD_PER):
+    """Iterate over a query and yield the objects in HA native form.
+
+    Rows are fetched from the database in batches of batch_size, so unlike
+    execute the full result is never held in memory. There are no retries
+    as rows may already have been consumed.
+    """
+    if to_native is None:
+        to_native = _row_to_native
+
+    for row in qry.yield_per(batch_size):
+        row = to_native(row)
+        if row is not None:
+            yield row
+
+
+def execute_numeric(qry):
+    """Query numeric states and convert them to HA native states.
+
+    The query has to select NumericStates and the outer joined
+    StateAttributes. Shared attributes are only decoded once.
+    """
+    return execute(qry, numeric_to_native())
+
+
+def numeric_to_native():
+    """Return a converter for NumericStates and StateAttributes rows.
+
+    The converter decodes each shared attributes row only once.
+    """
+    attributes = {}
+
+    def to_native(row):
+        """Convert a numeric state and its attributes row."""
+        dbstate, dbattributes = row
+
+        if dbattributes is None:
+            return dbstate.to_native({})
+
+        attrs = attributes.get(dbattributes.attributes_id)
+        if attrs is None:
+            attrs = attributes[dbattributes.attributes_id] = \
+                dbattributes.to_native()
+
+        return dbstate.to_native(attrs)
+
+    return to_native
+
+
+def _row_to_native(row):
+    """Convert a row to its HA native form."""
+    return row.to_native()
@@ -159,7 +159,7 @@ class SensorFilter(Entity):
 
             try:
                 for filt in self._filters:
-                    filtered_state = filt.filter_state(copy(temp_state))
+                    filtered_state = filt.filter_state(temp_state)
                     _LOGGER.debug("%s(%s=%s) -> %s", filt.name,
                                   self._entity,
                                   temp_state.state,
@@ -167,7 +167,8 @@ class SensorFilter(Entity):
                                   filtered_state.state)
                     if filt.skip_processing:
                         return
-                    temp_state = filtered_state
+                    temp_state = temp_state.evolve(
+                        state=filtered_state.state)
             except ValueError:
                 _LOGGER.error("Could not convert state: %s to number",
                               self._state)
@@ -342,8 +343,7 @@ class Filter:
             self.states.append(copy(FilterState(new_state)))
         else:
             self.states.append(copy(filtered))
-        new_state.state = filtered.state
-        return new_state
+        return filtered
 
 
 @FILTERS.register(FILTER_NAME_RANGE)
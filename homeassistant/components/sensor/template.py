@@ -193,7 +193,7 @@ class SensorTemplate(Entity):
     async def async_update(self):
         """Update the state from the template."""
         try:
-            self._state = self._template.async_render()
+            self._state = self._template.async_render_cached()
         except TemplateError as ex:
             if ex.args and ex.args[0].startswith(
                     "UndefinedError: 'None' has no attribute"):
@@ -212,7 +212,7 @@ class SensorTemplate(Entity):
                 continue
 
             try:
-                setattr(self, property_name, template.async_render())
+                setattr(self, property_name, template.async_render_cached())
             except TemplateError as ex:
                 friendly_property_name = property_name[1:].replace('_', ' ')
                 if ex.args and ex.args[0].startswith(
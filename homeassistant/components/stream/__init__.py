@@ -13,10 +13,13 @@ from homeassistant.auth.util import generate_secret
 from homeassistant.const import EVENT_HOMEASSISTANT_STOP
 from homeassistant.core import callback
 from homeassistant.exceptions import HomeAssistantError
+import homeassistant.helpers.config_validation as cv
 from homeassistant.loader import bind_hass
 
-from .const import DOMAIN, ATTR_STREAMS, ATTR_ENDPOINTS
-from .core import PROVIDERS
+from .const import (
+    DOMAIN, ATTR_STREAMS, ATTR_ENDPOINTS, ATTR_SETTINGS, CONF_KEEP_WARM,
+    CONF_LOW_LATENCY, CONF_SEGMENT_DURATION)
+from .core import PROVIDERS, StreamSettings
 from .worker import stream_worker
 from .hls import async_setup_hls
 
@@ -27,7 +30,13 @@ _LOGGER = logging.getLogger(__name__)
 DEPENDENCIES = ['http']
 
 CONFIG_SCHEMA = vol.Schema({
-    DOMAIN: vol.Schema({}),
+    DOMAIN: vol.Schema({
+        vol.Optional(CONF_LOW_LATENCY, default=False): cv.boolean,
+        vol.Optional(CONF_SEGMENT_DURATION, default=0):
+            vol.All(vol.Coerce(float), vol.Range(min=0)),
+        vol.Optional(CONF_KEEP_WARM, default=0):
+            vol.All(vol.Coerce(float), vol.Range(min=0)),
+    }),
 }, extra=vol.ALLOW_EXTRA)
 
 # Set log level to error for libav
@@ -49,7 +58,8 @@ def request_stream(hass, stream_source, *, fmt='hls',
         stream = streams.get(stream_source)
         if not stream:
             stream = Stream(hass, stream_source,
-                            options=options, keepalive=keepalive)
+                            options=options, keepalive=keepalive,
+                            settings=hass.data[DOMAIN][ATTR_SETTINGS])
             streams[stream_source] = stream
 
         # Add provider
@@ -70,6 +80,12 @@ async def async_setup(hass, config):
     hass.data[DOMAIN][ATTR_ENDPOINTS] = {}
     hass.data[DOMAIN][ATTR_STREAMS] = {}
 
+    conf = config.get(DOMAIN, {})
+    hass.data[DOMAIN][ATTR_SETTINGS] = StreamSettings(
+        low_latency=conf.get(CONF_LOW_LATENCY, False),
+        segment_duration=conf.get(CONF_SEGMENT_DURATION, 0),
+        keep_warm=conf.get(CONF_KEEP_WARM, 0))
+
     # Setup HLS
     hls_endpoint = async_setup_hls(hass)
     hass.data[DOMAIN][ATTR_ENDPOINTS]['hls'] = hls_endpoint
@@ -90,12 +106,14 @@ async def async_setup(hass, config):
 class Stream:
     """Represents a single stream."""
 
-    def __init__(self, hass, source, options=None, keepalive=False):
+    def __init__(self, hass, source, options=None, keepalive=False,
+                 settings=None):
         """Initialize a stream."""
         self.hass = hass
         self.source = source
         self.options = options
         self.keepalive = keepalive
+        self.settings = settings or StreamSettings()
         self.access_token = None
         self._thread = None
         self._thread_quit = None
@@ -4,6 +4,11 @@ DOMAIN = 'stream'
 ATTR_ENDPOINTS = 'endpoints'
 ATTR_STREAMS = 'streams'
 ATTR_KEEPALIVE = 'keepalive'
+ATTR_SETTINGS = 'settings'
+
+CONF_KEEP_WARM = 'keep_warm'
+CONF_LOW_LATENCY = 'low_latency'
+CONF_SEGMENT_DURATION = 'segment_duration'
 
 OUTPUT_FORMATS = ['hls']
 
@@ -12,3 +17,6 @@ FORMAT_CONTENT_TYPE = {
 }
 
 AUDIO_SAMPLE_RATE = 44100
+
+# Maximum time to wait for more data of a segment in progress
+PART_TIMEOUT = 10  # seconds
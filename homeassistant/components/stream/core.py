@@ -2,7 +2,8 @@
 import asyncio
 from collections import deque
 import io
-from typing import List, Any
+import math
+from typing import List, Any, Optional
 
 import attr
 from aiohttp import web
@@ -17,6 +18,18 @@ from .const import DOMAIN, ATTR_STREAMS
 PROVIDERS = Registry()
 
 
+@attr.s
+class StreamSettings:
+    """Represent the settings of the streams."""
+
+    # Serve the segments while they are being recorded
+    low_latency = attr.ib(type=bool, default=False)
+    # Segments are cut on the first keyframe after this duration in seconds
+    segment_duration = attr.ib(type=float, default=0)
+    # Seconds of segments kept buffered, the outputs are kept while idle
+    keep_warm = attr.ib(type=float, default=0)
+
+
 @attr.s
 class StreamBuffer:
     """Represent a segment."""
@@ -46,8 +59,13 @@ class StreamOutput:
         self._stream = stream
         self._cursor = None
         self._event = asyncio.Event()
-        self._segments = deque(maxlen=self.num_segments)
+        self._segments = deque()
         self._unsub = None
+        self._ended = False
+        # The segment being recorded
+        self._part_sequence = None  # type: Optional[int]
+        self._part_data = bytearray()
+        self._part_event = asyncio.Event()
 
     @property
     def format(self) -> str:
@@ -69,18 +87,22 @@ class StreamOutput:
         """Return current sequence from segments."""
         return [s.sequence for s in self._segments]
 
+    @property
+    def part_sequence(self) -> Optional[int]:
+        """Return the sequence of the segment being recorded."""
+        return self._part_sequence
+
     @property
     def target_duration(self) -> int:
-        """Return the average duration of the segments in seconds."""
-        durations = [s.duration for s in self._segments]
-        return round(sum(durations) // len(self._segments)) or 1
+        """Return the longest duration of the segments in seconds."""
+        return math.ceil(max(s.duration for s in self._segments)) or 1
 
     def get_segment(self, sequence: int = None) -> Any:
         """Retrieve a specific segment, or the whole list."""
         # Reset idle timeout
         if self._unsub is not None:
             self._unsub()
-        self._unsub = async_call_later(self._stream.hass, 300, self._cleanup)
+        self._unsub = self._async_call_idle_later()
 
         if not sequence:
             return self._segments
@@ -103,15 +125,51 @@ class StreamOutput:
         self._cursor = segment.sequence
         return segment
 
+    async def wait_segment(self, sequence: int) -> bool:
+        """Wait until a segment is available, False if the stream ended."""
+        while max(self.segments, default=0) < sequence:
+            if self._ended:
+                return False
+            await self._event.wait()
+        return True
+
+    async def recv_part(self, sequence: int, offset: int) -> Optional[bytes]:
+        """Wait for the data of a segment past offset.
+
+        Returns the data as it is recorded, b'' once the whole segment was
+        received and None if the segment is not available.
+        """
+        while True:
+            for segment in self._segments:
+                if segment.sequence == sequence:
+                    return segment.segment.getvalue()[offset:]
+
+            if sequence != self._part_sequence:
+                return None
+            if len(self._part_data) > offset:
+                return bytes(self._part_data[offset:])
+
+            await self._part_event.wait()
+
+    @callback
+    def put_part(self, sequence: int, data: bytes) -> None:
+        """Store data of the segment being recorded."""
+        if sequence != self._part_sequence:
+            self._part_sequence = sequence
+            self._part_data = bytearray()
+        self._part_data.extend(data)
+        self._part_event.set()
+        self._part_event.clear()
+
     @callback
     def put(self, segment: Segment) -> None:
         """Store output."""
         # Start idle timeout when we start recieving data
         if self._unsub is None:
-            self._unsub = async_call_later(
-                self._stream.hass, 300, self._cleanup)
+            self._unsub = self._async_call_idle_later()
 
         if segment is None:
+            self._ended = True
             self._event.set()
             # Cleanup provider
             if self._unsub is not None:
@@ -120,13 +178,34 @@ class StreamOutput:
             return
 
         self._segments.append(segment)
+        # Keep the segments of the last keep_warm seconds
+        buffered = sum(s.duration for s in self._segments)
+        while len(self._segments) > self.num_segments and \
+                buffered - self._segments[0].duration >= \
+                self._stream.settings.keep_warm:
+            buffered -= self._segments.popleft().duration
+
+        if segment.sequence == self._part_sequence:
+            self._part_sequence = None
+            self._part_data = bytearray()
         self._event.set()
         self._event.clear()
+        self._part_event.set()
+        self._part_event.clear()
+
+    @callback
+    def _async_call_idle_later(self):
+        """Remove the provider once idle, unless it is kept warm."""
+        if self._stream.settings.keep_warm:
+            return None
+        return async_call_later(self._stream.hass, 300, self._cleanup)
 
     @callback
     def _cleanup(self, _now=None):
         """Remove provider."""
-        self._segments = []
+        self._segments = deque()
+        self._part_sequence = None
+        self._part_event.set()
         self._stream.remove_provider(self)
 
 
@@ -4,12 +4,16 @@ Provide functionality to stream HLS.
 For more details about this component, please refer to the documentation at
 https://home-assistant.io/components/stream/hls
 """
+import asyncio
+from contextlib import suppress
+
 from aiohttp import web
+import async_timeout
 
 from homeassistant.core import callback
 from homeassistant.util.dt import utcnow
 
-from .const import FORMAT_CONTENT_TYPE
+from .const import FORMAT_CONTENT_TYPE, PART_TIMEOUT
 from .core import StreamView, StreamOutput, PROVIDERS
 
 
@@ -36,6 +40,26 @@ class HlsPlaylistView(StreamView):
         # Wait for a segment to be ready
         if not track.segments:
             await track.recv()
+        # The stream ended before a segment was ready
+        if not track.segments:
+            raise web.HTTPNotFound()
+
+        # Blocking playlist reload, wait for the requested segment
+        msn = request.query.get('_HLS_msn')
+        if msn is not None and stream.settings.low_latency:
+            try:
+                msn = int(msn)
+            except ValueError:
+                raise web.HTTPBadRequest()
+            if msn > track.segments[-1] + 2:
+                raise web.HTTPBadRequest()
+
+            hass = request.app['hass']
+            with suppress(asyncio.TimeoutError):
+                with async_timeout.timeout(
+                        3 * track.target_duration, loop=hass.loop):
+                    await track.wait_segment(msn)
+
         headers = {
             'Content-Type': FORMAT_CONTENT_TYPE['hls']
         }
@@ -54,12 +78,34 @@ class HlsSegmentView(StreamView):
         """Return mpegts segment."""
         track = stream.add_provider('hls')
         segment = track.get_segment(int(sequence))
-        if not segment:
-            return web.HTTPNotFound()
         headers = {
             'Content-Type': 'video/mp2t'
         }
-        return web.Response(body=segment.segment.getvalue(), headers=headers)
+        if segment:
+            return web.Response(
+                body=segment.segment.getvalue(), headers=headers)
+
+        if not stream.settings.low_latency or \
+                track.part_sequence != int(sequence):
+            return web.HTTPNotFound()
+
+        # Send the segment in progress as it is recorded
+        response = web.StreamResponse(headers=headers)
+        await response.prepare(request)
+        offset = 0
+        while True:
+            try:
+                with async_timeout.timeout(
+                        PART_TIMEOUT, loop=request.app['hass'].loop):
+                    data = await track.recv_part(int(sequence), offset)
+            except asyncio.TimeoutError:
+                break
+            if not data:
+                break
+            await response.write(data)
+            offset += len(data)
+        await response.write_eof()
+        return response
 
 
 class M3U8Renderer:
@@ -69,13 +115,15 @@ class M3U8Renderer:
         """Initialize renderer."""
         self.stream = stream
 
-    @staticmethod
-    def render_preamble(track):
+    def render_preamble(self, track):
         """Render preamble."""
-        return [
+        preamble = [
             "#EXT-X-VERSION:3",
             "#EXT-X-TARGETDURATION:{}".format(track.target_duration),
         ]
+        if self.stream.settings.low_latency:
+            preamble.append("#EXT-X-SERVER-CONTROL:CAN-BLOCK-RELOAD=YES")
+        return preamble
 
     @staticmethod
     def render_playlist(track, start_time):
@@ -94,6 +142,11 @@ class M3U8Renderer:
                 "./segment/{}.ts".format(segment.sequence),
             ])
 
+        # Let the clients fetch the segment in progress as it is recorded
+        if track.part_sequence is not None:
+            playlist.append(
+                "#EXT-X-PREFETCH:./segment/{}.ts".format(track.part_sequence))
+
         return playlist
 
     def render(self, track, start_time):
@@ -62,7 +62,11 @@ def stream_worker(hass, stream, quit_event):
     outputs = {}
     first_packet = True
     sequence = 1
+    segment_start = 0
     audio_packets = {}
+    # Size of the data of the segments in progress sent to the outputs
+    part_sizes = {}
+    settings = stream.settings
 
     while not quit_event.is_set():
         try:
@@ -78,10 +82,13 @@ def stream_worker(hass, stream, quit_event):
             _LOGGER.error("Error demuxing stream: %s", ex)
             break
 
-        # Reset segment on every keyframe
-        if packet.is_keyframe:
+        # Reset segment on keyframes once the segment is long enough
+        if packet.is_keyframe and (
+                first_packet or not outputs or
+                (packet.pts - segment_start) * packet.time_base >=
+                settings.segment_duration):
             # Save segment to outputs
-            segment_duration = (packet.pts * packet.time_base) / sequence
+            segment_duration = (packet.pts - segment_start) * packet.time_base
             for fmt, buffer in outputs.items():
                 buffer.output.close()
                 del audio_packets[buffer.astream]
@@ -93,8 +100,10 @@ def stream_worker(hass, stream, quit_event):
 
             # Clear outputs and increment sequence
             outputs = {}
+            part_sizes = {}
             if not first_packet:
                 sequence += 1
+                segment_start = packet.pts
 
             # Initialize outputs
             for stream_output in stream.outputs.values():
@@ -140,3 +149,16 @@ def stream_worker(hass, stream, quit_event):
             # Assign the video packet to the new stream & mux
             packet.stream = buffer.vstream
             buffer.output.mux(packet)
+
+        if settings.low_latency:
+            # Send the data muxed so far to the outputs
+            for fmt, buffer in outputs.items():
+                size = buffer.segment.tell()
+                if size <= part_sizes.get(fmt, 0) or \
+                        not stream.outputs.get(fmt):
+                    continue
+                with buffer.segment.getbuffer() as data:
+                    part = bytes(data[part_sizes.get(fmt, 0):size])
+                part_sizes[fmt] = size
+                hass.loop.call_soon_threadsafe(
+                    stream.outputs[fmt].put_part, sequence, part)
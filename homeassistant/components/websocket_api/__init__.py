@@ -1,13 +1,23 @@
 """WebSocket based API for Home Assistant."""
+import voluptuous as vol
+
 from homeassistant.core import callback
 from homeassistant.loader import bind_hass
 
-from . import commands, connection, const, decorators, http, messages
+from . import commands, connection, const, decorators, encoder, http, messages
 
 DOMAIN = const.DOMAIN
 
 DEPENDENCIES = ('http',)
 
+CONFIG_SCHEMA = vol.Schema({
+    DOMAIN: vol.Schema({
+        vol.Optional(
+            const.CONF_JSON_BACKEND, default=encoder.JSON_BACKEND_JSON
+        ): vol.In(encoder.JSON_BACKENDS),
+    }),
+}, extra=vol.ALLOW_EXTRA)
+
 # Backwards compat / Make it easier to integrate
 # pylint: disable=invalid-name
 ActiveConnection = connection.ActiveConnection
@@ -42,6 +52,10 @@ def async_register_command(hass, command_or_handler, handler=None,
 
 async def async_setup(hass, config):
     """Initialize the websocket API."""
+    conf = config.get(DOMAIN, {})
+    hass.data[const.DATA_ENCODER] = encoder.MessageEncoder(
+        encoder.get_json_dump(
+            conf.get(const.CONF_JSON_BACKEND, encoder.JSON_BACKEND_JSON)))
     hass.http.register_view(http.WebsocketAPIView)
     commands.async_register_commands(hass)
     return True
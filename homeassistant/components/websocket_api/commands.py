@@ -1,7 +1,11 @@
 """Commands part of Websocket API."""
+import fnmatch
+import re
+
 import voluptuous as vol
 
-from homeassistant.const import MATCH_ALL, EVENT_TIME_CHANGED
+from homeassistant.const import (
+    MATCH_ALL, EVENT_STATE_CHANGED, EVENT_TIME_CHANGED)
 from homeassistant.core import callback, DOMAIN as HASS_DOMAIN
 from homeassistant.exceptions import Unauthorized, ServiceNotFound, \
     HomeAssistantError
@@ -17,11 +21,13 @@ def async_register_commands(hass):
     async_reg = hass.components.websocket_api.async_register_command
     async_reg(handle_subscribe_events)
     async_reg(handle_unsubscribe_events)
+    async_reg(handle_subscribe_states)
     async_reg(handle_call_service)
     async_reg(handle_get_states)
     async_reg(handle_get_services)
     async_reg(handle_get_config)
     async_reg(handle_ping)
+    async_reg(handle_supported_features)
 
 
 def pong_message(iden):
@@ -45,14 +51,15 @@ def handle_subscribe_events(hass, connection, msg):
     if not connection.user.is_admin:
         raise Unauthorized
 
+    encoder = hass.data[const.DATA_ENCODER]
+
     async def forward_events(event):
         """Forward events to websocket."""
         if event.event_type == EVENT_TIME_CHANGED:
             return
 
-        connection.send_message(messages.event_message(
-            msg['id'], event.as_dict()
-        ))
+        connection.send_message(encoder.async_event_message(
+            msg['id'], event))
 
     connection.subscriptions[msg['id']] = hass.bus.async_listen(
         msg['event_type'], forward_events)
@@ -80,6 +87,119 @@ def handle_unsubscribe_events(hass, connection, msg):
             msg['id'], const.ERR_NOT_FOUND, 'Subscription not found.'))
 
 
+def _entity_filter(entity_ids, domains, globs):
+    """Return a function testing if an entity id matches the filters."""
+    if not (entity_ids or domains or globs):
+        return lambda entity_id: True
+
+    entity_ids = set(entity_ids)
+    domains = set(domains)
+    pattern = re.compile('|'.join(
+        fnmatch.translate(glob) for glob in globs)) if globs else None
+
+    def entity_filter(entity_id):
+        """Test if an entity id matches the filters."""
+        return (entity_id in entity_ids or
+                entity_id.split('.', 1)[0] in domains or
+                (pattern is not None and pattern.match(entity_id) is not None))
+
+    return entity_filter
+
+
+def state_diff(old_state, new_state):
+    """Return the changes from the old to the new state.
+
+    Returns the full state if there is no old state.
+    """
+    if old_state is None:
+        return new_state.as_dict()
+
+    diff = {'last_updated': new_state.last_updated}
+
+    if old_state.state != new_state.state:
+        diff['state'] = new_state.state
+        diff['last_changed'] = new_state.last_changed
+
+    old_attrs = old_state.attributes
+    new_attrs = new_state.attributes
+    changed = {key: value for key, value in new_attrs.items()
+               if key not in old_attrs or old_attrs[key] != value}
+    if changed:
+        diff['attributes'] = changed
+
+    removed = [key for key in old_attrs if key not in new_attrs]
+    if removed:
+        diff['removed_attributes'] = removed
+
+    return diff
+
+
+@callback
+@decorators.websocket_command({
+    vol.Required('type'): 'subscribe_states',
+    vol.Optional('entity_ids', default=[]): cv.entity_ids,
+    vol.Optional('domains', default=[]):
+        vol.All(cv.ensure_list, [vol.All(cv.string, vol.Lower)]),
+    vol.Optional('globs', default=[]):
+        vol.All(cv.ensure_list, [vol.All(cv.string, vol.Lower)]),
+    vol.Optional('diff', default=False): cv.boolean,
+})
+def handle_subscribe_states(hass, connection, msg):
+    """Handle subscribe states command.
+
+    Forwards the state changes of the entities matching any of the filters,
+    or of all entities without filters. With diff, the current states are
+    sent first, followed by the changes of each state.
+
+    Async friendly.
+    """
+    entity_perm = connection.user.permissions.check_entity
+    entity_filter = _entity_filter(
+        msg['entity_ids'], msg['domains'], msg['globs'])
+    encoder = hass.data[const.DATA_ENCODER]
+    iden = msg['id']
+    diff = msg['diff']
+
+    @callback
+    def forward_state_changes(event):
+        """Forward state changes to websocket."""
+        entity_id = event.data['entity_id']
+
+        if not (entity_filter(entity_id) and entity_perm(entity_id, 'read')):
+            return
+
+        if not diff:
+            connection.send_message(encoder.async_event_message(iden, event))
+            return
+
+        new_state = event.data['new_state']
+        if new_state is None:
+            changes = {'removed': [entity_id]}
+        else:
+            changes = {'changed': {entity_id: state_diff(
+                event.data['old_state'], new_state)}}
+
+        connection.send_message(messages.event_message(iden, changes))
+
+    if msg['entity_ids'] and not (msg['domains'] or msg['globs']):
+        connection.subscriptions[iden] = \
+            hass.bus.async_listen_entity_state_changed(
+                msg['entity_ids'], forward_state_changes)
+    else:
+        connection.subscriptions[iden] = hass.bus.async_listen(
+            EVENT_STATE_CHANGED, forward_state_changes)
+
+    connection.send_message(messages.result_message(iden))
+
+    if diff:
+        connection.send_message(messages.event_message(iden, {'changed': {
+            state.entity_id: state.as_dict()
+            for state in hass.states.async_all()
+            if entity_filter(state.entity_id) and
+            entity_perm(state.entity_id, 'read')
+        }}))
+
+
 @decorators.async_response
 @decorators.websocket_command({
     vol.Required('type'): 'call_service',
@@ -130,8 +250,8 @@ def handle_get_states(hass, connection, msg):
         if entity_perm(state.entity_id, 'read')
     ]
 
-    connection.send_message(messages.result_message(
-        msg['id'], states))
+    connection.send_message(
+        hass.data[const.DATA_ENCODER].async_states_message(msg['id'], states))
 
 
 @decorators.async_response
@@ -171,3 +291,17 @@ def handle_ping(hass, connection, msg):
     Async friendly.
     """
     connection.send_message(pong_message(msg['id']))
+
+
+@callback
+@decorators.websocket_command({
+    vol.Required('type'): 'supported_features',
+    vol.Required('features'): {str: int},
+})
+def handle_supported_features(hass, connection, msg):
+    """Handle enabling optional features of the protocol.
+
+    Async friendly.
+    """
+    connection.supported_features = msg['features']
+    connection.send_message(messages.result_message(msg['id']))
@@ -23,6 +23,8 @@ class ActiveConnection:
 
         self.subscriptions = {}
         self.last_id = 0
+        # Optional features of the protocol enabled by the client
+        self.supported_features = {}
 
     def context(self, msg):
         """Return a context."""
@@ -6,6 +6,13 @@ DOMAIN = 'websocket_api'
 URL = '/api/websocket'
 MAX_PENDING_MSG = 512
 
+DATA_ENCODER = 'websocket_api_encoder'
+
+CONF_JSON_BACKEND = 'json_backend'
+
+# Send all pending messages to the client in a single JSON array frame
+FEATURE_COALESCE_MESSAGES = 'coalesce_messages'
+
 ERR_ID_REUSE = 'id_reuse'
 ERR_INVALID_FORMAT = 'invalid_format'
 ERR_NOT_FOUND = 'not_found'
@@ -0,0 +1,135 @@
+"""Encode websocket messages, sharing the JSON of states and events."""
+from collections import OrderedDict
+from functools import partial
+import json
+import logging
+
+from homeassistant.const import EVENT_STATE_CHANGED
+from homeassistant.core import callback
+from homeassistant.helpers.json import JSONEncoder
+
+from .const import ERR_UNKNOWN_ERROR, TYPE_RESULT
+from .messages import error_message
+
+_LOGGER = logging.getLogger(__name__)
+
+JSON_BACKEND_JSON = 'json'
+JSON_BACKEND_ORJSON = 'orjson'
+JSON_BACKENDS = (JSON_BACKEND_JSON, JSON_BACKEND_ORJSON)
+
+# Events are forwarded to all connections right after each other, so only
+# the last few events need to be kept.
+EVENT_CACHE_SIZE = 32
+
+JSON_DUMP = partial(json.dumps, cls=JSONEncoder, allow_nan=False)
+
+STATE_CHANGED_KEYS = frozenset(('entity_id', 'old_state', 'new_state'))
+
+
+def get_json_dump(backend):
+    """Return the function encoding objects to a JSON string.
+
+    Falls back to the json module if the backend is not installed.
+    """
+    if backend == JSON_BACKEND_ORJSON:
+        try:
+            import orjson
+        except ImportError:
+            _LOGGER.warning(
+                "JSON backend orjson is not installed, using json")
+        else:
+            default = JSONEncoder().default
+
+            def orjson_dump(obj):
+                """Encode an object to a JSON string with orjson."""
+                return orjson.dumps(
+                    obj, default=default,
+                    option=orjson.OPT_NON_STR_KEYS).decode('utf-8')
+
+            return orjson_dump
+
+    return JSON_DUMP
+
+
+class MessageEncoder:
+    """Encode messages and cache the JSON of states and events.
+
+    States and events are immutable, so each one is encoded once and the
+    JSON is shared by all connections. The state changed events are built
+    from the JSON of their states, which is in turn reused by get_states.
+    """
+
+    def __init__(self, dump=JSON_DUMP):
+        """Initialize the encoder."""
+        self.dump = dump
+        # The last encoded state of each entity
+        self._states = {}
+        self._events = OrderedDict()
+
+    @callback
+    def async_state_json(self, state):
+        """Return the JSON of a state."""
+        if state is None:
+            return 'null'
+
+        cached = self._states.get(state.entity_id)
+        if cached is not None and cached[0] is state:
+            return cached[1]
+
+        encoded = self.dump(state)
+        self._states[state.entity_id] = (state, encoded)
+        return encoded
+
+    @callback
+    def async_event_json(self, event):
+        """Return the JSON of an event."""
+        cached = self._events.get(id(event))
+        if cached is not None and cached[0] is event:
+            return cached[1]
+
+        data = event.data
+        if event.event_type == EVENT_STATE_CHANGED and \
+                data.keys() == STATE_CHANGED_KEYS:
+            if data['new_state'] is None:
+                self._states.pop(data['entity_id'], None)
+
+            encoded = (
+                '{{"event_type":{},"data":{{"entity_id":{},"old_state":{},'
+                '"new_state":{}}},"origin":{},"time_fired":{},"context":{}}}'
+            ).format(
+                self.dump(event.event_type), self.dump(data['entity_id']),
+                self.async_state_json(data['old_state']),
+                self.async_state_json(data['new_state']),
+                self.dump(str(event.origin)), self.dump(event.time_fired),
+                self.dump(event.context))
+        else:
+            encoded = self.dump(event)
+
+        self._events[id(event)] = (event, encoded)
+        if len(self._events) > EVENT_CACHE_SIZE:
+            self._events.popitem(last=False)
+
+        return encoded
+
+    @callback
+    def async_event_message(self, iden, event):
+        """Return an encoded event message."""
+        try:
+            return '{{"id":{},"type":"event","event":{}}}'.format(
+                iden, self.async_event_json(event))
+        except (ValueError, TypeError) as err:
+            _LOGGER.error("Unable to serialize to JSON: %s\n%s", err, event)
+            return error_message(
+                iden, ERR_UNKNOWN_ERROR, 'Invalid JSON in response')
+
+    @callback
+    def async_states_message(self, iden, states):
+        """Return an encoded result message of a list of states."""
+        try:
+            return '{{"id":{},"type":{},"success":true,"result":[{}]}}'.format(
+                iden, self.dump(TYPE_RESULT),
+                ','.join(self.async_state_json(state) for state in states))
+        except (ValueError, TypeError) as err:
+            _LOGGER.error("Unable to serialize to JSON: %s", err)
+            return error_message(
+                iden, ERR_UNKNOWN_ERROR, 'Invalid JSON in response')
@@ -1,8 +1,6 @@
 """View to accept incoming websocket connection."""
 import asyncio
 from contextlib import suppress
-from functools import partial
-import json
 import logging
 
 from aiohttp import web, WSMsgType
@@ -11,15 +9,16 @@ import async_timeout
 from homeassistant.const import EVENT_HOMEASSISTANT_STOP
 from homeassistant.core import callback
 from homeassistant.components.http import HomeAssistantView
-from homeassistant.helpers.json import JSONEncoder
+from homeassistant.components.http.const import KEY_REAL_IP
+from homeassistant.util.network import is_local
 
-from .const import MAX_PENDING_MSG, CANCELLATION_ERRORS, URL, ERR_UNKNOWN_ERROR
+from .const import (
+    MAX_PENDING_MSG, CANCELLATION_ERRORS, DATA_ENCODER, URL,
+    ERR_UNKNOWN_ERROR, FEATURE_COALESCE_MESSAGES)
 from .auth import AuthPhase, auth_required_message
 from .error import Disconnect
 from .messages import error_message
 
-JSON_DUMP = partial(json.dumps, cls=JSONEncoder, allow_nan=False)
-
 
 class WebsocketAPIView(HomeAssistantView):
     """View to serve a websockets endpoint."""
@@ -45,9 +44,25 @@ class WebSocketHandler:
         self._to_write = asyncio.Queue(maxsize=MAX_PENDING_MSG, loop=hass.loop)
         self._handle_task = None
         self._writer_task = None
+        self._connection = None
+        self._dump = hass.data[DATA_ENCODER].dump
         self._logger = logging.getLogger(
             "{}.connection.{}".format(__name__, id(self)))
 
+    def _encode(self, message):
+        """Return the JSON of a message."""
+        # Messages with shared content are encoded in advance
+        if isinstance(message, str):
+            return message
+
+        try:
+            return self._dump(message)
+        except (ValueError, TypeError) as err:
+            self._logger.error('Unable to serialize to JSON: %s\n%s',
+                               err, message)
+            return self._dump(error_message(
+                message['id'], ERR_UNKNOWN_ERROR, 'Invalid JSON in response'))
+
     async def _writer(self):
         """Write outgoing messages."""
         # Exceptions if Socket disconnected or cancelled by connection handler
@@ -56,15 +71,28 @@ class WebSocketHandler:
                 message = await self._to_write.get()
                 if message is None:
                     break
-                self._logger.debug("Sending %s", message)
-                try:
-                    await self.wsock.send_json(message, dumps=JSON_DUMP)
-                except (ValueError, TypeError) as err:
-                    self._logger.error('Unable to serialize to JSON: %s\n%s',
-                                       err, message)
-                    await self.wsock.send_json(error_message(
-                        message['id'], ERR_UNKNOWN_ERROR,
-                        'Invalid JSON in response'))
+
+                connection = self._connection
+                if connection is None or not connection.supported_features.get(
+                        FEATURE_COALESCE_MESSAGES):
+                    self._logger.debug("Sending %s", message)
+                    await self.wsock.send_str(self._encode(message))
+                    continue
+
+                # Send all pending messages in a single frame
+                messages = [message]
+                while not self._to_write.empty():
+                    message = self._to_write.get_nowait()
+                    if message is None:
+                        break
+                    messages.append(message)
+
+                self._logger.debug("Sending %s", messages)
+                await self.wsock.send_str('[{}]'.format(
+                    ','.join(self._encode(msg) for msg in messages)))
+
+                if message is None:
+                    break
 
     @callback
     def _send_message(self, message):
@@ -90,7 +118,9 @@ class WebSocketHandler:
     async def async_handle(self):
         """Handle a websocket response."""
         request = self.request
-        wsock = self.wsock = web.WebSocketResponse(heartbeat=55)
+        # Compression only pays off for remote clients on slow links
+        wsock = self.wsock = web.WebSocketResponse(
+            heartbeat=55, compress=not is_local(request[KEY_REAL_IP]))
         await wsock.prepare(request)
         self._logger.debug("Connected")
 
@@ -141,7 +171,7 @@ class WebSocketHandler:
                 raise Disconnect
 
             self._logger.debug("Received %s", msg)
-            connection = await auth.async_handle(msg)
+            connection = self._connection = await auth.async_handle(msg)
 
             # Command phase
             while not wsock.closed:
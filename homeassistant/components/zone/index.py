@@ -0,0 +1,95 @@
+"""Index zones by location."""
+import math
+from typing import Dict, List, Optional, Set, Tuple  # noqa: F401
+
+# Size of the cells of the grid in degrees, 360 must be a multiple of it
+CELL_SIZE = 0.1
+COLUMNS = round(360 / CELL_SIZE)
+
+# The shortest length of a degree of latitude in meters, rounded down so
+# that the bounding boxes always contain the circles
+METERS_PER_DEGREE = 110000
+
+# Zones covering more cells are checked for every location
+MAX_CELLS = 100
+
+
+def _cells(latitude: float, longitude: float,
+           radius: float) -> Optional[List[Tuple[int, int]]]:
+    """Return the cells overlapping the bounding box of a circle.
+
+    Returns None if the circle covers more than MAX_CELLS cells or a pole.
+    """
+    lat_span = radius / METERS_PER_DEGREE
+    lat_min = latitude - lat_span
+    lat_max = latitude + lat_span
+    if lat_min <= -90 or lat_max >= 90:
+        return None
+
+    # Degrees of longitude are the shortest at the latitude furthest from
+    # the equator
+    lon_span = lat_span / math.cos(math.radians(
+        max(abs(lat_min), abs(lat_max))))
+    if lon_span >= 180:
+        return None
+
+    rows = range(math.floor(lat_min / CELL_SIZE),
+                 math.floor(lat_max / CELL_SIZE) + 1)
+    columns = range(math.floor((longitude - lon_span) / CELL_SIZE),
+                    math.floor((longitude + lon_span) / CELL_SIZE) + 1)
+    if len(rows) * len(columns) > MAX_CELLS:
+        return None
+
+    # Wrap the columns around the antimeridian
+    return [(row, column % COLUMNS) for row in rows for column in columns]
+
+
+class ZoneIndex:
+    """Find the zones that may contain a location with a grid.
+
+    Each zone is added to the cells of the grid overlapped by its bounding
+    box, so only the zones of the cells around a location need to have
+    their distance computed.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the index."""
+        self._cells = {}  # type: Dict[Tuple[int, int], List[str]]
+        # Zones too large for the grid
+        self._large = []  # type: List[str]
+        self._entity_ids = []  # type: List[str]
+
+    def add(self, entity_id: str, latitude: float, longitude: float,
+            radius: float) -> None:
+        """Add a zone."""
+        self._entity_ids.append(entity_id)
+
+        cells = _cells(latitude, longitude, radius)
+        if cells is None:
+            self._large.append(entity_id)
+            return
+
+        for cell in cells:
+            zones = self._cells.get(cell)
+            if zones is None:
+                self._cells[cell] = [entity_id]
+            else:
+                zones.append(entity_id)
+
+    def candidates(self, latitude: float, longitude: float,
+                   radius: float = 0) -> Set[str]:
+        """Return the entity ids of the zones that may contain a location.
+
+        The location is a circle of radius meters, e.g. the GPS accuracy.
+        """
+        cells = _cells(latitude, longitude, radius)
+        if cells is None:
+            return set(self._entity_ids)
+
+        candidates = set(self._large)
+        for cell in cells:
+            zones = self._cells.get(cell)
+            if zones is not None:
+                candidates.update(zones)
+
+        return candidates
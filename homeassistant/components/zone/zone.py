@@ -1,18 +1,53 @@
 """Zone entity and functionality."""
-from homeassistant.const import ATTR_HIDDEN, ATTR_LATITUDE, ATTR_LONGITUDE
+from homeassistant.const import (
+    ATTR_HIDDEN, ATTR_LATITUDE, ATTR_LONGITUDE, EVENT_STATE_CHANGED)
+from homeassistant.core import callback
 from homeassistant.helpers.entity import Entity
 from homeassistant.loader import bind_hass
 from homeassistant.util.async_ import run_callback_threadsafe
 from homeassistant.util.location import distance
 
 from .const import DOMAIN
+from .index import ZoneIndex
 
 ATTR_PASSIVE = 'passive'
 ATTR_RADIUS = 'radius'
 
+DATA_INDEX = 'zone_index'
+
 STATE = 'zoning'
 
 
+@callback
+def _async_get_index(hass):
+    """Return the index of the active zones.
+
+    The index is built on first use and after zone states changed.
+    """
+    index = hass.data.get(DATA_INDEX)
+    if index is not None:
+        return index
+
+    if DATA_INDEX not in hass.data:
+        @callback
+        def zone_changed(event):
+            """Drop the index when a zone changes."""
+            if event.data['entity_id'].startswith(DOMAIN + '.'):
+                hass.data[DATA_INDEX] = None
+
+        hass.bus.async_listen(EVENT_STATE_CHANGED, zone_changed)
+
+    index = hass.data[DATA_INDEX] = ZoneIndex()
+    for entity_id in hass.states.async_entity_ids(DOMAIN):
+        zone = hass.states.get(entity_id)
+        if not zone.attributes.get(ATTR_PASSIVE):
+            index.add(entity_id, zone.attributes[ATTR_LATITUDE],
+                      zone.attributes[ATTR_LONGITUDE],
+                      zone.attributes[ATTR_RADIUS])
+
+    return index
+
+
 @bind_hass
 def active_zone(hass, latitude, longitude, radius=0):
     """Find the active zone for given latitude, longitude."""
@@ -27,15 +62,18 @@ def async_active_zone(hass, latitude, longitude, radius=0):
 
     This method must be run in the event loop.
     """
+    candidates = _async_get_index(hass).candidates(
+        latitude, longitude, radius)
+
     # Sort entity IDs so that we are deterministic if equal distance to 2 zones
-    zones = (hass.states.get(entity_id) for entity_id
-             in sorted(hass.states.async_entity_ids(DOMAIN)))
+    zones = (hass.states.get(entity_id) for entity_id in sorted(candidates))
 
     min_dist = None
     closest = None
 
     for zone in zones:
-        if zone.attributes.get(ATTR_PASSIVE):
+        # The zone was removed after the index was built
+        if zone is None or zone.attributes.get(ATTR_PASSIVE):
             continue
 
         zone_dist = distance(
@@ -5,6 +5,7 @@ Home Assistant is a Home Automation framework for observing the state
 of entities and react to changes.
 """
 import asyncio
+from collections import OrderedDict
 from concurrent.futures import ThreadPoolExecutor
 import datetime
 import enum
@@ -14,13 +15,13 @@ import os
 import pathlib
 import sys
 import threading
-from time import monotonic
+from time import monotonic, perf_counter
 import uuid
 
 from types import MappingProxyType
 from typing import (  # noqa: F401 pylint: disable=unused-import
     Optional, Any, Callable, List, TypeVar, Dict, Coroutine, Set,
-    TYPE_CHECKING, Awaitable, Iterator)
+    TYPE_CHECKING, Awaitable, Iterator, Iterable, Mapping)
 
 from async_timeout import timeout
 import attr
@@ -43,6 +44,8 @@ from homeassistant.util.async_ import (
 from homeassistant import util
 import homeassistant.util.dt as dt_util
 from homeassistant.util import location, slugify
+from homeassistant.util.profiling import (
+    CATEGORY_LISTENER, CATEGORY_SERVICE, Profiler)
 from homeassistant.util.unit_system import UnitSystem, METRIC_SYSTEM  # NOQA
 
 # Typing imports that create a circular dependency
@@ -66,6 +69,9 @@ TIMEOUT_EVENT_START = 15
 
 _LOGGER = logging.getLogger(__name__)
 
+# Sets the slots of the immutable State and Event objects
+_setattr = object.__setattr__  # pylint: disable=invalid-name
+
 
 def split_entity_id(entity_id: str) -> List[str]:
     """Split a state entity_id into domain, object_id."""
@@ -152,6 +158,8 @@ class HomeAssistant:
         self.state = CoreState.not_running
         self.exit_code = 0  # type: int
         self.config_entries = None  # type: Optional[ConfigEntries]
+        # Set to time sampled jobs, see the profiler component
+        self.profiler = None  # type: Optional[Profiler]
         # If not None, use to signal end-of-loop
         self._stopped = None  # type: Optional[asyncio.Event]
 
@@ -439,33 +447,63 @@ class EventOrigin(enum.Enum):
 
 
 class Event:
-    """Representation of an event within the bus."""
+    """Representation of an event within the bus.
+
+    Events are immutable.
+    """
 
-    __slots__ = ['event_type', 'data', 'origin', 'time_fired', 'context']
+    __slots__ = ['event_type', 'data', 'origin', 'time_fired', 'context',
+                 '_as_dict']
+
+    if TYPE_CHECKING:
+        # The slots are set with _setattr
+        event_type = None  # type: str
+        data = None  # type: Dict
+        origin = None  # type: EventOrigin
+        time_fired = None  # type: datetime.datetime
+        context = None  # type: Context
+        _as_dict = None  # type: Optional[Dict]
 
     def __init__(self, event_type: str, data: Optional[Dict] = None,
                  origin: EventOrigin = EventOrigin.local,
                  time_fired: Optional[int] = None,
                  context: Optional[Context] = None) -> None:
         """Initialize a new event."""
-        self.event_type = event_type
-        self.data = data or {}
-        self.origin = origin
-        self.time_fired = time_fired or dt_util.utcnow()
-        self.context = context or Context()
+        _setattr(self, 'event_type', event_type)
+        _setattr(self, 'data', data or {})
+        _setattr(self, 'origin', origin)
+        _setattr(self, 'time_fired', time_fired or dt_util.utcnow())
+        _setattr(self, 'context', context or Context())
+        _setattr(self, '_as_dict', None)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        """Prevent changes to the event."""
+        raise AttributeError("Event is immutable")
+
+    def __delattr__(self, name: str) -> None:
+        """Prevent changes to the event."""
+        raise AttributeError("Event is immutable")
 
     def as_dict(self) -> Dict:
         """Create a dict representation of this Event.
 
+        The dict is created once and shared, it must not be modified.
+
         Async friendly.
         """
-        return {
-            'event_type': self.event_type,
-            'data': dict(self.data),
-            'origin': str(self.origin),
-            'time_fired': self.time_fired,
-            'context': self.context.as_dict()
-        }
+        as_dict = self._as_dict
+
+        if as_dict is None:
+            as_dict = {
+                'event_type': self.event_type,
+                'data': dict(self.data),
+                'origin': str(self.origin),
+                'time_fired': self.time_fired,
+                'context': self.context.as_dict()
+            }
+            _setattr(self, '_as_dict', as_dict)
+
+        return as_dict
 
     def __repr__(self) -> str:
         """Return the representation."""
@@ -494,6 +532,12 @@ class EventBus:
     def __init__(self, hass: HomeAssistant) -> None:
         """Initialize a new event bus."""
         self._listeners = {}  # type: Dict[str, List[Callable]]
+        # State changed listeners indexed by the entity_id they track
+        self._entity_listeners = {}  # type: Dict[str, List[Callable]]
+        # State changed listeners indexed by the domain they track
+        self._domain_listeners = {}  # type: Dict[str, List[Callable]]
+        # Number of listeners in the entity and domain indexes
+        self._entity_listener_count = 0
         self._hass = hass
 
     @callback
@@ -502,8 +546,15 @@ class EventBus:
 
         This method must be run in the event loop.
         """
-        return {key: len(self._listeners[key])
-                for key in self._listeners}
+        listeners = {key: len(self._listeners[key])
+                     for key in self._listeners}
+
+        if self._entity_listener_count:
+            listeners[EVENT_STATE_CHANGED] = (
+                listeners.get(EVENT_STATE_CHANGED, 0) +
+                self._entity_listener_count)
+
+        return listeners
 
     @property
     def listeners(self) -> Dict[str, int]:
@@ -529,6 +580,19 @@ class EventBus:
         """
         listeners = self._listeners.get(event_type, [])
 
+        # Only dispatch to the state changed listeners of this entity
+        if event_type == EVENT_STATE_CHANGED and event_data:
+            entity_id = event_data.get('entity_id', '')
+            entity_listeners = self._entity_listeners.get(entity_id)
+            if entity_listeners is not None:
+                listeners = listeners + entity_listeners
+
+            if self._domain_listeners:
+                domain_listeners = self._domain_listeners.get(
+                    entity_id.partition('.')[0])
+                if domain_listeners is not None:
+                    listeners = listeners + domain_listeners
+
         # EVENT_HOMEASSISTANT_CLOSE should go only to his listeners
         match_all_listeners = self._listeners.get(MATCH_ALL)
         if (match_all_listeners is not None and
@@ -543,6 +607,11 @@ class EventBus:
         if not listeners:
             return
 
+        profiler = self._hass.profiler
+        if profiler is not None and profiler.sample():
+            listeners = [_profiled_job(profiler, CATEGORY_LISTENER, func)
+                         for func in listeners]
+
         for func in listeners:
             self._hass.async_add_job(func, event)
 
@@ -584,6 +653,61 @@ class EventBus:
 
         return remove_listener
 
+    @callback
+    def async_listen_entity_state_changed(
+            self, entity_ids: Iterable[str],
+            listener: Callable) -> CALLBACK_TYPE:
+        """Listen for state changed events of specific entities.
+
+        The listener is only invoked for EVENT_STATE_CHANGED events whose
+        entity_id is one of entity_ids. Use async_listen with
+        EVENT_STATE_CHANGED to receive the state changes of all entities.
+
+        This method must be run in the event loop.
+        """
+        return self._async_listen_indexed(
+            self._entity_listeners, entity_ids, listener)
+
+    @callback
+    def async_listen_domain_state_changed(
+            self, domains: Iterable[str],
+            listener: Callable) -> CALLBACK_TYPE:
+        """Listen for state changed events of entities in domains.
+
+        The listener is only invoked for EVENT_STATE_CHANGED events whose
+        entity_id is in one of domains.
+
+        This method must be run in the event loop.
+        """
+        return self._async_listen_indexed(
+            self._domain_listeners, domains, listener)
+
+    @callback
+    def _async_listen_indexed(
+            self, index: Dict[str, List[Callable]], keys: Iterable[str],
+            listener: Callable) -> CALLBACK_TYPE:
+        """Add a state changed listener to an index under keys.
+
+        This method must be run in the event loop.
+        """
+        # Listen once to each key, even if it is passed several times
+        keys = tuple(OrderedDict.fromkeys(keys))
+
+        for key in keys:
+            if key in index:
+                index[key].append(listener)
+            else:
+                index[key] = [listener]
+
+        if keys:
+            self._entity_listener_count += 1
+
+        def remove_listener() -> None:
+            """Remove the listener."""
+            self._async_remove_indexed_listener(index, keys, listener)
+
+        return remove_listener
+
     def listen_once(
             self, event_type: str, listener: Callable) -> CALLBACK_TYPE:
         """Listen once for event of a specific type.
@@ -650,6 +774,45 @@ class EventBus:
             # ValueError if listener did not exist within event_type
             _LOGGER.warning("Unable to remove unknown listener %s", listener)
 
+    @callback
+    def _async_remove_indexed_listener(
+            self, index: Dict[str, List[Callable]], keys: Iterable[str],
+            listener: Callable) -> None:
+        """Remove a state changed listener from an index.
+
+        This method must be run in the event loop.
+        """
+        if not keys:
+            return
+
+        removed = False
+
+        for key in keys:
+            try:
+                index[key].remove(listener)
+            except (KeyError, ValueError):
+                continue
+
+            removed = True
+            if not index[key]:
+                index.pop(key)
+
+        if removed:
+            self._entity_listener_count -= 1
+        else:
+            _LOGGER.warning("Unable to remove unknown listener %s", listener)
+
+
+_STATE_CHANGEABLE = frozenset((
+    'state', 'attributes', 'last_changed', 'last_updated', 'context'))
+
+
+def _wrap_attributes(attributes: Optional[Mapping]) -> MappingProxyType:
+    """Return a read only view of the attributes of a state."""
+    if isinstance(attributes, MappingProxyType):
+        return attributes
+    return MappingProxyType(attributes or {})
+
 
 class State:
     """Object to represent a state within the state machine.
@@ -660,10 +823,22 @@ class State:
     last_changed: last time the state was changed, not the attributes.
     last_updated: last time this object was updated.
     context: Context in which it was created
+
+    States are immutable, use evolve to create a changed copy.
     """
 
     __slots__ = ['entity_id', 'state', 'attributes',
-                 'last_changed', 'last_updated', 'context']
+                 'last_changed', 'last_updated', 'context', '_as_dict']
+
+    if TYPE_CHECKING:
+        # The slots are set with _setattr
+        entity_id = None  # type: str
+        state = None  # type: str
+        attributes = None  # type: MappingProxyType
+        last_changed = None  # type: datetime.datetime
+        last_updated = None  # type: datetime.datetime
+        context = None  # type: Context
+        _as_dict = None  # type: Optional[Dict]
 
     def __init__(self, entity_id: str, state: Any,
                  attributes: Optional[Dict] = None,
@@ -676,7 +851,7 @@ class State:
         """Initialize a new state."""
         state = str(state)
 
-        if not valid_entity_id(entity_id) and not temp_invalid_id_bypass:
+        if not temp_invalid_id_bypass and not valid_entity_id(entity_id):
             raise InvalidEntityFormatError((
                 "Invalid entity id encountered: {}. "
                 "Format should be <domain>.<object_id>").format(entity_id))
@@ -686,12 +861,23 @@ class State:
                 "Invalid state encountered for entity id: {}. "
                 "State max length is 255 characters.").format(entity_id))
 
-        self.entity_id = entity_id.lower()
-        self.state = state  # type: str
-        self.attributes = MappingProxyType(attributes or {})
-        self.last_updated = last_updated or dt_util.utcnow()
-        self.last_changed = last_changed or self.last_updated
-        self.context = context or Context()
+        last_updated = last_updated or dt_util.utcnow()
+
+        _setattr(self, 'entity_id', entity_id.lower())
+        _setattr(self, 'state', state)
+        _setattr(self, 'attributes', _wrap_attributes(attributes))
+        _setattr(self, 'last_updated', last_updated)
+        _setattr(self, 'last_changed', last_changed or last_updated)
+        _setattr(self, 'context', context or Context())
+        _setattr(self, '_as_dict', None)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        """Prevent changes to the state."""
+        raise AttributeError("State is immutable, use evolve")
+
+    def __delattr__(self, name: str) -> None:
+        """Prevent changes to the state."""
+        raise AttributeError("State is immutable, use evolve")
 
     @property
     def domain(self) -> str:
@@ -710,20 +896,59 @@ class State:
             self.attributes.get(ATTR_FRIENDLY_NAME) or
             self.object_id.replace('_', ' '))
 
+    def evolve(self, **changes: Any) -> 'State':
+        """Return a copy of the state with the given fields changed.
+
+        Only state, attributes, last_changed, last_updated and context can be
+        changed. The entity id is not validated again.
+
+        Async friendly.
+        """
+        unknown = changes.keys() - _STATE_CHANGEABLE
+        if unknown:
+            raise TypeError("Unknown state fields: {}".format(
+                ', '.join(sorted(unknown))))
+
+        if 'state' in changes:
+            state = changes['state'] = str(changes['state'])
+
+            if not valid_state(state):
+                raise InvalidStateError((
+                    "Invalid state encountered for entity id: {}. "
+                    "State max length is 255 characters.").format(
+                        self.entity_id))
+
+        if 'attributes' in changes:
+            changes['attributes'] = _wrap_attributes(changes['attributes'])
+
+        new = State.__new__(State)  # type: State
+        _setattr(new, 'entity_id', self.entity_id)
+        for name in _STATE_CHANGEABLE:
+            _setattr(new, name, changes.get(name, getattr(self, name)))
+        _setattr(new, '_as_dict', None)
+        return new
+
     def as_dict(self) -> Dict:
         """Return a dict representation of the State.
 
         Async friendly.
 
-        To be used for JSON serialization.
+        To be used for JSON serialization. The dict is created once and
+        shared, it must not be modified.
         Ensures: state == State.from_dict(state.as_dict())
         """
-        return {'entity_id': self.entity_id,
-                'state': self.state,
-                'attributes': dict(self.attributes),
-                'last_changed': self.last_changed,
-                'last_updated': self.last_updated,
-                'context': self.context.as_dict()}
+        as_dict = self._as_dict
+
+        if as_dict is None:
+            as_dict = {'entity_id': self.entity_id,
+                       'state': self.state,
+                       'attributes': dict(self.attributes),
+                       'last_changed': self.last_changed,
+                       'last_updated': self.last_updated,
+                       'context': self.context.as_dict()}
+            _setattr(self, '_as_dict', as_dict)
+
+        return as_dict
 
     @classmethod
     def from_dict(cls, json_dict: Dict) -> Any:
@@ -916,8 +1141,17 @@ class StateMachine:
         if context is None:
             context = Context()
 
-        state = State(entity_id, new_state, attributes, last_changed, None,
-                      context)
+        if old_state is None:
+            state = State(entity_id, new_state, attributes, None, None,
+                          context)
+        else:
+            # The entity id was validated when the old state was created
+            now = dt_util.utcnow()
+            state = old_state.evolve(
+                state=new_state,
+                attributes=old_state.attributes if same_attr else attributes,
+                last_changed=last_changed or now, last_updated=now,
+                context=context)
         self._states[entity_id] = state
         self._bus.async_fire(EVENT_STATE_CHANGED, {
             'entity_id': entity_id,
@@ -1154,6 +1388,23 @@ class ServiceRegistry:
     async def _execute_service(self, handler: Service,
                                service_call: ServiceCall) -> None:
         """Execute a service."""
+        profiler = self._hass.profiler
+        if profiler is None or not profiler.sample():
+            await self._run_service_handler(handler, service_call)
+            return
+
+        start = perf_counter()
+        try:
+            await self._run_service_handler(handler, service_call)
+        finally:
+            profiler.record(
+                CATEGORY_SERVICE, '{}.{}'.format(
+                    service_call.domain, service_call.service),
+                perf_counter() - start)
+
+    async def _run_service_handler(self, handler: Service,
+                                   service_call: ServiceCall) -> None:
+        """Run the handler of a service."""
         if handler.is_callback:
             handler.func(service_call)
         elif handler.is_coroutinefunction:
@@ -1252,6 +1503,58 @@ class Config:
         }
 
 
+def _job_name(target: Callable[..., Any]) -> str:
+    """Return the qualified name of the function of a job.
+
+    Listeners of the event helpers are named after the action they run.
+    """
+    while True:
+        if isinstance(target, functools.partial):
+            target = target.func
+        elif hasattr(target, '__wrapped__'):
+            target = getattr(target, '__wrapped__')
+        else:
+            break
+
+    return '{}.{}'.format(
+        getattr(target, '__module__', None),
+        getattr(target, '__qualname__', repr(target)))
+
+
+def _profiled_job(profiler: Profiler, category: str,
+                  target: Callable[..., Any]) -> Callable[..., Any]:
+    """Wrap a job to record its duration.
+
+    The wrapper is the same kind of job as target. The duration of
+    coroutines includes the time they are suspended.
+    """
+    name = _job_name(target)
+
+    if asyncio.iscoroutinefunction(target):
+        async def profiled_coroutine(*args: Any) -> Any:
+            """Run the coroutine and record its duration."""
+            start = perf_counter()
+            try:
+                return await target(*args)
+            finally:
+                profiler.record(category, name, perf_counter() - start)
+
+        return profiled_coroutine
+
+    def profiled_job(*args: Any) -> Any:
+        """Run the job and record its duration."""
+        start = perf_counter()
+        try:
+            return target(*args)
+        finally:
+            profiler.record(category, name, perf_counter() - start)
+
+    if is_callback(target):
+        return callback(profiled_job)
+
+    return profiled_job
+
+
 def _async_create_timer(hass: HomeAssistant) -> None:
     """Create a timer that will start on HOMEASSISTANT_START."""
     handle = None
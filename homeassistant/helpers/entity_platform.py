@@ -1,11 +1,13 @@
 """Class to manage the entities for a single platform."""
 import asyncio
+from time import perf_counter
 
 from homeassistant.const import DEVICE_DEFAULT_NAME
 from homeassistant.core import callback, valid_entity_id, split_entity_id
 from homeassistant.exceptions import HomeAssistantError, PlatformNotReady
 from homeassistant.util.async_ import (
     run_callback_threadsafe, run_coroutine_threadsafe)
+from homeassistant.util.profiling import CATEGORY_PLATFORM_UPDATE
 
 from .event import async_track_time_interval, async_call_later
 
@@ -398,6 +400,11 @@ class EntityPlatform:
                 self.scan_interval)
             return
 
+        profiler = self.hass.profiler
+        start = None
+        if profiler is not None and profiler.sample():
+            start = perf_counter()
+
         async with self._process_updates:
             tasks = []
             for entity in self.entities.values():
@@ -407,3 +414,9 @@ class EntityPlatform:
 
             if tasks:
                 await asyncio.wait(tasks, loop=self.hass.loop)
+
+        if start is not None:
+            profiler.record(
+                CATEGORY_PLATFORM_UPDATE, '{}.{}'.format(
+                    self.domain, self.platform_name),
+                perf_counter() - start)
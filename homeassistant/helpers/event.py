@@ -1,16 +1,22 @@
 """Helpers for listening to events."""
 from datetime import timedelta
 import functools as ft
+import heapq
+import logging
 
 from homeassistant.loader import bind_hass
 from homeassistant.helpers.sun import get_astral_event_next
-from ..core import HomeAssistant, callback
+from ..core import Event, HomeAssistant, callback, split_entity_id
 from ..const import (
     ATTR_NOW, EVENT_STATE_CHANGED, EVENT_TIME_CHANGED, MATCH_ALL,
     SUN_EVENT_SUNRISE, SUN_EVENT_SUNSET)
 from ..util import dt as dt_util
 from ..util.async_ import run_callback_threadsafe
 
+_LOGGER = logging.getLogger(__name__)
+
+DATA_TIME_SCHEDULER = 'event_time_scheduler'
+
 # PyLint does not like the use of threaded_listener_factory
 # pylint: disable=invalid-name
 
@@ -37,6 +43,14 @@ def threaded_listener_factory(async_factory):
     return factory
 
 
+def _wraps_action(action):
+    """Name a listener after the action it runs, for the profiler.
+
+    Only the names are copied, the listener keeps its own callback marker.
+    """
+    return ft.wraps(action, updated=())
+
+
 @callback
 @bind_hass
 def async_track_state_change(hass, entity_ids, action, from_state=None,
@@ -62,12 +76,9 @@ def async_track_state_change(hass, entity_ids, action, from_state=None,
         entity_ids = tuple(entity_id.lower() for entity_id in entity_ids)
 
     @callback
+    @_wraps_action(action)
     def state_change_listener(event):
         """Handle specific state changes."""
-        if entity_ids != MATCH_ALL and \
-           event.data.get('entity_id') not in entity_ids:
-            return
-
         old_state = event.data.get('old_state')
         if old_state is not None:
             old_state = old_state.state
@@ -81,7 +92,13 @@ def async_track_state_change(hass, entity_ids, action, from_state=None,
                                event.data.get('old_state'),
                                event.data.get('new_state'))
 
-    return hass.bus.async_listen(EVENT_STATE_CHANGED, state_change_listener)
+    if entity_ids == MATCH_ALL:
+        return hass.bus.async_listen(
+            EVENT_STATE_CHANGED, state_change_listener)
+
+    # The bus only dispatches state changes of the tracked entities to us
+    return hass.bus.async_listen_entity_state_changed(
+        entity_ids, state_change_listener)
 
 
 track_state_change = threaded_listener_factory(async_track_state_change)
@@ -91,32 +108,61 @@ track_state_change = threaded_listener_factory(async_track_state_change)
 @bind_hass
 def async_track_template(hass, template, action, variables=None):
     """Add a listener that track state changes with template condition."""
-    from . import condition
-
     # Local variable to keep track of if the action has already been triggered
     already_triggered = False
 
     @callback
-    def template_condition_listener(entity_id, from_s, to_s):
+    @_wraps_action(action)
+    def template_condition_listener(event, info):
         """Check if condition is correct and run action."""
         nonlocal already_triggered
-        template_result = condition.async_template(hass, template, variables)
+
+        if info.exception is not None:
+            _LOGGER.error(
+                "Error during template condition: %s", info.exception)
+            template_result = False
+        else:
+            template_result = info.result.lower() == 'true'
 
         # Check to see if template returns true
         if template_result and not already_triggered:
             already_triggered = True
-            hass.async_run_job(action, entity_id, from_s, to_s)
+            hass.async_run_job(action, event.data.get('entity_id'),
+                               event.data.get('old_state'),
+                               event.data.get('new_state'))
         elif not template_result:
             already_triggered = False
 
-    return async_track_state_change(
-        hass, template.extract_entities(variables),
-        template_condition_listener)
+    return async_track_template_result(
+        hass, template, template_condition_listener, variables)
 
 
 track_template = threaded_listener_factory(async_track_template)
 
 
+@callback
+@bind_hass
+def async_track_template_result(hass, template, action, variables=None):
+    """Add a listener that renders a template when a state it read changed.
+
+    The template is rendered once to find the states it reads. After each
+    render the listeners follow the entities and domains read by that render.
+    Templates that depend on the time are also rendered every minute.
+    Templates that read no states, iterate all states or fail to render are
+    rendered on every state change.
+
+    action is called with the state changed event, or a time changed event
+    for the renders every minute, and the RenderInfo.
+    """
+    tracker = _TemplateTracker(hass, template, action, variables)
+    tracker.async_update_listeners(template.async_render_to_info(variables))
+    return tracker.async_remove
+
+
+track_template_result = threaded_listener_factory(
+    async_track_template_result)
+
+
 @callback
 @bind_hass
 def async_track_same_state(hass, period, action, async_check_same_func,
@@ -150,6 +196,7 @@ def async_track_same_state(hass, period, action, async_check_same_func,
         hass.async_run_job(action)
 
     @callback
+    @_wraps_action(action)
     def state_for_cancel_listener(entity, from_state, to_state):
         """Fire on changes and cancel for listener if changed."""
         if not async_check_same_func(entity, from_state, to_state):
@@ -192,28 +239,10 @@ def async_track_point_in_utc_time(hass, action, point_in_time):
     # Ensure point_in_time is UTC
     point_in_time = dt_util.as_utc(point_in_time)
 
-    @callback
-    def point_in_time_listener(event):
-        """Listen for matching time_changed events."""
-        now = event.data[ATTR_NOW]
-
-        if now < point_in_time or hasattr(point_in_time_listener, 'run'):
-            return
+    job = _ScheduledJob(action, point_in_time)
+    _async_get_time_scheduler(hass).async_schedule(job)
 
-        # Set variable so that we will never run twice.
-        # Because the event bus might have to wait till a thread comes
-        # available to execute this listener it might occur that the
-        # listener gets lined up twice to be executed. This will make
-        # sure the second time it does nothing.
-        point_in_time_listener.run = True
-        async_unsub()
-
-        hass.async_run_job(action, now)
-
-    async_unsub = hass.bus.async_listen(EVENT_TIME_CHANGED,
-                                        point_in_time_listener)
-
-    return async_unsub
+    return ft.partial(_async_get_time_scheduler(hass).async_cancel, job)
 
 
 track_point_in_utc_time = threaded_listener_factory(
@@ -331,6 +360,7 @@ def async_track_utc_time_change(hass, action,
     # if no pattern given
     if all(val is None for val in (hour, minute, second)):
         @callback
+        @_wraps_action(action)
         def time_change_listener(event):
             """Fire every time event that comes in."""
             hass.async_run_job(action, event.data[ATTR_NOW])
@@ -341,43 +371,28 @@ def async_track_utc_time_change(hass, action,
     matching_minutes = dt_util.parse_time_expression(minute, 0, 59)
     matching_hours = dt_util.parse_time_expression(hour, 0, 23)
 
-    next_time = None
-
     def calculate_next(now):
-        """Calculate and set the next time the trigger should fire."""
-        nonlocal next_time
-
+        """Calculate the next time the trigger should fire."""
         localized_now = dt_util.as_local(now) if local else now
-        next_time = dt_util.find_next_time_expression_time(
+        return dt_util.find_next_time_expression_time(
             localized_now, matching_seconds, matching_minutes,
             matching_hours)
 
-    # Make sure rolling back the clock doesn't prevent the timer from
-    # triggering.
-    last_now = None
-
     @callback
-    def pattern_time_change_listener(event):
-        """Listen for matching time_changed events."""
-        nonlocal next_time, last_now
-
-        now = event.data[ATTR_NOW]
+    def pattern_time_change_listener(now):
+        """Fire the action and schedule the next matching time."""
+        job.when = calculate_next(now + timedelta(seconds=1))
+        scheduler.async_schedule(job)
+        hass.async_run_job(action, dt_util.as_local(now) if local else now)
 
-        if last_now is None or now < last_now:
-            # Time rolled back or next time not yet calculated
-            calculate_next(now)
+    # The first fire time is calculated from the first time changed event
+    # and recalculated by the scheduler when the system time jumps
+    # backwards.
+    job = _ScheduledJob(pattern_time_change_listener, None, calculate_next)
+    scheduler = _async_get_time_scheduler(hass)
+    scheduler.async_schedule(job)
 
-        last_now = now
-
-        if next_time <= now:
-            hass.async_run_job(action, dt_util.as_local(now) if local else now)
-            calculate_next(now + timedelta(seconds=1))
-
-    # We can't use async_track_point_in_utc_time here because it would
-    # break in the case that the system time abruptly jumps backwards.
-    # Our custom last_now logic takes care of resolving that scenario.
-    return hass.bus.async_listen(EVENT_TIME_CHANGED,
-                                 pattern_time_change_listener)
+    return ft.partial(scheduler.async_cancel, job)
 
 
 track_utc_time_change = threaded_listener_factory(async_track_utc_time_change)
@@ -394,6 +409,228 @@ def async_track_time_change(hass, action, hour=None, minute=None, second=None):
 track_time_change = threaded_listener_factory(async_track_time_change)
 
 
+class _ScheduledJob:
+    """A job that runs once the time passes a point in time."""
+
+    __slots__ = ('action', 'when', 'calculate_when', 'cancelled')
+
+    def __init__(self, action, when, calculate_when=None):
+        """Initialize the scheduled job.
+
+        calculate_when is called with the current time to (re)calculate when
+        the job is due if when is not yet known or time rolled back.
+        """
+        self.action = action
+        self.when = when
+        self.calculate_when = calculate_when
+        self.cancelled = False
+
+    def __lt__(self, other):
+        """Order jobs by the time they are due."""
+        return self.when < other.when
+
+
+class _TimeScheduler:
+    """Run scheduled jobs from a single time changed listener.
+
+    Jobs are kept in a heap ordered by the time they are due, so a time
+    changed event only costs the jobs that are actually due instead of a
+    callback per tracked point in time or time pattern.
+    """
+
+    def __init__(self, hass):
+        """Initialize the scheduler."""
+        self.hass = hass
+        self._jobs = []
+        # Jobs waiting for the next time changed event to calculate when
+        self._unscheduled = []
+        self._cancelled = 0
+        self._last_now = None
+        hass.bus.async_listen(EVENT_TIME_CHANGED, self._async_time_changed)
+
+    @callback
+    def async_schedule(self, job):
+        """Schedule a job."""
+        job.cancelled = False
+        if job.when is None:
+            self._unscheduled.append(job)
+        else:
+            heapq.heappush(self._jobs, job)
+
+    @callback
+    def async_cancel(self, job):
+        """Cancel a scheduled job."""
+        if job.cancelled:
+            return
+
+        job.cancelled = True
+
+        if job in self._unscheduled:
+            self._unscheduled.remove(job)
+            return
+
+        # Cancelled jobs are dropped from the heap lazily
+        self._cancelled += 1
+        if self._cancelled > len(self._jobs) // 2:
+            self._jobs = [queued for queued in self._jobs
+                          if not queued.cancelled]
+            heapq.heapify(self._jobs)
+            self._cancelled = 0
+
+    @callback
+    def _async_time_changed(self, event):
+        """Run all jobs that are due."""
+        now = event.data[ATTR_NOW]
+
+        if self._last_now is not None and now < self._last_now:
+            # Time rolled back, recalculate when time patterns are due
+            for job in self._jobs:
+                if job.calculate_when is not None and not job.cancelled:
+                    self._async_calculate_when(job, now)
+            heapq.heapify(self._jobs)
+
+        self._last_now = now
+
+        unscheduled = self._unscheduled
+        self._unscheduled = []
+        for job in unscheduled:
+            if self._async_calculate_when(job, now):
+                heapq.heappush(self._jobs, job)
+            else:
+                self._unscheduled.append(job)
+
+        # Collect due jobs first so jobs scheduled by an action for the
+        # current time only run on the next time changed event.
+        due = []
+        while self._jobs and self._jobs[0].when <= now:
+            job = heapq.heappop(self._jobs)
+            if job.cancelled:
+                self._cancelled -= 1
+            else:
+                due.append(job)
+
+        for job in due:
+            # An earlier job might have cancelled this one
+            if job.cancelled:
+                continue
+
+            job.cancelled = True
+            try:
+                self.hass.async_run_job(job.action, now)
+            except Exception:  # pylint: disable=broad-except
+                _LOGGER.exception("Error running scheduled job %s",
+                                  job.action)
+
+    @staticmethod
+    def _async_calculate_when(job, now):
+        """Calculate when a job is due, return if successful."""
+        try:
+            job.when = job.calculate_when(now)
+        except Exception:  # pylint: disable=broad-except
+            _LOGGER.exception("Error calculating next time for %s",
+                              job.action)
+            return False
+        return True
+
+
+@callback
+def _async_get_time_scheduler(hass):
+    """Return the time scheduler of a hass instance."""
+    scheduler = hass.data.get(DATA_TIME_SCHEDULER)
+
+    if scheduler is None:
+        scheduler = hass.data[DATA_TIME_SCHEDULER] = _TimeScheduler(hass)
+
+    return scheduler
+
+
+class _TemplateTracker:
+    """Keep state changed listeners for the states a template reads."""
+
+    def __init__(self, hass, template, action, variables):
+        """Initialize the template tracker."""
+        self._hass = hass
+        self._template = template
+        self._action = action
+        self._variables = variables
+        self._entities = frozenset()
+        self._domains = frozenset()
+        self._has_time = False
+        self._listeners = []
+
+        @callback
+        @_wraps_action(action)
+        def state_changed_listener(event):
+            """Render the template and run the action."""
+            self._async_state_changed(event)
+
+        self._state_changed_listener = state_changed_listener
+
+    @callback
+    def async_update_listeners(self, info):
+        """Listen to the state changes that can change the render."""
+        entities = frozenset(info.entities)
+        domains = frozenset(info.domains)
+        has_time = info.has_time
+
+        if (info.all_states is not None or info.exception is not None or
+                not (entities or domains or has_time or
+                     self._template.is_static)):
+            entities, domains = MATCH_ALL, frozenset()
+        else:
+            # The domain listener also gets the changes of these entities
+            entities = frozenset(
+                entity_id for entity_id in entities
+                if split_entity_id(entity_id)[0] not in domains)
+
+        if (self._listeners and entities == self._entities and
+                domains == self._domains and has_time == self._has_time):
+            return
+
+        self.async_remove()
+        self._entities = entities
+        self._domains = domains
+        self._has_time = has_time
+
+        if has_time:
+            self._listeners.append(async_track_utc_time_change(
+                self._hass, self._async_time_changed, second=0))
+
+        if entities == MATCH_ALL:
+            self._listeners.append(self._hass.bus.async_listen(
+                EVENT_STATE_CHANGED, self._state_changed_listener))
+            return
+
+        if entities:
+            self._listeners.append(
+                self._hass.bus.async_listen_entity_state_changed(
+                    entities, self._state_changed_listener))
+
+        if domains:
+            self._listeners.append(
+                self._hass.bus.async_listen_domain_state_changed(
+                    domains, self._state_changed_listener))
+
+    @callback
+    def async_remove(self):
+        """Remove the listeners."""
+        while self._listeners:
+            self._listeners.pop()()
+
+    @callback
+    def _async_time_changed(self, now):
+        """Render a template that depends on the time."""
+        self._async_state_changed(
+            Event(EVENT_TIME_CHANGED, {ATTR_NOW: now}))
+
+    @callback
+    def _async_state_changed(self, event):
+        """Render the template and run the action."""
+        info = self._template.async_render_to_info(self._variables)
+        self.async_update_listeners(info)
+        self._hass.async_run_job(self._action, event, info)
+
+
 def _process_state_match(parameter):
     """Convert parameter to function that matches input against parameter."""
     if parameter is None or parameter == MATCH_ALL:
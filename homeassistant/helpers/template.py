@@ -1,11 +1,13 @@
 """Template helper methods for rendering strings with Home Assistant data."""
 from datetime import datetime
+from functools import lru_cache
 import json
 import logging
 import math
 import random
 import base64
 import re
+import threading
 
 import jinja2
 from jinja2 import contextfilter
@@ -36,6 +38,14 @@ _RE_GET_ENTITIES = re.compile(
 )
 _RE_JINJA_DELIMITERS = re.compile(r"\{%|\{\{")
 
+DATA_TEMPLATE_GLOBALS = 'template_globals'
+
+# Number of compiled template sources kept in the process wide cache
+COMPILED_CACHE_SIZE = 1024
+
+# Holds the RenderInfo of the render in progress per thread
+_RENDER_INFO = threading.local()
+
 
 @bind_hass
 def attach(hass, obj):
@@ -89,6 +99,98 @@ def extract_entities(template, variables=None):
     return MATCH_ALL
 
 
+@lru_cache(maxsize=COMPILED_CACHE_SIZE)
+def _compile(source):
+    """Compile a template source, shared by all templates with that source."""
+    return ENV.compile(source)
+
+
+def _current_render_info():
+    """Return the RenderInfo of the render in progress, if any."""
+    return getattr(_RENDER_INFO, 'info', None)
+
+
+def _get_state(hass, entity_id):
+    """Get a state and record it on the render in progress."""
+    state = hass.states.get(entity_id)
+    info = _current_render_info()
+    if info is not None:
+        info.entities[entity_id.lower()] = state
+    return state
+
+
+def _collect_state(state):
+    """Record a state on the render in progress."""
+    info = _current_render_info()
+    if info is not None:
+        info.entities[state.entity_id] = state
+
+
+def _collect_domain(hass, domain):
+    """Record the number of states of a domain on the render in progress."""
+    info = _current_render_info()
+    if info is not None:
+        info.domains[domain] = len(hass.states.async_entity_ids(domain))
+
+
+def _collect_all(hass):
+    """Record the number of states on the render in progress."""
+    info = _current_render_info()
+    if info is not None:
+        info.all_states = len(hass.states.async_entity_ids())
+
+
+def _time_dependent(func):
+    """Mark the render in progress as time dependent when func is called."""
+    def wrapper(*args, **kwargs):
+        """Call func."""
+        info = _current_render_info()
+        if info is not None:
+            info.has_time = True
+        return func(*args, **kwargs)
+
+    return wrapper
+
+
+class RenderInfo:
+    """Hold the result of a render and the states it read."""
+
+    def __init__(self, template, variables):
+        """Initialize the render info."""
+        self.template = template
+        self.variables = variables
+        self.result = None
+        self.exception = None
+        # Entity ids mapped to the state object read during the render
+        self.entities = {}
+        # Domains mapped to the number of states when they were iterated
+        self.domains = {}
+        # Number of states when all states were iterated
+        self.all_states = None
+        self.has_time = False
+
+    def is_current(self, variables):
+        """Return if the result is still valid for variables.
+
+        This method must be run in the event loop.
+        """
+        if self.has_time or self.variables != variables:
+            return False
+
+        states = self.template.hass.states
+
+        for entity_id, state in self.entities.items():
+            if states.get(entity_id) is not state:
+                return False
+
+        for domain, count in self.domains.items():
+            if len(states.async_entity_ids(domain)) != count:
+                return False
+
+        return (self.all_states is None or
+                len(states.async_entity_ids()) == self.all_states)
+
+
 class Template:
     """Class to hold a template and manage caching and rendering."""
 
@@ -100,6 +202,7 @@ class Template:
         self.template = template
         self._compiled_code = None
         self._compiled = None
+        self._render_info = None
         self.hass = hass
 
     def ensure_valid(self):
@@ -108,10 +211,15 @@ class Template:
             return
 
         try:
-            self._compiled_code = ENV.compile(self.template)
+            self._compiled_code = _compile(self.template)
         except jinja2.exceptions.TemplateSyntaxError as err:
             raise TemplateError(err)
 
+    @property
+    def is_static(self):
+        """Return if the template is a plain string without Jinja syntax."""
+        return _RE_JINJA_DELIMITERS.search(self.template) is None
+
     def extract_entities(self, variables=None):
         """Extract all entities for state_changed listener."""
         return extract_entities(self.template, variables)
@@ -141,6 +249,49 @@ class Template:
         except jinja2.TemplateError as err:
             raise TemplateError(err)
 
+    def async_render_to_info(self, variables: TemplateVarsType = None,
+                             **kwargs) -> RenderInfo:
+        """Render given template and record the states it reads.
+
+        The previous RenderInfo is returned without rendering as long as
+        the variables are equal and none of the states it read changed.
+
+        This method must be run in the event loop.
+        """
+        if variables is not None:
+            kwargs.update(variables)
+
+        info = self._render_info
+        if info is not None and info.is_current(kwargs):
+            return info
+
+        info = RenderInfo(self, kwargs)
+        previous = _current_render_info()
+        _RENDER_INFO.info = info
+
+        try:
+            info.result = self.async_render(kwargs)
+        except TemplateError as ex:
+            info.exception = ex
+        finally:
+            _RENDER_INFO.info = previous
+
+        self._render_info = info
+        return info
+
+    def async_render_cached(self, variables: TemplateVarsType = None,
+                            **kwargs) -> str:
+        """Render given template, reusing the result if possible.
+
+        This method must be run in the event loop.
+        """
+        info = self.async_render_to_info(variables, **kwargs)
+
+        if info.exception is not None:
+            raise info.exception
+
+        return info.result
+
     def render_with_possible_json_value(self, value, error_value=_SENTINEL):
         """Render template with value exposed.
 
@@ -185,19 +336,22 @@ class Template:
 
         assert self.hass is not None, 'hass variable not set on template'
 
-        template_methods = TemplateMethods(self.hass)
+        hass_globals = self.hass.data.get(DATA_TEMPLATE_GLOBALS)
+
+        if hass_globals is None:
+            template_methods = TemplateMethods(self.hass)
 
-        global_vars = ENV.make_globals({
-            'closest': template_methods.closest,
-            'distance': template_methods.distance,
-            'is_state': self.hass.states.is_state,
-            'is_state_attr': template_methods.is_state_attr,
-            'state_attr': template_methods.state_attr,
-            'states': AllStates(self.hass),
-        })
+            hass_globals = self.hass.data[DATA_TEMPLATE_GLOBALS] = {
+                'closest': template_methods.closest,
+                'distance': template_methods.distance,
+                'is_state': template_methods.is_state,
+                'is_state_attr': template_methods.is_state_attr,
+                'state_attr': template_methods.state_attr,
+                'states': AllStates(self.hass),
+            }
 
         self._compiled = jinja2.Template.from_code(
-            ENV, self._compiled_code, global_vars, None)
+            ENV, self._compiled_code, ENV.make_globals(hass_globals), None)
 
         return self._compiled
 
@@ -221,18 +375,20 @@ class AllStates:
 
     def __iter__(self):
         """Return all states."""
+        _collect_all(self._hass)
         return iter(
-            _wrap_state(state) for state in
+            _wrap_state(state, True) for state in
             sorted(self._hass.states.async_all(),
                    key=lambda state: state.entity_id))
 
     def __len__(self):
         """Return number of states."""
+        _collect_all(self._hass)
         return len(self._hass.states.async_entity_ids())
 
     def __call__(self, entity_id):
         """Return the states."""
-        state = self._hass.states.get(entity_id)
+        state = _get_state(self._hass, entity_id)
         return STATE_UNKNOWN if state is None else state.state
 
 
@@ -247,28 +403,33 @@ class DomainStates:
     def __getattr__(self, name):
         """Return the states."""
         return _wrap_state(
-            self._hass.states.get('{}.{}'.format(self._domain, name)))
+            _get_state(self._hass, '{}.{}'.format(self._domain, name)))
 
     def __iter__(self):
         """Return the iteration over all the states."""
+        _collect_domain(self._hass, self._domain)
         return iter(sorted(
-            (_wrap_state(state) for state in self._hass.states.async_all()
+            (_wrap_state(state, True) for state
+             in self._hass.states.async_all()
              if state.domain == self._domain),
             key=lambda state: state.entity_id))
 
     def __len__(self):
         """Return number of states."""
+        _collect_domain(self._hass, self._domain)
         return len(self._hass.states.async_entity_ids(self._domain))
 
 
 class TemplateState(State):
     """Class to represent a state object in a template."""
 
+    __slots__ = ['_state']
+
     # Inheritance is done so functions that check against State keep working
     # pylint: disable=super-init-not-called
     def __init__(self, state):
         """Initialize template state."""
-        self._state = state
+        object.__setattr__(self, '_state', state)
 
     @property
     def state_with_unit(self):
@@ -291,9 +452,13 @@ class TemplateState(State):
         return '<template ' + rep[1:]
 
 
-def _wrap_state(state):
-    """Wrap a state."""
-    return None if state is None else TemplateState(state)
+def _wrap_state(state, collect=False):
+    """Wrap a state, optionally recording it on the render in progress."""
+    if state is None:
+        return None
+    if collect:
+        _collect_state(state)
+    return TemplateState(state)
 
 
 class TemplateMethods:
@@ -361,7 +526,8 @@ class TemplateMethods:
 
             group = self._hass.components.group
 
-            states = [self._hass.states.get(entity_id) for entity_id
+            _get_state(self._hass, gr_entity_id)
+            states = [_get_state(self._hass, entity_id) for entity_id
                       in group.expand_entity_ids([gr_entity_id])]
 
         return _wrap_state(loc_helper.closest(latitude, longitude, states))
@@ -421,6 +587,11 @@ class TemplateMethods:
         return self._hass.config.units.length(
             loc_util.distance(*locations[0] + locations[1]), 'm')
 
+    def is_state(self, entity_id, state):
+        """Test if a state is a specific value."""
+        state_obj = _get_state(self._hass, entity_id)
+        return state_obj is not None and state_obj.state == state
+
     def is_state_attr(self, entity_id, name, value):
         """Test if a state is a specific attribute."""
         state_attr = self.state_attr(entity_id, name)
@@ -428,7 +599,7 @@ class TemplateMethods:
 
     def state_attr(self, entity_id, name):
         """Get a specific attribute from a state."""
-        state_obj = self._hass.states.get(entity_id)
+        state_obj = _get_state(self._hass, entity_id)
         if state_obj is not None:
             return state_obj.attributes.get(name)
         return None
@@ -438,7 +609,7 @@ class TemplateMethods:
         if isinstance(entity_id_or_state, State):
             return entity_id_or_state
         if isinstance(entity_id_or_state, str):
-            return self._hass.states.get(entity_id_or_state)
+            return _get_state(self._hass, entity_id_or_state)
         return None
 
 
@@ -633,6 +804,9 @@ def random_every_time(context, values):
     Unlike Jinja's random filter,
     this is context-dependent to avoid caching the chosen value.
     """
+    info = _current_render_info()
+    if info is not None:
+        info.has_time = True
     return random.choice(values)
 
 
@@ -683,8 +857,8 @@ ENV.globals['pi'] = math.pi
 ENV.globals['tau'] = math.pi * 2
 ENV.globals['e'] = math.e
 ENV.globals['float'] = forgiving_float
-ENV.globals['now'] = dt_util.now
-ENV.globals['utcnow'] = dt_util.utcnow
+ENV.globals['now'] = _time_dependent(dt_util.now)
+ENV.globals['utcnow'] = _time_dependent(dt_util.utcnow)
 ENV.globals['as_timestamp'] = forgiving_as_timestamp
-ENV.globals['relative_time'] = dt_util.get_age
+ENV.globals['relative_time'] = _time_dependent(dt_util.get_age)
 ENV.globals['strptime'] = strptime
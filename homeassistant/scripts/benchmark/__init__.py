@@ -1,73 +1,199 @@
 """Script to run benchmarks."""
+# Benchmarks share a signature, not all use every argument
+# pylint: disable=unused-argument
 import argparse
 import asyncio
-from contextlib import suppress
-from datetime import datetime
+from collections import namedtuple
+from datetime import datetime, timedelta
+import json
 import logging
+import platform
+import statistics
+from tempfile import TemporaryDirectory
 from timeit import default_timer as timer
 
 from homeassistant import core
 from homeassistant.const import (
-    ATTR_NOW, EVENT_STATE_CHANGED, EVENT_TIME_CHANGED)
+    __version__, ATTR_NOW, EVENT_STATE_CHANGED, EVENT_TIME_CHANGED,
+    MATCH_ALL)
 from homeassistant.util import dt as dt_util
 
+DEFAULT_REPEAT = 3
+
+Benchmark = namedtuple('Benchmark', ['func', 'size', 'entities'])
+
 BENCHMARKS = {}
 
 
 def run(args):
-    """Handle ensure configuration commandline script."""
+    """Handle benchmark commandline script."""
     # Disable logging
     logging.getLogger('homeassistant.core').setLevel(logging.CRITICAL)
 
     parser = argparse.ArgumentParser(
-        description=("Run a Home Assistant benchmark."))
-    parser.add_argument('name', choices=BENCHMARKS)
-    parser.add_argument('--script', choices=['benchmark'])
+        description=("Run Home Assistant benchmarks."))
+    parser.add_argument(
+        'names', nargs='*', metavar='name',
+        help="Benchmarks to run, all if omitted: {}".format(
+            ', '.join(BENCHMARKS)))
+    parser.add_argument(
+        '--size', type=int,
+        help="Number of operations, overrides the default of each benchmark")
+    parser.add_argument(
+        '--entities', type=int,
+        help="Number of entities, listeners or subscriptions the operations "
+             "fan out to, overrides the default of each benchmark")
+    parser.add_argument(
+        '--repeat', type=int, default=DEFAULT_REPEAT,
+        help="Number of runs of each benchmark")
+    parser.add_argument(
+        '--json', metavar='FILE',
+        help="Write the results as JSON to FILE")
+    parser.add_argument(
+        '--compare', metavar='FILE',
+        help="Compare the results to the JSON output of a previous run")
+
+    args = parser.parse_args(args)
+
+    unknown = [name for name in args.names if name not in BENCHMARKS]
+    if unknown:
+        parser.error("unknown benchmarks: {}".format(', '.join(unknown)))
 
-    args = parser.parse_args()
+    print('Using event loop:', asyncio.get_event_loop_policy().__module__)
 
-    bench = BENCHMARKS[args.name]
+    results = {}
+
+    for name in args.names or BENCHMARKS:
+        bench = BENCHMARKS[name]
+        size = args.size or bench.size
+        entities = args.entities or bench.entities
+
+        try:
+            runs = [_run_benchmark(bench, size, entities)
+                    for _ in range(args.repeat)]
+        except ImportError as err:
+            print('Skipping benchmark {}: {}'.format(name, err))
+            continue
+
+        results[name] = summarize(runs, size, entities)
+        print('Benchmark {} done: {}'.format(
+            name, format_result(results[name])))
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as fil:
+            compare(json.load(fil)['benchmarks'], results)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as fil:
+            json.dump({
+                'version': __version__,
+                'python': platform.python_version(),
+                'event_loop': asyncio.get_event_loop_policy().__module__,
+                'date': dt_util.utcnow().isoformat(),
+                'benchmarks': results,
+            }, fil, indent=2)
 
-    print('Using event loop:', asyncio.get_event_loop_policy().__module__)
+    return 0
 
-    with suppress(KeyboardInterrupt):
-        while True:
-            loop = asyncio.new_event_loop()
-            hass = core.HomeAssistant(loop)
-            hass.async_stop_track_tasks()
-            runtime = loop.run_until_complete(bench(hass))
-            print('Benchmark {} done in {}s'.format(bench.__name__, runtime))
+
+def _run_benchmark(bench, size, entities):
+    """Run a benchmark on a new instance and return its runtime."""
+    loop = asyncio.new_event_loop()
+    hass = core.HomeAssistant(loop)
+    hass.async_stop_track_tasks()
+    # Behave like a started instance without starting the timer
+    hass.state = core.CoreState.running
+
+    with TemporaryDirectory() as config_dir:
+        hass.config.config_dir = config_dir
+
+        try:
+            return loop.run_until_complete(bench.func(hass, size, entities))
+        finally:
             loop.run_until_complete(hass.async_stop())
             loop.close()
 
-    return 0
 
+def summarize(runs, size, entities):
+    """Return the statistical summary of the runtimes of a benchmark."""
+    median = statistics.median(runs)
+
+    return {
+        'size': size,
+        'entities': entities,
+        'runs': runs,
+        'min': min(runs),
+        'max': max(runs),
+        'mean': statistics.mean(runs),
+        'median': median,
+        'stdev': statistics.stdev(runs) if len(runs) > 1 else 0.0,
+        'ops_per_sec': size / median if median else None,
+    }
 
-def benchmark(func):
-    """Decorate to mark a benchmark."""
-    BENCHMARKS[func.__name__] = func
-    return func
 
+def format_result(result):
+    """Format the summary of a benchmark."""
+    text = 'median {:.4f}s, min {:.4f}s, max {:.4f}s, stdev {:.4f}s'.format(
+        result['median'], result['min'], result['max'], result['stdev'])
 
-@benchmark
-async def async_million_events(hass):
-    """Run a million events."""
+    if result['ops_per_sec'] is not None:
+        text += ', {:.0f} ops/s'.format(result['ops_per_sec'])
+
+    return text
+
+
+def compare(previous, results):
+    """Print the change of the median runtimes to previous results."""
+    for name, result in results.items():
+        old = previous.get(name)
+
+        if old is None:
+            print('Compare {}: no previous result'.format(name))
+        elif (old['size'], old['entities']) != \
+                (result['size'], result['entities']):
+            print('Compare {}: sizes differ'.format(name))
+        else:
+            print('Compare {}: {:+.1f}% median runtime'.format(
+                name, (result['median'] - old['median']) /
+                old['median'] * 100))
+
+
+def benchmark(size, entities=1):
+    """Decorate to mark a benchmark with its default sizes."""
+    def decorator(func):
+        """Register the benchmark."""
+        BENCHMARKS[func.__name__] = Benchmark(func, size, entities)
+        return func
+
+    return decorator
+
+
+def _async_counter(hass, target):
+    """Return a listener and an event set after target calls."""
     count = 0
-    event_name = 'benchmark_event'
     event = asyncio.Event(loop=hass.loop)
 
     @core.callback
-    def listener(_):
-        """Handle event."""
+    def listener(*args):
+        """Handle call."""
         nonlocal count
         count += 1
 
-        if count == 10**6:
+        if count == target:
             event.set()
 
+    return listener, event
+
+
+@benchmark(size=10**6)
+async def async_million_events(hass, size, entities):
+    """Run a million events."""
+    event_name = 'benchmark_event'
+    listener, event = _async_counter(hass, size)
+
     hass.bus.async_listen(event_name, listener)
 
-    for _ in range(10**6):
+    for _ in range(size):
         hass.bus.async_fire(event_name)
 
     start = timer()
@@ -77,28 +203,19 @@ async def async_million_events(hass):
     return timer() - start
 
 
-@benchmark
-async def async_million_time_changed_helper(hass):
+@benchmark(size=10**6)
+async def async_million_time_changed_helper(hass, size, entities):
     """Run a million events through time changed helper."""
-    count = 0
-    event = asyncio.Event(loop=hass.loop)
+    listener, event = _async_counter(hass, size)
 
-    @core.callback
-    def listener(_):
-        """Handle event."""
-        nonlocal count
-        count += 1
+    hass.helpers.event.async_track_time_change(listener, second=MATCH_ALL)
+    now = datetime(2017, 10, 10, 15, 0, 0, tzinfo=dt_util.UTC)
 
-        if count == 10**6:
-            event.set()
-
-    hass.helpers.event.async_track_time_change(listener, minute=0, second=0)
-    event_data = {
-        ATTR_NOW: datetime(2017, 10, 10, 15, 0, 0, tzinfo=dt_util.UTC)
-    }
-
-    for _ in range(10**6):
-        hass.bus.async_fire(EVENT_TIME_CHANGED, event_data)
+    # The tracker fires once per matching second, advance the time
+    for index in range(size):
+        hass.bus.async_fire(EVENT_TIME_CHANGED, {
+            ATTR_NOW: now + timedelta(seconds=index)
+        })
 
     start = timer()
 
@@ -107,21 +224,11 @@ async def async_million_time_changed_helper(hass):
     return timer() - start
 
 
-@benchmark
-async def async_million_state_changed_helper(hass):
+@benchmark(size=10**6)
+async def async_million_state_changed_helper(hass, size, entities):
     """Run a million events through state changed helper."""
-    count = 0
     entity_id = 'light.kitchen'
-    event = asyncio.Event(loop=hass.loop)
-
-    @core.callback
-    def listener(*args):
-        """Handle event."""
-        nonlocal count
-        count += 1
-
-        if count == 10**6:
-            event.set()
+    listener, event = _async_counter(hass, size)
 
     hass.helpers.event.async_track_state_change(
         entity_id, listener, 'off', 'on')
@@ -131,7 +238,7 @@ async def async_million_state_changed_helper(hass):
         'new_state': core.State(entity_id, 'on'),
     }
 
-    for _ in range(10**6):
+    for _ in range(size):
         hass.bus.async_fire(EVENT_STATE_CHANGED, event_data)
 
     start = timer()
@@ -141,23 +248,216 @@ async def async_million_state_changed_helper(hass):
     return timer() - start
 
 
-@benchmark
-@asyncio.coroutine
-def logbook_filtering_state(hass):
+@benchmark(size=10**5, entities=10)
+async def state_write_listeners(hass, size, entities):
+    """Write states with a number of state changed listeners."""
+    listener, event = _async_counter(hass, size * entities)
+
+    for _ in range(entities):
+        hass.bus.async_listen(EVENT_STATE_CHANGED, listener)
+
+    start = timer()
+
+    for index in range(size):
+        hass.states.async_set(
+            'light.kitchen', 'on' if index % 2 else 'off',
+            {'brightness': index % 256})
+
+    await event.wait()
+
+    return timer() - start
+
+
+@benchmark(size=10**5, entities=1000)
+async def track_state_change_fanout(hass, size, entities):
+    """Write states of entities each tracked by a state change helper."""
+    listener, event = _async_counter(hass, size)
+    entity_ids = ['sensor.bench_{}'.format(index)
+                  for index in range(entities)]
+
+    for entity_id in entity_ids:
+        hass.helpers.event.async_track_state_change(entity_id, listener)
+
+    start = timer()
+
+    for index in range(size):
+        hass.states.async_set(entity_ids[index % entities], index)
+
+    await event.wait()
+
+    return timer() - start
+
+
+@benchmark(size=10**3, entities=100)
+async def template_render(hass, size, entities):
+    """Render a template reading a domain and an entity."""
+    from homeassistant.helpers.template import Template
+
+    for index in range(entities):
+        hass.states.async_set(
+            'sensor.bench_{}'.format(index), 'on' if index % 2 else 'off')
+
+    template = Template(
+        "{{ states.sensor | selectattr('state', 'equalto', 'on') | list "
+        "| count }} {{ states('sensor.bench_0') }}", hass)
+
+    start = timer()
+
+    for _ in range(size):
+        template.async_render()
+
+    return timer() - start
+
+
+@benchmark(size=10**4)
+async def service_call_schema(hass, size, entities):
+    """Call a service with a schema and wait for each call."""
+    import voluptuous as vol
+
+    import homeassistant.helpers.config_validation as cv
+
+    listener, event = _async_counter(hass, size)
+
+    hass.services.async_register(
+        'benchmark', 'set_level', listener, schema=vol.Schema({
+            vol.Required('entity_id'): cv.entity_ids,
+            vol.Optional('level'): vol.All(
+                vol.Coerce(int), vol.Range(min=0, max=255)),
+        }))
+
+    start = timer()
+
+    for index in range(size):
+        await hass.services.async_call('benchmark', 'set_level', {
+            'entity_id': 'light.kitchen',
+            'level': index % 256,
+        }, blocking=True)
+
+    await event.wait()
+
+    return timer() - start
+
+
+@benchmark(size=10**5, entities=100)
+async def mqtt_dispatch(hass, size, entities):
+    """Dispatch MQTT messages to subscriptions with wildcards."""
+    from paho.mqtt.client import MQTTMessage
+
+    from homeassistant.components import mqtt
+
+    listener, event = _async_counter(hass, size * 3)
+    client = mqtt.MQTT(
+        hass, 'localhost', mqtt.DEFAULT_PORT, None, None, None, None, None,
+        None, None, None, mqtt.PROTOCOL_311, None, None, None)
+
+    # The client is not connected, register the subscriptions only
+    # pylint: disable=protected-access
+    topics = ['bench/{}/state'.format(index) for index in range(entities)]
+    for topic in topics + ['bench/+/state', 'bench/#']:
+        client._subscription_trie.add(
+            topic, mqtt.Subscription(topic, listener))
+
+    messages = []
+    for topic in topics:
+        msg = MQTTMessage(topic=topic.encode('utf-8'))
+        msg.payload = b'on'
+        messages.append(msg)
+
+    start = timer()
+
+    for index in range(size):
+        client._mqtt_handle_message(messages[index % entities])
+
+    await event.wait()
+
+    return timer() - start
+
+
+async def _async_setup_recorder(hass):
+    """Set up the recorder with an in-memory database."""
+    from homeassistant.components import recorder
+
+    config = recorder.CONFIG_SCHEMA({recorder.DOMAIN: {
+        recorder.CONF_DB_URL: 'sqlite://',
+        recorder.CONF_COMMIT_INTERVAL: 0,
+        recorder.CONF_PURGE_INTERVAL: 0,
+    }})
+    assert await recorder.async_setup(hass, config)
+
+    return hass.data[recorder.DATA_INSTANCE]
+
+
+async def _async_write_states(hass, instance, size, entities):
+    """Write states of entities and wait until they are recorded."""
+    for index in range(size):
+        hass.states.async_set(
+            'sensor.bench_{}'.format(index % entities), index,
+            {'unit_of_measurement': '°C'})
+
+    await hass.async_block_till_done()
+    await hass.async_add_executor_job(instance.block_till_done)
+
+
+@benchmark(size=10**4, entities=100)
+async def recorder_ingest(hass, size, entities):
+    """Record state changes into an in-memory SQLite database."""
+    instance = await _async_setup_recorder(hass)
+
+    start = timer()
+
+    await _async_write_states(hass, instance, size, entities)
+
+    return timer() - start
+
+
+@benchmark(size=10**4, entities=100)
+async def history_query(hass, size, entities):
+    """Query the significant states of recorded state changes."""
+    from homeassistant.components import history
+
+    instance = await _async_setup_recorder(hass)
+    start_time = dt_util.utcnow() - timedelta(seconds=1)
+    await _async_write_states(hass, instance, size, entities)
+
+    start = timer()
+
+    await hass.async_add_executor_job(
+        history.get_significant_states, hass, start_time)
+
+    return timer() - start
+
+
+@benchmark(size=10**4)
+async def json_serialize_states(hass, size, entities):
+    """Serialize states to JSON."""
+    from homeassistant.helpers.json import JSONEncoder
+
+    states = [
+        core.State('sensor.bench_{}'.format(index), index, {
+            'unit_of_measurement': '°C',
+            'friendly_name': 'Bench {}'.format(index),
+        }) for index in range(size)]
+
+    start = timer()
+
+    json.dumps(states, cls=JSONEncoder)
+
+    return timer() - start
+
+
+@benchmark(size=10**5)
+async def logbook_filtering_state(hass, size, entities):
     """Filter state changes."""
-    return _logbook_filtering(hass, 1, 1)
+    return _logbook_filtering(hass, 1, 1, size)
 
 
-@benchmark
-@asyncio.coroutine
-def logbook_filtering_attributes(hass):
+@benchmark(size=10**5)
+async def logbook_filtering_attributes(hass, size, entities):
     """Filter attribute changes."""
-    return _logbook_filtering(hass, 1, 2)
+    return _logbook_filtering(hass, 1, 2, size)
 
 
-@benchmark
-@asyncio.coroutine
-def _logbook_filtering(hass, last_changed, last_updated):
+def _logbook_filtering(hass, last_changed, last_updated, size):
     from homeassistant.components import logbook
 
     entity_id = 'test.entity'
@@ -183,7 +483,7 @@ def _logbook_filtering(hass, last_changed, last_updated):
     def yield_events(event):
         # pylint: disable=protected-access
         entities_filter = logbook._generate_filter_from_config({})
-        for _ in range(10**5):
+        for _ in range(size):
             if logbook._keep_event(event, entities_filter):
                 yield event
 
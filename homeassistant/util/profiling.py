@@ -0,0 +1,105 @@
+"""Collect execution times of jobs with a low overhead."""
+from bisect import bisect_left
+import random
+from typing import Any, Dict, List, Tuple
+
+CATEGORY_LISTENER = 'listener'
+CATEGORY_SERVICE = 'service'
+CATEGORY_PLATFORM_UPDATE = 'platform_update'
+
+DEFAULT_SAMPLE_RATE = 0.05
+
+# Upper bounds of the histogram buckets in seconds
+HISTOGRAM_BOUNDS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0)
+HISTOGRAM_LABELS = (
+    '1ms', '5ms', '10ms', '50ms', '100ms', '500ms', '1s', 'slower')
+
+
+class LatencyStats:
+    """Collect the number, total, maximum and histogram of durations."""
+
+    __slots__ = ('count', 'total', 'max', 'histogram')
+
+    def __init__(self) -> None:
+        """Initialize the stats."""
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.histogram = [0] * len(HISTOGRAM_LABELS)
+
+    def add(self, duration: float) -> None:
+        """Add a duration in seconds."""
+        self.count += 1
+        self.total += duration
+        if duration > self.max:
+            self.max = duration
+        self.histogram[bisect_left(HISTOGRAM_BOUNDS, duration)] += 1
+
+    @property
+    def mean(self) -> float:
+        """Return the mean duration."""
+        return self.total / self.count if self.count else 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Return the stats as a JSON serializable dictionary."""
+        return {
+            'count': self.count,
+            'total': self.total,
+            'mean': self.mean,
+            'max': self.max,
+            'histogram': dict(zip(HISTOGRAM_LABELS, self.histogram)),
+        }
+
+
+class Profiler:
+    """Collect the execution times of sampled jobs and the loop lag.
+
+    Only a fraction of the jobs, given by sample_rate, is timed so the
+    overhead stays low. Counts are those of the sampled jobs.
+    """
+
+    def __init__(self, sample_rate: float = DEFAULT_SAMPLE_RATE) -> None:
+        """Initialize the profiler."""
+        self.sample_rate = sample_rate
+        self.loop_lag = LatencyStats()
+        self.jobs = {}  # type: Dict[str, Dict[str, LatencyStats]]
+
+    def sample(self) -> bool:
+        """Return if the next job should be timed."""
+        return random.random() < self.sample_rate
+
+    def record(self, category: str, name: str, duration: float) -> None:
+        """Record the duration of a job."""
+        jobs = self.jobs.get(category)
+        if jobs is None:
+            jobs = self.jobs[category] = {}
+
+        stats = jobs.get(name)
+        if stats is None:
+            stats = jobs[name] = LatencyStats()
+
+        stats.add(duration)
+
+    def top(self, category: str,
+            count: int = 5) -> List[Tuple[str, LatencyStats]]:
+        """Return the jobs of a category with the highest total time."""
+        return sorted(
+            self.jobs.get(category, {}).items(),
+            key=lambda item: item[1].total, reverse=True)[:count]
+
+    def reset(self) -> None:
+        """Forget all collected durations."""
+        self.loop_lag = LatencyStats()
+        self.jobs = {}
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Return the collected durations as a dictionary."""
+        return {
+            'sample_rate': self.sample_rate,
+            'loop_lag': self.loop_lag.as_dict(),
+            'jobs': {
+                category: {name: stats.as_dict()
+                           for name, stats in jobs.items()}
+                for category, jobs in self.jobs.items()
+            },
+        }
@@ -475,6 +475,52 @@ async def test_remove_refresh_token(mock_hass):
     )
 
 
+async def test_validated_access_token_cached(mock_hass):
+    """Test verified access tokens are not decoded again."""
+    manager = await auth.auth_manager_from_config(mock_hass, [], [])
+    user = MockUser().add_to_auth_manager(manager)
+    refresh_token = await manager.async_create_refresh_token(user, CLIENT_ID)
+    access_token = manager.async_create_access_token(refresh_token)
+
+    assert await manager.async_validate_access_token(access_token) is \
+        refresh_token
+
+    with patch('jwt.decode', side_effect=jwt.InvalidTokenError):
+        assert await manager.async_validate_access_token(access_token) is \
+            refresh_token
+
+    # Expired tokens are not valid anymore
+    with patch('homeassistant.auth.time.time', return_value=(
+            dt_util.utcnow() + auth_const.ACCESS_TOKEN_EXPIRATION +
+            timedelta(seconds=11)).timestamp()):
+        assert await manager.async_validate_access_token(access_token) is \
+            None
+
+
+async def test_cached_access_token_invalidated(mock_hass):
+    """Test cached access tokens are invalidated."""
+    manager = await auth.auth_manager_from_config(mock_hass, [], [])
+    user = MockUser().add_to_auth_manager(manager)
+    refresh_token = await manager.async_create_refresh_token(user, CLIENT_ID)
+    access_token = manager.async_create_access_token(refresh_token)
+    other_token = await manager.async_create_refresh_token(user, CLIENT_ID)
+    other_access_token = manager.async_create_access_token(other_token)
+
+    assert await manager.async_validate_access_token(access_token) is \
+        refresh_token
+    assert await manager.async_validate_access_token(other_access_token) \
+        is other_token
+
+    await manager.async_remove_refresh_token(refresh_token)
+    assert await manager.async_validate_access_token(access_token) is None
+    assert await manager.async_validate_access_token(other_access_token) \
+        is other_token
+
+    await manager.async_deactivate_user(user)
+    assert await manager.async_validate_access_token(other_access_token) \
+        is None
+
+
 async def test_create_access_token(mock_hass):
     """Test normal refresh_token's jwt_key keep same after used."""
     manager = await auth.auth_manager_from_config(mock_hass, [], [])
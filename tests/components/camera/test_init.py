@@ -250,3 +250,66 @@ async def test_handle_play_stream_service(hass, mock_camera, mock_stream):
         # So long as we request the stream, the rest should be covered
         # by the play_media service tests.
         assert mock_request_stream.called
+
+
+async def test_frame_broker_shares_fetch(hass):
+    """Test concurrent requests for a frame share a single fetch."""
+    calls = []
+
+    async def image_cb():
+        """Return a frame."""
+        calls.append(1)
+        await asyncio.sleep(0)
+        return b'frame'
+
+    broker = camera.async_get_frame_broker(hass, image_cb)
+    frames = await asyncio.gather(
+        broker.async_get_frame(), broker.async_get_frame())
+
+    assert frames == [b'frame', b'frame']
+    assert len(calls) == 1
+    # The broker is forgotten once it is not used
+    assert hass.data[camera.DATA_FRAME_BROKERS] == {}
+
+
+async def test_frame_broker_fans_out_frames(hass):
+    """Test the polled frames are fed to all the streams."""
+    frames = iter([b'1', b'2', None])
+    calls = []
+
+    async def image_cb():
+        """Return the next frame."""
+        calls.append(1)
+        return next(frames)
+
+    broker = camera.async_get_frame_broker(hass, image_cb)
+    assert camera.async_get_frame_broker(hass, image_cb) is broker
+
+    async def receive():
+        """Receive the frames of a stream until it ends."""
+        unsubscribe = broker.async_subscribe(0)
+        received = []
+        frame = await broker.async_next_frame()
+        while frame:
+            received.append(frame)
+            frame = await broker.async_next_frame()
+        unsubscribe()
+        return received
+
+    assert await asyncio.gather(receive(), receive()) == \
+        [[b'1', b'2'], [b'1', b'2']]
+    assert len(calls) == 3
+    assert hass.data[camera.DATA_FRAME_BROKERS] == {}
+
+
+async def test_still_stream(hass, hass_client, mock_camera):
+    """Test serving an MJPEG stream of the camera images."""
+    client = await hass_client()
+
+    resp = await client.get(
+        '/api/camera_proxy_stream/camera.demo_camera?interval=0.5')
+    assert resp.status == 200
+    part = (b'--frameboundary\r\nContent-Type: image/jpeg\r\n'
+            b'Content-Length: 4\r\n\r\nTest\r\n')
+    assert await resp.content.readexactly(2 * len(part)) == 2 * part
+    resp.close()
@@ -0,0 +1,64 @@
+"""The tests for the proxy camera platform."""
+import io
+from unittest.mock import Mock
+
+import pytest
+
+from homeassistant.components.camera import proxy
+
+
+def _jpeg(width, height):
+    """Return a JPEG image."""
+    from PIL import Image
+
+    imgbuf = io.BytesIO()
+    Image.new('RGB', (width, height), 'red').save(imgbuf, 'JPEG')
+    return imgbuf.getvalue()
+
+
+def _size(image):
+    """Return the size of an image."""
+    from PIL import Image
+
+    return Image.open(io.BytesIO(image)).size
+
+
+def test_resize_image():
+    """Test resizing a JPEG image decoded in draft mode."""
+    pytest.importorskip('PIL')
+    opts = proxy.ImageOpts(200, None, None, None, None, True)
+
+    assert _size(proxy._resize_image(_jpeg(1600, 1200), opts)) == (200, 150)
+    # Images smaller than requested are left untouched
+    image = _jpeg(100, 50)
+    assert proxy._resize_image(image, opts) is image
+
+
+def test_crop_image_keeps_options():
+    """Test cropping images does not change the options."""
+    pytest.importorskip('PIL')
+    opts = proxy.ImageOpts(None, None, 10, 20, 75, False)
+
+    assert _size(proxy._crop_image(_jpeg(100, 100), opts)) == (90, 80)
+    assert _size(proxy._crop_image(_jpeg(200, 100), opts)) == (190, 80)
+    assert opts.max_width is None
+
+
+def test_image_cache():
+    """Test processed images are cached by image and options."""
+    job = Mock(side_effect=lambda image, opts: image.upper())
+    cache = proxy.ImageCache(2)
+    opts = proxy.ImageOpts(100, None, None, None, None, False)
+    other_opts = proxy.ImageOpts(200, None, None, None, None, False)
+
+    assert cache.process(job, b'one', opts) == b'ONE'
+    assert cache.process(job, b'one', opts) == b'ONE'
+    assert job.call_count == 1
+
+    cache.process(job, b'one', other_opts)
+    cache.process(job, b'two', opts)
+    assert job.call_count == 3
+
+    # The least recently used image was evicted
+    cache.process(job, b'one', opts)
+    assert job.call_count == 4
@@ -631,3 +631,81 @@ def test_see_schema_allowing_ios_calls():
         "gps_accuracy": 300,
         "hostname": 'beer',
     })
+
+
+async def test_store_imports_yaml(hass, yaml_devices, hass_storage):
+    """Test the known devices are imported from YAML into the store."""
+    with open(yaml_devices, 'w') as out:
+        out.write('my_device:\n  name: My device\n  mac: ab:cd\n'
+                  '  track: true\n  consider_home: 60\n')
+
+    with assert_setup_component(1, device_tracker.DOMAIN):
+        assert await async_setup_component(hass, device_tracker.DOMAIN, {
+            device_tracker.DOMAIN: {
+                CONF_PLATFORM: 'test',
+                device_tracker.CONF_STORE_KNOWN_DEVICES: True,
+            }})
+
+    assert hass.states.get('device_tracker.my_device') is not None
+    devices = hass_storage[device_tracker.STORAGE_KEY]['data']['devices']
+    assert devices == {
+        'my_device': {
+            'name': 'My device',
+            'mac': 'AB:CD',
+            'icon': None,
+            'picture': None,
+            'track': True,
+            'hide_if_away': False,
+            'consider_home': 60,
+        },
+    }
+
+    common.async_see(hass, 'mac_1', host_name='hello')
+    await hass.async_block_till_done()
+
+    # New devices are saved in batches and not to YAML
+    assert 'hello' not in \
+        hass_storage[device_tracker.STORAGE_KEY]['data']['devices']
+    async_fire_time_changed(hass, dt_util.utcnow() + timedelta(
+        seconds=device_tracker.SAVE_DELAY))
+    await hass.async_block_till_done()
+
+    devices = hass_storage[device_tracker.STORAGE_KEY]['data']['devices']
+    assert devices['hello']['mac'] == 'MAC_1'
+    assert len(await device_tracker.async_load_config(
+        yaml_devices, hass, timedelta(seconds=0))) == 1
+
+
+async def test_store_loads_devices(hass, yaml_devices, hass_storage):
+    """Test the known devices are loaded from the store."""
+    hass_storage[device_tracker.STORAGE_KEY] = {
+        'version': device_tracker.STORAGE_VERSION,
+        'key': device_tracker.STORAGE_KEY,
+        'data': {
+            'devices': {
+                'my_device': {
+                    'name': 'My device',
+                    'mac': 'AB:CD',
+                    'icon': 'mdi:kettle',
+                    'picture': None,
+                    'track': True,
+                    'hide_if_away': False,
+                    'consider_home': 60,
+                },
+            },
+        },
+    }
+
+    with open(yaml_devices, 'w') as out:
+        out.write('yaml_device:\n  name: YAML device\n  track: true\n')
+
+    with assert_setup_component(1, device_tracker.DOMAIN):
+        assert await async_setup_component(hass, device_tracker.DOMAIN, {
+            device_tracker.DOMAIN: {
+                CONF_PLATFORM: 'test',
+                device_tracker.CONF_STORE_KNOWN_DEVICES: True,
+            }})
+
+    state = hass.states.get('device_tracker.my_device')
+    assert state.attributes[ATTR_ICON] == 'mdi:kettle'
+    assert hass.states.get('device_tracker.yaml_device') is None
@@ -189,9 +189,10 @@ class TestComponentHistory(unittest.TestCase):
         for entity_id in states:
             if entity_id == 'media_player.test':
                 states[entity_id] = states[entity_id][1:]
-            for state in states[entity_id]:
-                if state.last_changed == one:
-                    state.last_changed = one_and_half
+            states[entity_id] = [
+                state.evolve(last_changed=one_and_half)
+                if state.last_changed == one else state
+                for state in states[entity_id]]
 
         hist = history.get_significant_states(
             self.hass, one_and_half, four, filters=history.Filters(),
@@ -428,6 +429,100 @@ class TestComponentHistory(unittest.TestCase):
                     history.CONF_ENTITIES: ['media_player.test']}}})
         self.check_significant_states(zero, four, states, config)
 
+    def test_stream_significant_states(self):
+        """Test streamed states match the significant states per entity."""
+        zero, four, states = self.record_states()
+        one_and_half = zero + timedelta(seconds=1.5)
+        hist = history.get_significant_states(
+            self.hass, one_and_half, four, filters=history.Filters())
+
+        streamed = list(history.stream_significant_states(
+            self.hass, one_and_half, four, filters=history.Filters()))
+
+        assert [state_list[0].entity_id for state_list in streamed] == \
+            sorted(hist)
+        for state_list in streamed:
+            assert state_list == hist[state_list[0].entity_id]
+
+    def test_get_significant_states_numeric(self):
+        """Test numeric states are merged into the history."""
+        init_recorder_component(self.hass, {
+            recorder.CONF_NUMERIC_STATES: True})
+        self.hass.start()
+        self.wait_recording_done()
+        power = 'sensor.power'
+        attributes = {'unit_of_measurement': 'W'}
+
+        zero = dt_util.utcnow()
+        one = zero + timedelta(seconds=1)
+        two = one + timedelta(seconds=1)
+
+        for point, value in ((zero, '10'), (one, '12.5'), (two, '15')):
+            with patch('homeassistant.components.recorder.dt_util.utcnow',
+                       return_value=point):
+                self.hass.states.set(power, value, attributes)
+                self.hass.states.set('media_player.test', value)
+                self.wait_recording_done()
+
+        # Only changing the attributes is not a significant change
+        with patch('homeassistant.components.recorder.dt_util.utcnow',
+                   return_value=two + timedelta(milliseconds=250)):
+            self.hass.states.set(power, '15', {
+                'unit_of_measurement': 'W', 'friendly_name': 'Power'})
+            self.wait_recording_done()
+
+        hist = history.get_significant_states(
+            self.hass, zero + timedelta(milliseconds=500),
+            two + timedelta(milliseconds=500))
+
+        assert [(state.state, dict(state.attributes))
+                for state in hist[power]] == \
+            [('10', attributes), ('12.5', attributes), ('15', attributes)]
+        assert [state.state for state in hist['media_player.test']] == \
+            ['10', '12.5', '15']
+
+        state = history.get_state(self.hass, two, power)
+        assert (state.entity_id, state.state) == (power, '12.5')
+
+    def test_get_history_numeric_buckets(self):
+        """Test numeric states are downsampled by the database."""
+        init_recorder_component(self.hass, {
+            recorder.CONF_NUMERIC_STATES: True})
+        self.hass.start()
+        self.wait_recording_done()
+        power = 'sensor.power'
+        zero = dt_util.utcnow()
+
+        for value in range(10):
+            with patch('homeassistant.components.recorder.dt_util.utcnow',
+                       return_value=zero + timedelta(seconds=value)):
+                self.hass.states.set(power, value, {
+                    'unit_of_measurement': 'W', 'value': value})
+                self.hass.states.set('media_player.test', 'on')
+                self.wait_recording_done()
+
+        start = zero - timedelta(seconds=1)
+        end = zero + timedelta(seconds=11)
+
+        buckets = history.get_numeric_buckets(self.hass, start, end, 2)
+        assert list(buckets) == [power]
+        assert [(bucket['min'], bucket['max'], bucket['state'],
+                 bucket['last_updated'], bucket['attributes']['value'])
+                for bucket in buckets[power]] == [
+                    (0, 4, 2, zero, 4),
+                    (5, 9, 7, zero + timedelta(seconds=5), 9)]
+
+        hist = history.get_history(self.hass, start, end, max_points=2)
+        assert [state_list[0]['entity_id']
+                if isinstance(state_list[0], dict)
+                else state_list[0].entity_id
+                for state_list in hist] == ['media_player.test', power]
+        assert hist[1] == buckets[power]
+
+        streamed = list(history.stream_history(
+            self.hass, start, end, max_points=2))
+        assert streamed == hist
+
     def check_significant_states(self, zero, four, states, config):
         """Check if significant states are retrieved."""
         filters = history.Filters()
@@ -524,3 +619,102 @@ async def test_fetch_period_api(hass, hass_client):
     response = await client.get(
         '/api/history/period/{}'.format(dt_util.utcnow().isoformat()))
     assert response.status == 200
+
+
+async def test_fetch_period_api_streamed(hass, hass_client):
+    """Test the fetch period view streams a list per entity."""
+    await hass.async_add_job(init_recorder_component, hass)
+    await async_setup_component(hass, 'history', {})
+    start = dt_util.utcnow()
+    hass.states.async_set('light.kitchen', 'on')
+    hass.states.async_set('light.hall', 'on')
+    hass.states.async_set('light.kitchen', 'off')
+    await hass.async_block_till_done()
+    await hass.async_add_job(hass.data[recorder.DATA_INSTANCE].block_till_done)
+
+    client = await hass_client()
+    response = await client.get(
+        '/api/history/period/{}'.format(start.isoformat()))
+    assert response.status == 200
+    result = await response.json()
+
+    assert [[state['state'] for state in state_list]
+            for state_list in result] == [['on'], ['on', 'off']]
+    assert result[0][0]['entity_id'] == 'light.hall'
+
+
+async def test_fetch_period_api_max_points(hass, hass_client):
+    """Test the fetch period view validates max_points."""
+    await hass.async_add_job(init_recorder_component, hass)
+    await async_setup_component(hass, 'history', {})
+    await hass.async_add_job(hass.data[recorder.DATA_INSTANCE].block_till_done)
+    client = await hass_client()
+    response = await client.get(
+        '/api/history/period/{}'.format(dt_util.utcnow().isoformat()),
+        params={'max_points': 10})
+    assert response.status == 200
+
+    response = await client.get(
+        '/api/history/period/{}'.format(dt_util.utcnow().isoformat()),
+        params={'max_points': 'abc'})
+    assert response.status == 400
+
+
+async def test_history_period_websocket(hass, hass_ws_client):
+    """Test the history period websocket command downsamples."""
+    await hass.async_add_job(init_recorder_component, hass)
+    await async_setup_component(hass, 'history', {})
+    start = dt_util.utcnow()
+
+    for value in range(10):
+        with patch('homeassistant.components.recorder.dt_util.utcnow',
+                   return_value=start + timedelta(seconds=value)):
+            hass.states.async_set('sensor.power', value)
+            await hass.async_block_till_done()
+    await hass.async_add_job(hass.data[recorder.DATA_INSTANCE].block_till_done)
+
+    client = await hass_ws_client(hass)
+    await client.send_json({
+        'id': 5,
+        'type': history.WS_TYPE_HISTORY_PERIOD,
+        'start_time': (start - timedelta(seconds=1)).isoformat(),
+        'end_time': (start + timedelta(seconds=11)).isoformat(),
+        'entity_ids': ['sensor.power'],
+        'max_points': 2,
+    })
+    msg = await client.receive_json()
+
+    assert msg['success']
+    assert [(point['min'], point['max'], point['state'])
+            for point in msg['result'][0]] == [(0, 4, 2), (5, 9, 7)]
+
+    await client.send_json({
+        'id': 6,
+        'type': history.WS_TYPE_HISTORY_PERIOD,
+        'start_time': 'not a time',
+    })
+    msg = await client.receive_json()
+
+    assert not msg['success']
+
+
+def test_downsample_states():
+    """Test downsampling numeric and non numeric states."""
+    start = dt_util.utcnow()
+    end = start + timedelta(seconds=4)
+    states = [
+        ha.State('sensor.power', str(value), {'unit_of_measurement': 'W'},
+                 last_updated=start + timedelta(seconds=value))
+        for value in range(4)]
+
+    assert history.downsample_states(states, start, end, 4) == states
+
+    buckets = history.downsample_states(states, start, end, 2)
+    assert [(bucket['state'], bucket['min'], bucket['max'],
+             bucket['last_updated']) for bucket in buckets] == [
+                 (0.5, 0, 1, start), (2.5, 2, 3, start + timedelta(seconds=2))]
+    assert buckets[1]['attributes'] == {'unit_of_measurement': 'W'}
+
+    states.append(ha.State('sensor.power', 'unavailable',
+                           last_updated=start + timedelta(seconds=3)))
+    assert history.downsample_states(states, start, end, 2) == states
@@ -0,0 +1,171 @@
+"""Test static file handling for the HTTP component."""
+import gzip
+import os
+
+from aiohttp import hdrs, web
+import pytest
+
+from homeassistant.components.http.static import CachingStaticResource
+
+
+@pytest.fixture
+def static_dir(tmpdir):
+    """Return a static directory with precompressed files."""
+    tmpdir.join('app.js').write('console.log("hello");')
+    tmpdir.join('app.js.gz').write_binary(
+        gzip.compress(b'console.log("hello");'))
+    tmpdir.join('app.js.br').write_binary(b'brotli')
+    tmpdir.join('plain.txt').write('plain')
+    tmpdir.mkdir('sub').join('page.html').write('<html></html>')
+    return tmpdir
+
+
+@pytest.fixture
+def mock_client(loop, aiohttp_client, static_dir):
+    """Return a client of an app serving the static directory."""
+    app = web.Application()
+    app.router.register_resource(
+        CachingStaticResource('/static', str(static_dir)))
+    return loop.run_until_complete(aiohttp_client(app, auto_decompress=False))
+
+
+async def test_serve_file(mock_client):
+    """Test serving a file without precompressed siblings."""
+    resp = await mock_client.get(
+        '/static/plain.txt', headers={hdrs.ACCEPT_ENCODING: 'identity'})
+    assert resp.status == 200
+    assert await resp.text() == 'plain'
+    assert resp.headers[hdrs.CONTENT_TYPE] == 'text/plain'
+    assert resp.headers[hdrs.CACHE_CONTROL] == 'public, max-age=2678400'
+    assert hdrs.ETAG in resp.headers
+    assert hdrs.VARY not in resp.headers
+
+    resp = await mock_client.get('/static/sub/page.html')
+    assert resp.status == 200
+    assert await resp.text() == '<html></html>'
+
+    resp = await mock_client.head('/static/plain.txt')
+    assert resp.status == 200
+    assert resp.headers[hdrs.CONTENT_LENGTH] == '5'
+
+
+async def test_serve_precompressed(mock_client):
+    """Test the precompressed siblings accepted by the client are served."""
+    resp = await mock_client.get(
+        '/static/app.js', headers={hdrs.ACCEPT_ENCODING: 'gzip, br'})
+    assert resp.status == 200
+    assert resp.headers[hdrs.CONTENT_ENCODING] == 'br'
+    assert await resp.read() == b'brotli'
+    assert resp.headers[hdrs.VARY] == hdrs.ACCEPT_ENCODING
+    assert resp.headers[hdrs.CONTENT_TYPE] in (
+        'application/javascript', 'text/javascript')
+    brotli_etag = resp.headers[hdrs.ETAG]
+
+    resp = await mock_client.get(
+        '/static/app.js', headers={hdrs.ACCEPT_ENCODING: 'gzip, br;q=0'})
+    assert resp.status == 200
+    assert resp.headers[hdrs.CONTENT_ENCODING] == 'gzip'
+    assert gzip.decompress(await resp.read()) == b'console.log("hello");'
+    assert resp.headers[hdrs.ETAG] != brotli_etag
+
+    resp = await mock_client.get(
+        '/static/app.js', headers={hdrs.ACCEPT_ENCODING: 'identity'})
+    assert resp.status == 200
+    assert hdrs.CONTENT_ENCODING not in resp.headers
+    assert await resp.text() == 'console.log("hello");'
+
+
+async def test_conditional_requests(mock_client):
+    """Test conditional requests are answered with 304."""
+    resp = await mock_client.get(
+        '/static/app.js', headers={hdrs.ACCEPT_ENCODING: 'gzip'})
+    etag = resp.headers[hdrs.ETAG]
+    last_modified = resp.headers[hdrs.LAST_MODIFIED]
+
+    resp = await mock_client.get('/static/app.js', headers={
+        hdrs.ACCEPT_ENCODING: 'gzip',
+        hdrs.IF_NONE_MATCH: 'W/"other", {}'.format(etag),
+    })
+    assert resp.status == 304
+    assert resp.headers[hdrs.ETAG] == etag
+    assert await resp.read() == b''
+
+    # The identity representation has another entity tag
+    resp = await mock_client.get('/static/app.js', headers={
+        hdrs.ACCEPT_ENCODING: 'identity',
+        hdrs.IF_NONE_MATCH: etag,
+    })
+    assert resp.status == 200
+
+    resp = await mock_client.get('/static/app.js', headers={
+        hdrs.ACCEPT_ENCODING: 'gzip',
+        hdrs.IF_MODIFIED_SINCE: last_modified,
+    })
+    assert resp.status == 304
+
+
+async def test_files_changed(mock_client, static_dir):
+    """Test files added or changed after indexing are served."""
+    resp = await mock_client.get('/static/new.txt')
+    assert resp.status == 404
+
+    static_dir.join('new.txt').write('new')
+    resp = await mock_client.get('/static/new.txt')
+    assert resp.status == 200
+    assert await resp.text() == 'new'
+
+    static_dir.join('new.txt').write('changed')
+    resp = await mock_client.get('/static/new.txt')
+    assert resp.status == 200
+    assert await resp.text() == 'changed'
+
+    resp = await mock_client.get('/static/new.txt')
+    assert resp.status == 200
+    assert await resp.text() == 'changed'
+
+
+async def test_file_edited_in_place(mock_client, static_dir):
+    """Test a file edited in place is not answered with a stale 304."""
+    resp = await mock_client.get('/static/plain.txt')
+    etag = resp.headers[hdrs.ETAG]
+    last_modified = resp.headers[hdrs.LAST_MODIFIED]
+
+    # Same size, only the modification time tells the change
+    plain = static_dir.join('plain.txt')
+    plain.write('PLAIN')
+    mtime = plain.mtime() + 10
+    os.utime(str(plain), (mtime, mtime))
+
+    resp = await mock_client.get(
+        '/static/plain.txt', headers={hdrs.IF_NONE_MATCH: etag})
+    assert resp.status == 200
+    assert await resp.text() == 'PLAIN'
+    assert resp.headers[hdrs.ETAG] != etag
+    new_etag = resp.headers[hdrs.ETAG]
+
+    resp = await mock_client.get(
+        '/static/plain.txt', headers={hdrs.IF_MODIFIED_SINCE: last_modified})
+    assert resp.status == 200
+
+    resp = await mock_client.get(
+        '/static/plain.txt', headers={hdrs.IF_NONE_MATCH: new_etag})
+    assert resp.status == 304
+
+
+async def test_outside_directory(mock_client, static_dir):
+    """Test files outside of the directory are not served."""
+    static_dir.dirpath().join('secret.txt').write('secret')
+    os.symlink(str(static_dir.dirpath().join('secret.txt')),
+               str(static_dir.join('link.txt')))
+
+    resp = await mock_client.get('/static/..%2Fsecret.txt')
+    assert resp.status == 404
+
+    resp = await mock_client.get('/static/link.txt')
+    assert resp.status == 404
+
+    resp = await mock_client.get('/static/missing/file.txt')
+    assert resp.status == 404
+
+    resp = await mock_client.get('/static/sub')
+    assert resp.status == 403
@@ -1,11 +1,15 @@
 """Tests for Home Assistant View."""
-from unittest.mock import Mock
+import json
+from unittest.mock import Mock, patch
 
+from aiohttp import web
 from aiohttp.web_exceptions import (
     HTTPInternalServerError, HTTPBadRequest, HTTPUnauthorized)
 import pytest
 import voluptuous as vol
 
+from homeassistant.components.http import view as http_view
+from homeassistant.components.http.const import KEY_HASS
 from homeassistant.components.http.view import (
     HomeAssistantView, request_handler_factory)
 from homeassistant.exceptions import ServiceNotFound, Unauthorized
@@ -57,3 +61,65 @@ async def test_handling_service_not_found(mock_request):
             Mock(requires_auth=False),
             mock_coro_func(exception=ServiceNotFound('test', 'test'))
         )(mock_request)
+
+
+async def test_json_stream(hass, aiohttp_client):
+    """Test streaming a JSON array in chunks."""
+    class StreamView(HomeAssistantView):
+        """Test view streaming a JSON array."""
+
+        url = '/stream'
+        name = 'stream'
+        requires_auth = False
+
+        async def get(self, request):
+            """Stream the items."""
+            return await self.json_stream(request, range, int(
+                request.query['count']))
+
+    app = web.Application()
+    app[KEY_HASS] = hass
+    StreamView().register(app, app.router)
+    client = await aiohttp_client(app)
+
+    with patch.object(http_view, 'STREAM_CHUNK_SIZE', 10), \
+            patch.object(http_view, 'STREAM_QUEUE_SIZE', 1):
+        for count in (0, 1, 100):
+            response = await client.get('/stream?count={}'.format(count))
+            assert response.status == 200
+            assert response.content_type == 'application/json'
+            assert json.loads(await response.text()) == list(range(count))
+
+
+async def test_json_stream_error(hass, aiohttp_client):
+    """Test an item that cannot be serialized results in an error."""
+    closed = []
+
+    def generate():
+        """Generate an item that cannot be serialized."""
+        try:
+            yield 1
+            yield object()
+            yield 2
+        finally:
+            closed.append(True)
+
+    class StreamView(HomeAssistantView):
+        """Test view streaming a JSON array."""
+
+        url = '/stream'
+        name = 'stream'
+        requires_auth = False
+
+        async def get(self, request):
+            """Stream the items."""
+            return await self.json_stream(request, generate)
+
+    app = web.Application()
+    app[KEY_HASS] = hass
+    StreamView().register(app, app.router)
+    client = await aiohttp_client(app)
+
+    response = await client.get('/stream')
+    assert response.status == 500
+    assert closed == [True]
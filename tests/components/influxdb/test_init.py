@@ -1,16 +1,35 @@
 """The tests for the InfluxDB component."""
 import datetime
+import gzip
+import http.server
+import os
+import shutil
+import threading
 import unittest
 from unittest import mock
 
-from homeassistant.setup import setup_component
+from homeassistant.setup import async_setup_component, setup_component
 import homeassistant.components.influxdb as influxdb
+from homeassistant.components.influxdb.line_protocol import point_to_line
 from homeassistant.const import EVENT_STATE_CHANGED, STATE_OFF, STATE_ON, \
                    STATE_STANDBY
 
 from tests.common import get_test_home_assistant
 
 
+def _lines(body):
+    """Return the lines written for points with numbers as floats."""
+    return '\n'.join(point_to_line(dict(point, fields={
+        key: float(value) if isinstance(value, int) else value
+        for key, value in point['fields'].items()})) for point in body)
+
+
+def _written(mock_client):
+    """Return the lines of the last write."""
+    return gzip.decompress(
+        mock_client.return_value.request.call_args[1]['data']).decode()
+
+
 @mock.patch('influxdb.InfluxDBClient')
 @mock.patch(
     'homeassistant.components.influxdb.InfluxThread.batch_timeout',
@@ -96,7 +115,7 @@ class TestInfluxDB(unittest.TestCase):
         config['influxdb'].update(kwargs)
         assert setup_component(self.hass, influxdb.DOMAIN, config)
         self.handler_method = self.hass.bus.listen.call_args_list[0][0][1]
-        mock_client.return_value.write_points.reset_mock()
+        mock_client.return_value.request.reset_mock()
 
     def test_event_listener(self, mock_client):
         """Test the event listener."""
@@ -155,10 +174,9 @@ class TestInfluxDB(unittest.TestCase):
             self.handler_method(event)
             self.hass.data[influxdb.DOMAIN].block_till_done()
 
-            assert mock_client.return_value.write_points.call_count == 1
-            assert mock_client.return_value.write_points.call_args == \
-                mock.call(body)
-            mock_client.return_value.write_points.reset_mock()
+            assert mock_client.return_value.request.call_count == 1
+            assert _written(mock_client) == _lines(body)
+            mock_client.return_value.request.reset_mock()
 
     def test_event_listener_no_units(self, mock_client):
         """Test the event listener for missing units."""
@@ -186,10 +204,9 @@ class TestInfluxDB(unittest.TestCase):
             }]
             self.handler_method(event)
             self.hass.data[influxdb.DOMAIN].block_till_done()
-            assert mock_client.return_value.write_points.call_count == 1
-            assert mock_client.return_value.write_points.call_args == \
-                mock.call(body)
-            mock_client.return_value.write_points.reset_mock()
+            assert mock_client.return_value.request.call_count == 1
+            assert _written(mock_client) == _lines(body)
+            mock_client.return_value.request.reset_mock()
 
     def test_event_listener_inf(self, mock_client):
         """Test the event listener for missing units."""
@@ -213,10 +230,9 @@ class TestInfluxDB(unittest.TestCase):
         }]
         self.handler_method(event)
         self.hass.data[influxdb.DOMAIN].block_till_done()
-        assert mock_client.return_value.write_points.call_count == 1
-        assert mock_client.return_value.write_points.call_args == \
-            mock.call(body)
-        mock_client.return_value.write_points.reset_mock()
+        assert mock_client.return_value.request.call_count == 1
+        assert _written(mock_client) == _lines(body)
+        mock_client.return_value.request.reset_mock()
 
     def test_event_listener_states(self, mock_client):
         """Test the event listener against ignored states."""
@@ -241,12 +257,11 @@ class TestInfluxDB(unittest.TestCase):
             self.handler_method(event)
             self.hass.data[influxdb.DOMAIN].block_till_done()
             if state_state == 1:
-                assert mock_client.return_value.write_points.call_count == 1
-                assert mock_client.return_value.write_points.call_args == \
-                    mock.call(body)
+                assert mock_client.return_value.request.call_count == 1
+                assert _written(mock_client) == _lines(body)
             else:
-                assert not mock_client.return_value.write_points.called
-            mock_client.return_value.write_points.reset_mock()
+                assert not mock_client.return_value.request.called
+            mock_client.return_value.request.reset_mock()
 
     def test_event_listener_blacklist(self, mock_client):
         """Test the event listener against a blacklist."""
@@ -271,12 +286,11 @@ class TestInfluxDB(unittest.TestCase):
             self.handler_method(event)
             self.hass.data[influxdb.DOMAIN].block_till_done()
             if entity_id == 'ok':
-                assert mock_client.return_value.write_points.call_count == 1
-                assert mock_client.return_value.write_points.call_args == \
-                    mock.call(body)
+                assert mock_client.return_value.request.call_count == 1
+                assert _written(mock_client) == _lines(body)
             else:
-                assert not mock_client.return_value.write_points.called
-            mock_client.return_value.write_points.reset_mock()
+                assert not mock_client.return_value.request.called
+            mock_client.return_value.request.reset_mock()
 
     def test_event_listener_blacklist_domain(self, mock_client):
         """Test the event listener against a blacklist."""
@@ -302,12 +316,11 @@ class TestInfluxDB(unittest.TestCase):
             self.handler_method(event)
             self.hass.data[influxdb.DOMAIN].block_till_done()
             if domain == 'ok':
-                assert mock_client.return_value.write_points.call_count == 1
-                assert mock_client.return_value.write_points.call_args == \
-                    mock.call(body)
+                assert mock_client.return_value.request.call_count == 1
+                assert _written(mock_client) == _lines(body)
             else:
-                assert not mock_client.return_value.write_points.called
-            mock_client.return_value.write_points.reset_mock()
+                assert not mock_client.return_value.request.called
+            mock_client.return_value.request.reset_mock()
 
     def test_event_listener_whitelist(self, mock_client):
         """Test the event listener against a whitelist."""
@@ -323,7 +336,7 @@ class TestInfluxDB(unittest.TestCase):
         }
         assert setup_component(self.hass, influxdb.DOMAIN, config)
         self.handler_method = self.hass.bus.listen.call_args_list[0][0][1]
-        mock_client.return_value.write_points.reset_mock()
+        mock_client.return_value.request.reset_mock()
 
         for entity_id in ('included', 'default'):
             state = mock.MagicMock(
@@ -344,12 +357,11 @@ class TestInfluxDB(unittest.TestCase):
             self.handler_method(event)
             self.hass.data[influxdb.DOMAIN].block_till_done()
             if entity_id == 'included':
-                assert mock_client.return_value.write_points.call_count == 1
-                assert mock_client.return_value.write_points.call_args == \
-                    mock.call(body)
+                assert mock_client.return_value.request.call_count == 1
+                assert _written(mock_client) == _lines(body)
             else:
-                assert not mock_client.return_value.write_points.called
-            mock_client.return_value.write_points.reset_mock()
+                assert not mock_client.return_value.request.called
+            mock_client.return_value.request.reset_mock()
 
     def test_event_listener_whitelist_domain(self, mock_client):
         """Test the event listener against a whitelist."""
@@ -365,7 +377,7 @@ class TestInfluxDB(unittest.TestCase):
         }
         assert setup_component(self.hass, influxdb.DOMAIN, config)
         self.handler_method = self.hass.bus.listen.call_args_list[0][0][1]
-        mock_client.return_value.write_points.reset_mock()
+        mock_client.return_value.request.reset_mock()
 
         for domain in ('fake', 'another_fake'):
             state = mock.MagicMock(
@@ -387,12 +399,11 @@ class TestInfluxDB(unittest.TestCase):
             self.handler_method(event)
             self.hass.data[influxdb.DOMAIN].block_till_done()
             if domain == 'fake':
-                assert mock_client.return_value.write_points.call_count == 1
-                assert mock_client.return_value.write_points.call_args == \
-                    mock.call(body)
+                assert mock_client.return_value.request.call_count == 1
+                assert _written(mock_client) == _lines(body)
             else:
-                assert not mock_client.return_value.write_points.called
-            mock_client.return_value.write_points.reset_mock()
+                assert not mock_client.return_value.request.called
+            mock_client.return_value.request.reset_mock()
 
     def test_event_listener_whitelist_domain_and_entities(self, mock_client):
         """Test the event listener against a whitelist."""
@@ -409,7 +420,7 @@ class TestInfluxDB(unittest.TestCase):
         }
         assert setup_component(self.hass, influxdb.DOMAIN, config)
         self.handler_method = self.hass.bus.listen.call_args_list[0][0][1]
-        mock_client.return_value.write_points.reset_mock()
+        mock_client.return_value.request.reset_mock()
 
         for domain in ('fake', 'another_fake'):
             state = mock.MagicMock(
@@ -431,12 +442,11 @@ class TestInfluxDB(unittest.TestCase):
             self.handler_method(event)
             self.hass.data[influxdb.DOMAIN].block_till_done()
             if domain == 'fake':
-                assert mock_client.return_value.write_points.call_count == 1
-                assert mock_client.return_value.write_points.call_args == \
-                    mock.call(body)
+                assert mock_client.return_value.request.call_count == 1
+                assert _written(mock_client) == _lines(body)
             else:
-                assert not mock_client.return_value.write_points.called
-            mock_client.return_value.write_points.reset_mock()
+                assert not mock_client.return_value.request.called
+            mock_client.return_value.request.reset_mock()
 
         for entity_id in ('one', 'two'):
             state = mock.MagicMock(
@@ -458,12 +468,11 @@ class TestInfluxDB(unittest.TestCase):
             self.handler_method(event)
             self.hass.data[influxdb.DOMAIN].block_till_done()
             if entity_id == 'one':
-                assert mock_client.return_value.write_points.call_count == 1
-                assert mock_client.return_value.write_points.call_args == \
-                    mock.call(body)
+                assert mock_client.return_value.request.call_count == 1
+                assert _written(mock_client) == _lines(body)
             else:
-                assert not mock_client.return_value.write_points.called
-            mock_client.return_value.write_points.reset_mock()
+                assert not mock_client.return_value.request.called
+            mock_client.return_value.request.reset_mock()
 
     def test_event_listener_invalid_type(self, mock_client):
         """Test the event listener when an attribute has an invalid type."""
@@ -509,10 +518,9 @@ class TestInfluxDB(unittest.TestCase):
 
             self.handler_method(event)
             self.hass.data[influxdb.DOMAIN].block_till_done()
-            assert mock_client.return_value.write_points.call_count == 1
-            assert mock_client.return_value.write_points.call_args == \
-                mock.call(body)
-            mock_client.return_value.write_points.reset_mock()
+            assert mock_client.return_value.request.call_count == 1
+            assert _written(mock_client) == _lines(body)
+            mock_client.return_value.request.reset_mock()
 
     def test_event_listener_default_measurement(self, mock_client):
         """Test the event listener with a default measurement."""
@@ -529,7 +537,7 @@ class TestInfluxDB(unittest.TestCase):
         }
         assert setup_component(self.hass, influxdb.DOMAIN, config)
         self.handler_method = self.hass.bus.listen.call_args_list[0][0][1]
-        mock_client.return_value.write_points.reset_mock()
+        mock_client.return_value.request.reset_mock()
 
         for entity_id in ('ok', 'blacklisted'):
             state = mock.MagicMock(
@@ -550,12 +558,11 @@ class TestInfluxDB(unittest.TestCase):
             self.handler_method(event)
             self.hass.data[influxdb.DOMAIN].block_till_done()
             if entity_id == 'ok':
-                assert mock_client.return_value.write_points.call_count == 1
-                assert mock_client.return_value.write_points.call_args == \
-                    mock.call(body)
+                assert mock_client.return_value.request.call_count == 1
+                assert _written(mock_client) == _lines(body)
             else:
-                assert not mock_client.return_value.write_points.called
-            mock_client.return_value.write_points.reset_mock()
+                assert not mock_client.return_value.request.called
+            mock_client.return_value.request.reset_mock()
 
     def test_event_listener_unit_of_measurement_field(self, mock_client):
         """Test the event listener for unit of measurement field."""
@@ -569,7 +576,7 @@ class TestInfluxDB(unittest.TestCase):
         }
         assert setup_component(self.hass, influxdb.DOMAIN, config)
         self.handler_method = self.hass.bus.listen.call_args_list[0][0][1]
-        mock_client.return_value.write_points.reset_mock()
+        mock_client.return_value.request.reset_mock()
 
         attrs = {
             'unit_of_measurement': 'foobars',
@@ -592,10 +599,9 @@ class TestInfluxDB(unittest.TestCase):
         }]
         self.handler_method(event)
         self.hass.data[influxdb.DOMAIN].block_till_done()
-        assert mock_client.return_value.write_points.call_count == 1
-        assert mock_client.return_value.write_points.call_args == \
-            mock.call(body)
-        mock_client.return_value.write_points.reset_mock()
+        assert mock_client.return_value.request.call_count == 1
+        assert _written(mock_client) == _lines(body)
+        mock_client.return_value.request.reset_mock()
 
     def test_event_listener_tags_attributes(self, mock_client):
         """Test the event listener when some attributes should be tags."""
@@ -609,7 +615,7 @@ class TestInfluxDB(unittest.TestCase):
         }
         assert setup_component(self.hass, influxdb.DOMAIN, config)
         self.handler_method = self.hass.bus.listen.call_args_list[0][0][1]
-        mock_client.return_value.write_points.reset_mock()
+        mock_client.return_value.request.reset_mock()
 
         attrs = {
             'friendly_fake': 'tag_str',
@@ -635,10 +641,9 @@ class TestInfluxDB(unittest.TestCase):
         }]
         self.handler_method(event)
         self.hass.data[influxdb.DOMAIN].block_till_done()
-        assert mock_client.return_value.write_points.call_count == 1
-        assert mock_client.return_value.write_points.call_args == \
-            mock.call(body)
-        mock_client.return_value.write_points.reset_mock()
+        assert mock_client.return_value.request.call_count == 1
+        assert _written(mock_client) == _lines(body)
+        mock_client.return_value.request.reset_mock()
 
     def test_event_listener_component_override_measurement(self, mock_client):
         """Test the event listener with overridden measurements."""
@@ -666,7 +671,7 @@ class TestInfluxDB(unittest.TestCase):
         }
         assert setup_component(self.hass, influxdb.DOMAIN, config)
         self.handler_method = self.hass.bus.listen.call_args_list[0][0][1]
-        mock_client.return_value.write_points.reset_mock()
+        mock_client.return_value.request.reset_mock()
 
         test_components = [
             {'domain': 'sensor', 'id': 'fake_humidity', 'res': 'humidity'},
@@ -693,10 +698,9 @@ class TestInfluxDB(unittest.TestCase):
             }]
             self.handler_method(event)
             self.hass.data[influxdb.DOMAIN].block_till_done()
-            assert mock_client.return_value.write_points.call_count == 1
-            assert mock_client.return_value.write_points.call_args == \
-                mock.call(body)
-            mock_client.return_value.write_points.reset_mock()
+            assert mock_client.return_value.request.call_count == 1
+            assert _written(mock_client) == _lines(body)
+            mock_client.return_value.request.reset_mock()
 
     def test_scheduled_write(self, mock_client):
         """Test the event listener to retry after write failures."""
@@ -710,13 +714,13 @@ class TestInfluxDB(unittest.TestCase):
         }
         assert setup_component(self.hass, influxdb.DOMAIN, config)
         self.handler_method = self.hass.bus.listen.call_args_list[0][0][1]
-        mock_client.return_value.write_points.reset_mock()
+        mock_client.return_value.request.reset_mock()
 
         state = mock.MagicMock(
             state=1, domain='fake', entity_id='entity.id', object_id='entity',
             attributes={})
         event = mock.MagicMock(data={'new_state': state}, time_fired=12345)
-        mock_client.return_value.write_points.side_effect = \
+        mock_client.return_value.request.side_effect = \
             IOError('foo')
 
         # Write fails
@@ -724,17 +728,20 @@ class TestInfluxDB(unittest.TestCase):
             self.handler_method(event)
             self.hass.data[influxdb.DOMAIN].block_till_done()
             assert mock_sleep.called
-        json_data = mock_client.return_value.write_points.call_args[0][0]
-        assert mock_client.return_value.write_points.call_count == 2
-        mock_client.return_value.write_points.assert_called_with(json_data)
+        data = mock_client.return_value.request.call_args[1]['data']
+        assert mock_client.return_value.request.call_count == 2
+        assert mock_client.return_value.request.call_args_list[0] == \
+            mock_client.return_value.request.call_args_list[1]
+        assert gzip.decompress(data) == \
+            b'entity.id,domain=fake,entity_id=entity value=1.0 12345'
 
         # Write works again
-        mock_client.return_value.write_points.side_effect = None
+        mock_client.return_value.request.side_effect = None
         with mock.patch.object(influxdb.time, 'sleep') as mock_sleep:
             self.handler_method(event)
             self.hass.data[influxdb.DOMAIN].block_till_done()
             assert not mock_sleep.called
-        assert mock_client.return_value.write_points.call_count == 3
+        assert mock_client.return_value.request.call_count == 3
 
     def test_queue_backlog_full(self, mock_client):
         """Test the event listener to drop old events."""
@@ -758,6 +765,101 @@ class TestInfluxDB(unittest.TestCase):
             self.handler_method(event)
             self.hass.data[influxdb.DOMAIN].block_till_done()
 
-            assert mock_client.return_value.write_points.call_count == 0
+            assert mock_client.return_value.request.call_count == 0
+
+        mock_client.return_value.request.reset_mock()
+
+
+class InfluxStandIn(http.server.BaseHTTPRequestHandler):
+    """Record the writes like an InfluxDB server."""
 
-        mock_client.return_value.write_points.reset_mock()
+    writes = []
+    status = 204
+
+    def do_POST(self):  # pylint: disable=invalid-name
+        """Handle a write."""
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        if self.headers['Content-Encoding'] == 'gzip':
+            body = gzip.decompress(body)
+        if body.strip() and self.status == 204:
+            self.writes.append(body.decode())
+        self.send_response(self.status)
+        self.end_headers()
+
+    def log_message(self, *args):  # pylint: disable=arguments-differ
+        """Do not log the requests."""
+
+
+@mock.patch(
+    'homeassistant.components.influxdb.InfluxThread.batch_timeout',
+    mock.Mock(return_value=0))
+def test_write_to_server():
+    """Test writing to a server and saving events while it is down."""
+    server = http.server.HTTPServer(('127.0.0.1', 0), InfluxStandIn)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    hass = get_test_home_assistant()
+    spill_path = hass.config.path(influxdb.SPILL_DIR)
+
+    try:
+        assert setup_component(hass, influxdb.DOMAIN, {
+            'influxdb': {
+                'host': '127.0.0.1',
+                'port': server.server_port,
+                'spill_to_disk': True,
+            }
+        })
+        instance = hass.data[influxdb.DOMAIN]
+
+        def set_state(value):
+            """Set a state and wait for it to be written."""
+            hass.states.set('sensor.temperature', value)
+            hass.block_till_done()
+            instance.block_till_done()
+
+        set_state(20)
+        assert len(InfluxStandIn.writes) == 1
+        assert InfluxStandIn.writes[0].startswith(
+            'sensor.temperature,domain=sensor,entity_id=temperature '
+            'value=20.0 ')
+
+        InfluxStandIn.status = 503
+        set_state(21)
+        set_state(22)
+        assert len(InfluxStandIn.writes) == 1
+        assert len(os.listdir(spill_path)) == 2
+        assert instance.get_stats()['spilled_bytes'] > 0
+
+        InfluxStandIn.status = 204
+        set_state(23)
+        assert [write.split(' ')[1] for write in InfluxStandIn.writes] == [
+            'value=20.0', 'value=23.0', 'value=21.0', 'value=22.0']
+        assert not os.listdir(spill_path)
+
+        stats = instance.get_stats()
+        assert stats['written'] == 4
+        assert stats['spilled_bytes'] == 0
+        assert stats['lost'] == 0
+    finally:
+        hass.stop()
+        server.shutdown()
+        server.server_close()
+        shutil.rmtree(spill_path, ignore_errors=True)
+
+
+async def test_writer_stats(hass, hass_ws_client):
+    """Test getting the metrics of the writer."""
+    with mock.patch('influxdb.InfluxDBClient'):
+        assert await async_setup_component(hass, influxdb.DOMAIN, {
+            'influxdb': {}
+        })
+    await hass.async_block_till_done()
+
+    client = await hass_ws_client(hass)
+    await client.send_json({
+        'id': 5,
+        'type': 'influxdb/writer_stats',
+    })
+    msg = await client.receive_json()
+    assert msg['success']
+    assert msg['result']['queue_size'] == 0
+    assert msg['result']['written'] == 0
@@ -0,0 +1,56 @@
+"""The tests for the InfluxDB line protocol encoder."""
+from datetime import datetime, timezone
+
+from influxdb.line_protocol import make_lines
+
+from homeassistant.components.influxdb.line_protocol import point_to_line
+
+
+def test_point_to_line():
+    """Test points are encoded like the InfluxDB client does."""
+    point = {
+        'measurement': 'km/h, or=mph',
+        'tags': {
+            'entity_id': 'speed',
+            'domain': 'sensor',
+            'friendly name': 'Car, speed=fast',
+        },
+        'time': 1546398245678901000,
+        'fields': {
+            'value': 12.5,
+            'state_str': 'say "hi"\\',
+            'count': 3,
+        },
+    }
+
+    assert point_to_line(point) + '\n' == make_lines({'points': [point]})
+
+
+def test_point_time():
+    """Test the time of points is encoded in nanoseconds."""
+    point = {
+        'measurement': 'sensor.speed',
+        'tags': {},
+        'time': datetime(2019, 1, 2, 3, 4, 5, 678901, tzinfo=timezone.utc),
+        'fields': {'value': 1.0},
+    }
+    assert point_to_line(point) == \
+        'sensor.speed value=1.0 1546398245678901000'
+
+    point['time'] = point['time'].replace(tzinfo=None)
+    assert point_to_line(point) == \
+        'sensor.speed value=1.0 1546398245678901000'
+
+
+def test_point_without_fields():
+    """Test points without fields are skipped."""
+    assert point_to_line({
+        'measurement': 'sensor.speed',
+        'tags': {'empty': ''},
+        'fields': {},
+    }) is None
+    assert point_to_line({
+        'measurement': 'sensor.speed',
+        'tags': {'empty': ''},
+        'fields': {'value': 1.0},
+    }) == 'sensor.speed value=1.0'
@@ -801,3 +801,89 @@ async def test_mqtt_ws_subscription(hass, hass_ws_client):
     })
     response = await client.receive_json()
     assert response['success']
+
+
+async def test_publish_batches_and_coalesces_retained(hass):
+    """Test queued publishes are batched and retained messages coalesced."""
+    mqtt_client = await async_mock_mqtt_client(hass)
+    calls = []
+    mqtt_client.publish.side_effect = lambda *args: calls.append(args)
+
+    mqtt_obj = hass.data['mqtt']
+    hass.async_create_task(
+        mqtt_obj.async_publish('state/light', 'on', 0, True))
+    hass.async_create_task(
+        mqtt_obj.async_publish('cmd/light', 'toggle', 1, False))
+    hass.async_create_task(
+        mqtt_obj.async_publish('state/light', 'off', 0, True))
+    hass.async_create_task(
+        mqtt_obj.async_publish('cmd/light', 'toggle', 1, False))
+    await hass.async_block_till_done()
+
+    assert calls == [
+        ('state/light', 'off', 0, True),
+        ('cmd/light', 'toggle', 1, False),
+        ('cmd/light', 'toggle', 1, False),
+    ]
+
+    stats = mqtt_obj.publish_stats
+    assert stats.published == 3
+    assert stats.batches == 1
+    assert stats.coalesced == 1
+    assert stats.max_queue_depth == 3
+
+
+async def test_publish_keeps_order_of_topic(hass):
+    """Test retained messages are not coalesced over other messages."""
+    mqtt_client = await async_mock_mqtt_client(hass)
+    calls = []
+    mqtt_client.publish.side_effect = lambda *args: calls.append(args)
+
+    mqtt_obj = hass.data['mqtt']
+    hass.async_create_task(
+        mqtt_obj.async_publish('state/light', 'on', 0, True))
+    hass.async_create_task(
+        mqtt_obj.async_publish('state/light', 'clear', 0, False))
+    hass.async_create_task(
+        mqtt_obj.async_publish('state/light', 'off', 0, True))
+    hass.async_create_task(
+        mqtt_obj.async_publish('state/light', 'unknown', 0, True))
+    await hass.async_block_till_done()
+
+    assert calls == [
+        ('state/light', 'on', 0, True),
+        ('state/light', 'clear', 0, False),
+        ('state/light', 'unknown', 0, True),
+    ]
+    assert mqtt_obj.publish_stats.coalesced == 1
+
+
+async def test_publish_error_is_raised(hass):
+    """Test an error handing a batch to paho is raised to the publishers."""
+    mqtt_client = await async_mock_mqtt_client(hass)
+    mqtt_client.publish.side_effect = OSError('broken')
+
+    with pytest.raises(OSError):
+        await hass.data['mqtt'].async_publish('test-topic', 'test', 0, False)
+
+    assert hass.data['mqtt'].publish_stats.published == 0
+
+
+async def test_mqtt_ws_publish_diagnostics(hass, hass_ws_client):
+    """Test the MQTT publish diagnostics websocket command."""
+    mqtt_client = await async_mock_mqtt_client(hass)
+    mqtt_client.publish.return_value = (0, 0)
+
+    await hass.data['mqtt'].async_publish('test-topic', 'test', 0, False)
+
+    client = await hass_ws_client(hass)
+    await client.send_json({
+        'id': 5,
+        'type': 'mqtt/publish_diagnostics',
+    })
+    response = await client.receive_json()
+    assert response['success']
+    assert response['result']['published'] == 1
+    assert response['result']['batches'] == 1
+    assert response['result']['coalesced'] == 0
+    assert response['result']['queue_depth'] == 0
@@ -0,0 +1,52 @@
+"""The tests for the MQTT topic trie."""
+import pytest
+
+from homeassistant.components.mqtt.trie import TopicTrie
+
+
+@pytest.mark.parametrize('topic_filter, topic, matches', [
+    ('a/b/c', 'a/b/c', True),
+    ('a/b/c', 'a/b', False),
+    ('a/b', 'a/b/c', False),
+    ('a/+/c', 'a/b/c', True),
+    ('a/+/c', 'a/b/d', False),
+    ('+/+', 'a/b', True),
+    ('+', 'a/b', False),
+    ('a/+', 'a/', True),
+    ('a/#', 'a', True),
+    ('a/#', 'a/b/c', True),
+    ('a/#', 'b/c', False),
+    ('#', 'a/b/c', True),
+    ('#', '$SYS/broker', False),
+    ('+/broker', '$SYS/broker', False),
+    ('$SYS/#', '$SYS/broker', True),
+    ('$SYS/+', '$SYS/broker', True),
+])
+def test_match(topic_filter, topic, matches):
+    """Test matching a topic against a filter."""
+    trie = TopicTrie()
+    trie.add(topic_filter, 'value')
+
+    assert trie.match(topic) == (['value'] if matches else [])
+
+
+def test_match_order_and_remove():
+    """Test matches are in insertion order and removed filters are pruned."""
+    trie = TopicTrie()
+    trie.add('a/#', 1)
+    trie.add('a/b', 2)
+    trie.add('+/b', 3)
+    trie.add('a/b', 4)
+
+    assert trie.match('a/b') == [1, 2, 3, 4]
+
+    trie.remove('a/b', 2)
+    assert trie.match('a/b') == [1, 3, 4]
+
+    trie.remove('a/b', 4)
+    trie.remove('a/#', 1)
+    assert trie.match('a/b') == [3]
+    assert 'a' not in trie._root.children
+
+    with pytest.raises(ValueError):
+        trie.remove('a/b', 2)
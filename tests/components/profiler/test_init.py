@@ -0,0 +1,140 @@
+"""Test the profiler component."""
+import asyncio
+from unittest.mock import patch
+
+from homeassistant.components import profiler
+from homeassistant.const import EVENT_HOMEASSISTANT_STOP
+from homeassistant.core import callback
+from homeassistant.helpers.event import (
+    async_track_state_change, async_track_template)
+from homeassistant.helpers.template import Template
+from homeassistant.setup import async_setup_component
+from homeassistant.util.profiling import (
+    CATEGORY_LISTENER, CATEGORY_SERVICE)
+
+from tests.common import async_mock_service
+
+
+async def setup_profiler(hass):
+    """Set up the profiler timing every job."""
+    assert await async_setup_component(hass, profiler.DOMAIN, {
+        profiler.DOMAIN: {
+            profiler.CONF_SAMPLE_RATE: 1,
+            profiler.CONF_LAG_INTERVAL: 0.01,
+        }
+    })
+    await hass.async_block_till_done()
+
+
+async def test_listener_and_service_durations(hass):
+    """Test the durations of listeners and services are recorded."""
+    await setup_profiler(hass)
+
+    @callback
+    def listener(event):
+        """Handle the test event."""
+
+    hass.bus.async_listen('test_event', listener)
+    hass.bus.async_fire('test_event')
+    async_mock_service(hass, 'test', 'service')
+    await hass.services.async_call('test', 'service', blocking=True)
+    await hass.async_block_till_done()
+
+    jobs = hass.profiler.jobs
+    name = '{}.{}'.format(__name__, listener.__qualname__)
+    assert jobs[CATEGORY_LISTENER][name].count == 1
+    assert jobs[CATEGORY_SERVICE]['test.service'].count == 1
+
+
+async def test_tracked_listener_names(hass):
+    """Test listeners of the event helpers are named after their action."""
+    await setup_profiler(hass)
+
+    @callback
+    def state_action(entity_id, old_state, new_state):
+        """Handle the state change."""
+
+    @callback
+    def template_action(entity_id, old_state, new_state):
+        """Handle the template turning true."""
+
+    async_track_state_change(hass, 'light.kitchen', state_action)
+    async_track_template(
+        hass, Template("{{ is_state('light.kitchen', 'on') }}", hass),
+        template_action)
+    hass.states.async_set('light.kitchen', 'on')
+    await hass.async_block_till_done()
+
+    listeners = hass.profiler.jobs[CATEGORY_LISTENER]
+    for action in (state_action, template_action):
+        name = '{}.{}'.format(__name__, action.__qualname__)
+        assert listeners[name].count == 1
+
+
+async def test_loop_lag(hass):
+    """Test the loop lag is tracked until stop."""
+    await setup_profiler(hass)
+    await asyncio.sleep(0.05)
+
+    count = hass.profiler.loop_lag.count
+    assert count > 0
+
+    hass.bus.async_fire(EVENT_HOMEASSISTANT_STOP)
+    await hass.async_block_till_done()
+    assert hass.profiler is None
+
+
+async def test_dump_service(hass):
+    """Test dumping and resetting the durations."""
+    await setup_profiler(hass)
+    hass.profiler.record(CATEGORY_SERVICE, 'light.turn_on', 0.5)
+
+    with patch('homeassistant.components.profiler.save_json') as mock_save:
+        await hass.services.async_call(
+            profiler.DOMAIN, profiler.SERVICE_DUMP,
+            {profiler.ATTR_RESET: True}, blocking=True)
+
+    path, data = mock_save.mock_calls[0][1]
+    assert path == hass.config.path(profiler.PROFILE_FILE)
+    assert data['jobs'][CATEGORY_SERVICE]['light.turn_on']['max'] == 0.5
+    # Only the dump service itself was recorded after the reset
+    assert list(hass.profiler.jobs[CATEGORY_SERVICE]) == ['profiler.dump']
+
+
+async def test_websocket_stats(hass, hass_ws_client):
+    """Test fetching the durations over the websocket API."""
+    await setup_profiler(hass)
+    hass.profiler.record(CATEGORY_SERVICE, 'light.turn_on', 0.5)
+    client = await hass_ws_client(hass)
+
+    await client.send_json({
+        'id': 5,
+        'type': profiler.WS_TYPE_STATS,
+    })
+    msg = await client.receive_json()
+
+    assert msg['success']
+    stats = msg['result']['jobs'][CATEGORY_SERVICE]['light.turn_on']
+    assert stats['count'] == 1
+    assert stats['histogram']['500ms'] == 1
+
+
+async def test_sensors(hass):
+    """Test the profiler sensors."""
+    await setup_profiler(hass)
+    hass.profiler.record(CATEGORY_SERVICE, 'light.turn_on', 0.5)
+    hass.profiler.record(CATEGORY_SERVICE, 'light.turn_off', 0.2)
+    await asyncio.sleep(0.05)
+    await hass.helpers.entity_component.async_update_entity(
+        'sensor.slowest_service')
+    await hass.helpers.entity_component.async_update_entity(
+        'sensor.event_loop_lag')
+
+    state = hass.states.get('sensor.slowest_service')
+    assert state.state == 'light.turn_on'
+    assert [job['name'] for job in state.attributes['slowest']] == \
+        ['light.turn_on', 'light.turn_off']
+
+    state = hass.states.get('sensor.event_loop_lag')
+    assert state.attributes['samples'] > 0
+    assert float(state.state) >= 0
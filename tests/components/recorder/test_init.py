@@ -10,7 +10,8 @@ from homeassistant.const import MATCH_ALL
 from homeassistant.components.recorder import Recorder
 from homeassistant.components.recorder.const import DATA_INSTANCE
 from homeassistant.components.recorder.util import session_scope
-from homeassistant.components.recorder.models import States, Events
+from homeassistant.components.recorder.models import (
+    Events, NumericStates, StateAttributes, States)
 
 from tests.common import get_test_home_assistant, init_recorder_component
 
@@ -202,3 +203,99 @@ def test_recorder_setup_failure():
         rec.join()
 
     hass.stop()
+
+
+def test_saving_states_in_batches(hass_recorder):
+    """Test a burst of state changes is saved with linked events."""
+    hass = hass_recorder({'commit_interval': 0.1})
+    entity_ids = ['test.recorder{}'.format(idx) for idx in range(20)]
+
+    for entity_id in entity_ids:
+        hass.states.set(entity_id, 'on')
+    hass.block_till_done()
+    hass.data[DATA_INSTANCE].block_till_done()
+
+    with session_scope(hass=hass) as session:
+        db_states = list(session.query(States))
+        assert sorted(st.entity_id for st in db_states) == sorted(entity_ids)
+        for db_state in db_states:
+            db_event = session.query(Events).get(db_state.event_id)
+            assert db_event.event_type == 'state_changed'
+
+
+def test_pending_events_written_on_stop():
+    """Test pending events are written when the recorder stops."""
+    hass = get_test_home_assistant()
+    init_recorder_component(hass, {'commit_interval': 30})
+    hass.start()
+    instance = hass.data[DATA_INSTANCE]
+
+    hass.states.set('test.recorder', 'on')
+    hass.block_till_done()
+
+    with patch.object(instance, '_close_connection'):
+        hass.stop()
+
+    with session_scope(session=instance.get_session()) as session:
+        assert session.query(States).count() == 1
+
+
+def test_saving_batch_with_failing_event():
+    """Test the other events of a batch are saved if one fails."""
+    from sqlalchemy import exc
+
+    hass = get_test_home_assistant()
+    init_recorder_component(hass, {'commit_interval': 30})
+    hass.start()
+    instance = hass.data[DATA_INSTANCE]
+    write_events = instance._write_events
+    batch_sizes = []
+
+    def fail_bad_state(session, events):
+        """Fail to write test.bad."""
+        batch_sizes.append(len(events))
+        if any(event.data.get('entity_id') == 'test.bad' for event in events):
+            raise exc.IntegrityError('INSERT', {}, Exception())
+        write_events(session, events)
+
+    for entity_id in ('test.good1', 'test.bad', 'test.good2'):
+        hass.states.set(entity_id, 'on')
+    hass.block_till_done()
+
+    with patch.object(instance, '_write_events',
+                      side_effect=fail_bad_state), \
+            patch.object(instance, '_close_connection'):
+        hass.stop()
+
+    assert batch_sizes[0] > 1
+    assert batch_sizes[1:] == [1] * batch_sizes[0]
+
+    with session_scope(session=instance.get_session()) as session:
+        assert sorted(state.entity_id for state in session.query(States)) == \
+            ['test.good1', 'test.good2']
+
+
+def test_saving_numeric_states(hass_recorder):
+    """Test numeric sensor states are stored compactly."""
+    hass = hass_recorder({'compact_numeric_states': True})
+    attributes = {'unit_of_measurement': 'W'}
+
+    for value in ('10', '11.5', '12'):
+        hass.states.set('sensor.power', value, attributes)
+    hass.states.set('sensor.power_other', '5', attributes)
+    hass.states.set('sensor.text', 'on', attributes)
+    hass.block_till_done()
+    hass.data[DATA_INSTANCE].block_till_done()
+
+    with session_scope(hass=hass) as session:
+        db_states = list(session.query(NumericStates).order_by(
+            NumericStates.numeric_state_id))
+        assert [(st.entity_id, st.state) for st in db_states] == [
+            ('sensor.power', 10), ('sensor.power', 11.5),
+            ('sensor.power', 12), ('sensor.power_other', 5)]
+        assert session.query(StateAttributes).count() == 1
+
+        assert [st.entity_id for st in session.query(States)] == \
+            ['sensor.text']
+        assert session.query(Events).filter(
+            Events.event_type == 'state_changed').count() == 1
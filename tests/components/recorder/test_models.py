@@ -9,7 +9,7 @@ import homeassistant.core as ha
 from homeassistant.const import EVENT_STATE_CHANGED
 from homeassistant.util import dt
 from homeassistant.components.recorder.models import (
-    Base, Events, States, RecorderRuns)
+    Base, Events, NumericStates, States, RecorderRuns)
 
 ENGINE = None
 SESSION = None
@@ -79,6 +79,76 @@ class TestStates(unittest.TestCase):
         assert db_state.last_updated == event.time_fired
 
 
+class TestNumericStates(unittest.TestCase):
+    """Test NumericStates model."""
+
+    # pylint: disable=no-self-use
+
+    def test_is_numeric(self):
+        """Test which states are stored as numeric states."""
+        unit = {'unit_of_measurement': 'W'}
+        assert NumericStates.is_numeric(ha.State('sensor.power', '1.5', unit))
+        assert not NumericStates.is_numeric(ha.State('sensor.power', '1.5'))
+        assert not NumericStates.is_numeric(
+            ha.State('sensor.power', 'unknown', unit))
+        assert not NumericStates.is_numeric(
+            ha.State('climate.heater', '20', unit))
+        for value in ('nan', 'inf', '-inf'):
+            assert not NumericStates.is_numeric(
+                ha.State('sensor.power', value, unit))
+        # States that would not round trip are kept as text
+        for value in ('21.0', '10.50', '0012', '1e16', '+5'):
+            assert not NumericStates.is_numeric(
+                ha.State('sensor.power', value, unit))
+        for value in ('-3', '0.1', '1234567.89'):
+            assert NumericStates.is_numeric(
+                ha.State('sensor.power', value, unit))
+
+    def test_state_column_double_on_mysql(self):
+        """Test numeric states are stored in double precision on MySQL."""
+        from sqlalchemy.dialects import mysql
+
+        assert NumericStates.__table__.c.state.type.compile(
+            dialect=mysql.dialect()) == 'DOUBLE'
+        assert not NumericStates.is_numeric(None)
+
+    def test_from_event(self):
+        """Test converting event to db numeric state."""
+        attributes = {'unit_of_measurement': 'W'}
+        for value in ('18', '18.5', '1234567.89'):
+            state = ha.State('sensor.power', value, attributes)
+            event = ha.Event(EVENT_STATE_CHANGED, {
+                'entity_id': 'sensor.power',
+                'old_state': None,
+                'new_state': state,
+            })
+            native = NumericStates.from_event(event).to_native(attributes)
+
+            assert native.entity_id == state.entity_id
+            assert native.state == value
+            assert native.attributes == attributes
+            assert native.last_changed == state.last_changed
+            assert native.last_updated == state.last_updated
+
+    def test_from_event_attributes_changed(self):
+        """Test the last changed time of a numeric state is kept."""
+        attributes = {'unit_of_measurement': 'W'}
+        last_changed = datetime(2016, 7, 9, 11, 0, 0, tzinfo=dt.UTC)
+        last_updated = datetime(2016, 7, 9, 11, 5, 0, tzinfo=dt.UTC)
+        state = ha.State('sensor.power', '18', attributes,
+                         last_changed, last_updated)
+        event = ha.Event(EVENT_STATE_CHANGED, {
+            'entity_id': 'sensor.power',
+            'old_state': None,
+            'new_state': state,
+        })
+
+        native = NumericStates.from_event(event).to_native(attributes)
+
+        assert native.last_changed == last_changed
+        assert native.last_updated == last_updated
+
+
 class TestRecorderRuns(unittest.TestCase):
     """Test recorder run model."""
 
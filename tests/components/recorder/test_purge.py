@@ -2,12 +2,14 @@
 import json
 from datetime import datetime, timedelta
 import unittest
-from unittest.mock import patch
+from unittest.mock import call, patch
 
 from homeassistant.components import recorder
 from homeassistant.components.recorder.const import DATA_INSTANCE
-from homeassistant.components.recorder.purge import purge_old_data
-from homeassistant.components.recorder.models import States, Events
+from homeassistant.components.recorder.purge import (
+    _repack_sqlite, purge_old_data)
+from homeassistant.components.recorder.models import (
+    Events, NumericStates, StateAttributes, States)
 from homeassistant.components.recorder.util import session_scope
 from tests.common import get_test_home_assistant, init_recorder_component
 
@@ -117,6 +119,38 @@ class TestRecorderPurge(unittest.TestCase):
             # we should only have 2 events left
             assert events.count() == 2
 
+    def test_purge_old_numeric_states(self):
+        """Test deleting old numeric states and unused attributes."""
+        now = datetime.now()
+        eleven_days_ago = now - timedelta(days=11)
+
+        self.hass.block_till_done()
+        self.hass.data[DATA_INSTANCE].block_till_done()
+
+        with session_scope(hass=self.hass) as session:
+            for attributes_id, timestamp in ((1, eleven_days_ago),
+                                             (2, eleven_days_ago),
+                                             (2, now)):
+                session.add(NumericStates(
+                    entity_id='sensor.power',
+                    state=attributes_id,
+                    attributes_id=attributes_id,
+                    last_updated=timestamp,
+                ))
+            for attributes_id in (1, 2):
+                session.add(StateAttributes(
+                    attributes_id=attributes_id,
+                    hash=attributes_id,
+                    shared_attrs='{}',
+                ))
+
+        with session_scope(hass=self.hass) as session:
+            purge_old_data(self.hass.data[DATA_INSTANCE], 4, repack=False)
+
+            assert session.query(NumericStates).count() == 1
+            assert [attrs.attributes_id for attrs
+                    in session.query(StateAttributes)] == [2]
+
     def test_purge_method(self):
         """Test purge method."""
         service_data = {'keep_days': 4}
@@ -170,5 +204,77 @@ class TestRecorderPurge(unittest.TestCase):
                                         service_data=service_data)
                 self.hass.block_till_done()
                 self.hass.data[DATA_INSTANCE].block_till_done()
-                assert mock_logger.debug.mock_calls[3][1][0] == \
-                    "Vacuuming SQLite to free space"
+                assert call("Vacuuming SQLite to free space") in \
+                    mock_logger.debug.mock_calls
+
+            # run purge method - with repack, now incrementally
+            with patch('homeassistant.components.recorder.purge._LOGGER') \
+                    as mock_logger:
+                self.hass.services.call('recorder', 'purge',
+                                        service_data=service_data)
+                self.hass.block_till_done()
+                self.hass.data[DATA_INSTANCE].block_till_done()
+                assert call("Incrementally vacuuming SQLite to free space") \
+                    in mock_logger.debug.mock_calls
+
+    def test_purge_old_states_in_batches(self):
+        """Test old states are purged in batches."""
+        self._add_test_states()
+
+        with session_scope(hass=self.hass) as session, \
+                patch('homeassistant.components.recorder.purge.'
+                      'MAX_ROWS_TO_PURGE', 3):
+            states = session.query(States)
+
+            assert not purge_old_data(
+                self.hass.data[DATA_INSTANCE], 4, repack=False)
+            assert states.count() == 3
+
+            assert purge_old_data(
+                self.hass.data[DATA_INSTANCE], 4, repack=False)
+            assert states.count() == 2
+
+    def test_purge_method_in_batches(self):
+        """Test the purge service continues purging in batches."""
+        self._add_test_events()
+        self._add_test_states()
+
+        with session_scope(hass=self.hass) as session, \
+                patch('homeassistant.components.recorder.purge.'
+                      'MAX_ROWS_TO_PURGE', 1):
+            self.hass.services.call('recorder', 'purge',
+                                    service_data={'keep_days': 4})
+            self.hass.block_till_done()
+            self.hass.data[DATA_INSTANCE].block_till_done()
+
+            assert session.query(States).count() == 2
+            assert session.query(Events).filter(
+                Events.event_type.like("EVENT_TEST%")).count() == 2
+
+
+def test_repack_sqlite_file(tmpdir):
+    """Test repacking a file database switches to incremental vacuum."""
+    from sqlalchemy import create_engine
+
+    engine = create_engine('sqlite:///{}'.format(tmpdir.join('test.db')))
+
+    def fill_and_empty():
+        """Add rows and delete them again to create free pages."""
+        engine.execute('CREATE TABLE IF NOT EXISTS test (data TEXT)')
+        engine.execute('INSERT INTO test VALUES (?)',
+                       [('x' * 1000,) for _ in range(500)])
+        engine.execute('DELETE FROM test')
+        assert engine.execute('PRAGMA freelist_count').scalar() > 0
+
+    fill_and_empty()
+    _repack_sqlite(engine)
+    assert engine.execute('PRAGMA auto_vacuum').scalar() == 2
+    assert engine.execute('PRAGMA freelist_count').scalar() == 0
+
+    fill_and_empty()
+    with patch('homeassistant.components.recorder.purge._LOGGER') \
+            as mock_logger:
+        _repack_sqlite(engine)
+    assert call("Incrementally vacuuming SQLite to free space") in \
+        mock_logger.debug.mock_calls
+    assert engine.execute('PRAGMA freelist_count').scalar() == 0
@@ -122,7 +122,7 @@ class TestFilterSensor(unittest.TestCase):
                              precision=2,
                              entity=None,
                              radius=1.1)
-        self.values[-1].state = 22
+        self.values[-1] = self.values[-1].evolve(state=22)
         for state in self.values:
             filtered = filt.filter_state(state)
         assert 22 == filtered.state
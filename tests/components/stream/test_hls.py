@@ -1,9 +1,18 @@
 """The tests for hls streams."""
+import asyncio
 from datetime import timedelta
+import io
+from unittest.mock import MagicMock, patch
 from urllib.parse import urlparse
 
+from aiohttp import web
+import pytest
+
 from homeassistant.setup import async_setup_component
-from homeassistant.components.stream import request_stream
+from homeassistant.components.stream import Stream, request_stream
+from homeassistant.components.stream.core import Segment, StreamSettings
+from homeassistant.components.stream.hls import (
+    HlsPlaylistView, M3U8Renderer)
 import homeassistant.util.dt as dt_util
 
 from tests.common import async_fire_time_changed
@@ -115,3 +124,56 @@ async def test_stream_ended(hass):
 
     # Stop stream, if it hasn't quit already
     stream.stop()
+
+
+async def test_keep_warm(hass):
+    """Test the segments of the last keep_warm seconds are kept."""
+    stream = Stream(hass, 'source', settings=StreamSettings(keep_warm=10))
+    track = stream.add_provider('hls')
+
+    for sequence in range(1, 7):
+        track.put(Segment(sequence, io.BytesIO(b'data'), 2))
+
+    assert track.segments == [2, 3, 4, 5, 6]
+
+
+async def test_low_latency_segment_in_progress(hass):
+    """Test the segment in progress is served as it is recorded."""
+    stream = Stream(hass, 'source', settings=StreamSettings(low_latency=True))
+    track = stream.add_provider('hls')
+    track.put(Segment(1, io.BytesIO(b'first'), 2))
+
+    track.put_part(2, b'ab')
+    assert await track.recv_part(2, 0) == b'ab'
+
+    playlist = M3U8Renderer(stream).render(track, dt_util.utcnow())
+    assert '#EXT-X-SERVER-CONTROL:CAN-BLOCK-RELOAD=YES' in playlist
+    assert playlist.endswith('#EXT-X-PREFETCH:./segment/2.ts\n')
+
+    recv = hass.async_create_task(track.recv_part(2, 2))
+    wait = hass.async_create_task(track.wait_segment(2))
+    await asyncio.sleep(0)
+    track.put_part(2, b'cd')
+    assert await recv == b'cd'
+    assert not wait.done()
+
+    # The segment is complete
+    track.put(Segment(2, io.BytesIO(b'abcdef'), 2))
+    assert await wait
+    assert await track.recv_part(2, 4) == b'ef'
+    assert await track.recv_part(2, 6) == b''
+    assert await track.recv_part(3, 0) is None
+    assert track.part_sequence is None
+
+
+async def test_low_latency_playlist_stream_ended(hass):
+    """Test a blocking reload of a stream that ended without segments."""
+    stream = Stream(hass, 'source', settings=StreamSettings(low_latency=True))
+    track = stream.add_provider('hls')
+    request = MagicMock(query={'_HLS_msn': '1'})
+
+    with patch.object(stream, 'start',
+                      side_effect=lambda: hass.loop.call_soon(
+                          track.put, None)), \
+            pytest.raises(web.HTTPNotFound):
+        await HlsPlaylistView().handle(request, stream, None)
@@ -177,7 +177,7 @@ async def test_get_states(hass, websocket_client):
 
     states = []
     for state in hass.states.async_all():
-        state = state.as_dict()
+        state = dict(state.as_dict())
         state['last_changed'] = state['last_changed'].isoformat()
         state['last_updated'] = state['last_updated'].isoformat()
         states.append(state)
@@ -333,3 +333,116 @@ async def test_get_states_not_allows_nan(hass, websocket_client):
     msg = await websocket_client.receive_json()
     assert not msg['success']
     assert msg['error']['code'] == const.ERR_UNKNOWN_ERROR
+
+
+async def test_subscribe_states_filtered(hass, websocket_client):
+    """Test subscribing to the state changes of filtered entities."""
+    await websocket_client.send_json({
+        'id': 5,
+        'type': 'subscribe_states',
+        'entity_ids': ['light.kitchen'],
+        'domains': ['switch'],
+        'globs': ['sensor.*_temperature'],
+    })
+
+    msg = await websocket_client.receive_json()
+    assert msg['id'] == 5
+    assert msg['success']
+
+    hass.states.async_set('light.bedroom', 'on')
+    hass.states.async_set('sensor.outside_humidity', '80')
+    hass.states.async_set('light.kitchen', 'on')
+    hass.states.async_set('switch.fan', 'off')
+    hass.states.async_set('sensor.outside_temperature', '12')
+
+    received = []
+    for _ in range(3):
+        with timeout(3, loop=hass.loop):
+            msg = await websocket_client.receive_json()
+        assert msg['id'] == 5
+        assert msg['type'] == 'event'
+        assert msg['event']['event_type'] == 'state_changed'
+        received.append(msg['event']['data']['entity_id'])
+
+    assert received == [
+        'light.kitchen', 'switch.fan', 'sensor.outside_temperature']
+
+    await websocket_client.send_json({
+        'id': 6,
+        'type': 'unsubscribe_events',
+        'subscription': 5
+    })
+
+    msg = await websocket_client.receive_json()
+    assert msg['id'] == 6
+    assert msg['success']
+
+
+async def test_subscribe_states_diff(hass, websocket_client):
+    """Test subscribing to the changes of states."""
+    hass.states.async_set('light.kitchen', 'off', {'brightness': 0})
+    hass.states.async_set('light.bedroom', 'off')
+
+    await websocket_client.send_json({
+        'id': 5,
+        'type': 'subscribe_states',
+        'entity_ids': ['light.kitchen'],
+        'diff': True,
+    })
+
+    msg = await websocket_client.receive_json()
+    assert msg['success']
+
+    msg = await websocket_client.receive_json()
+    assert msg['id'] == 5
+    assert list(msg['event']['changed']) == ['light.kitchen']
+    initial = msg['event']['changed']['light.kitchen']
+    assert initial['state'] == 'off'
+    assert initial['attributes'] == {'brightness': 0}
+
+    hass.states.async_set('light.kitchen', 'on', {
+        'brightness': 100, 'color': 'red'})
+    msg = await websocket_client.receive_json()
+    changes = msg['event']['changed']['light.kitchen']
+    assert changes['state'] == 'on'
+    assert changes['attributes'] == {'brightness': 100, 'color': 'red'}
+    assert 'last_changed' in changes
+    assert 'removed_attributes' not in changes
+
+    hass.states.async_set('light.kitchen', 'on', {'brightness': 100})
+    msg = await websocket_client.receive_json()
+    changes = msg['event']['changed']['light.kitchen']
+    assert 'state' not in changes
+    assert 'attributes' not in changes
+    assert changes['removed_attributes'] == ['color']
+
+    hass.states.async_remove('light.kitchen')
+    msg = await websocket_client.receive_json()
+    assert msg['event'] == {'removed': ['light.kitchen']}
+
+
+async def test_subscribe_states_filters_visible(
+        hass, hass_admin_user, websocket_client):
+    """Test only the state changes of visible entities are forwarded."""
+    hass_admin_user.mock_policy({
+        'entities': {
+            'entity_ids': {
+                'test.entity': True
+            }
+        }
+    })
+
+    await websocket_client.send_json({
+        'id': 5,
+        'type': 'subscribe_states',
+        'domains': ['test'],
+    })
+
+    msg = await websocket_client.receive_json()
+    assert msg['success']
+
+    hass.states.async_set('test.not_visible_entity', 'invisible')
+    hass.states.async_set('test.entity', 'hello')
+
+    msg = await websocket_client.receive_json()
+    assert msg['event']['data']['entity_id'] == 'test.entity'
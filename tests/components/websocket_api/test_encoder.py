@@ -0,0 +1,79 @@
+"""Tests for the websocket API message encoder."""
+import json
+import sys
+from unittest.mock import patch
+
+import pytest
+
+from homeassistant.const import EVENT_STATE_CHANGED
+from homeassistant.core import Event, State
+from homeassistant.components.websocket_api import encoder
+
+
+def test_state_json_cached():
+    """Test the JSON of a state is encoded once."""
+    msg_encoder = encoder.MessageEncoder()
+    state = State('light.kitchen', 'on', {'brightness': 100})
+
+    encoded = msg_encoder.async_state_json(state)
+    assert json.loads(encoded) == json.loads(encoder.JSON_DUMP(state))
+    assert msg_encoder.async_state_json(state) is encoded
+
+    new_state = state.evolve(state='off')
+    assert json.loads(
+        msg_encoder.async_state_json(new_state))['state'] == 'off'
+    assert msg_encoder.async_state_json(None) == 'null'
+
+
+def test_state_changed_event_json():
+    """Test state changed events are built from the JSON of the states."""
+    msg_encoder = encoder.MessageEncoder()
+    old_state = State('light.kitchen', 'off')
+    new_state = State('light.kitchen', 'on', {'brightness': 100})
+    event = Event(EVENT_STATE_CHANGED, {
+        'entity_id': 'light.kitchen',
+        'old_state': old_state,
+        'new_state': new_state,
+    })
+
+    encoded = msg_encoder.async_event_json(event)
+    assert json.loads(encoded) == json.loads(encoder.JSON_DUMP(event))
+    assert msg_encoder.async_event_json(event) is encoded
+
+    # The new state is shared with get_states
+    assert msg_encoder.async_state_json(new_state) in encoded
+
+
+def test_event_message():
+    """Test encoding an event message."""
+    msg_encoder = encoder.MessageEncoder()
+    event = Event('test_event', {'hello': 'world'})
+
+    msg = json.loads(msg_encoder.async_event_message(5, event))
+    assert msg['id'] == 5
+    assert msg['type'] == 'event'
+    assert msg['event']['data'] == {'hello': 'world'}
+
+    msg = msg_encoder.async_event_message(
+        6, Event('test_event', {'hello': float('nan')}))
+    assert msg['id'] == 6
+    assert not msg['success']
+
+
+def test_orjson_backend():
+    """Test the orjson backend encodes like the json module."""
+    pytest.importorskip('orjson')
+    dump = encoder.get_json_dump(encoder.JSON_BACKEND_ORJSON)
+    assert dump is not encoder.JSON_DUMP
+
+    event = Event('test_event', {'state': State('light.kitchen', 'on'),
+                                 'ids': {'a'}, 1: 2})
+    assert json.loads(dump(event)) == json.loads(encoder.JSON_DUMP(event))
+
+
+def test_missing_backend_falls_back():
+    """Test the json module is used if the backend is not installed."""
+    with patch.dict(sys.modules, {'orjson': None}):
+        dump = encoder.get_json_dump(encoder.JSON_BACKEND_ORJSON)
+
+    assert dump is encoder.JSON_DUMP
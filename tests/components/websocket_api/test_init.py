@@ -5,7 +5,9 @@ from unittest.mock import patch, Mock
 from aiohttp import WSMsgType
 import pytest
 
+from homeassistant.setup import async_setup_component
 from homeassistant.components.websocket_api import const, messages
+from homeassistant.components.websocket_api.http import URL
 
 
 @pytest.fixture
@@ -90,3 +92,49 @@ async def test_handler_failing(hass, websocket_client):
     assert msg['type'] == const.TYPE_RESULT
     assert not msg['success']
     assert msg['error']['code'] == const.ERR_UNKNOWN_ERROR
+
+
+async def test_coalesce_messages(hass, websocket_client):
+    """Test pending messages are sent in one frame if enabled."""
+    await websocket_client.send_json({
+        'id': 5,
+        'type': 'supported_features',
+        'features': {const.FEATURE_COALESCE_MESSAGES: 1},
+    })
+    msg = await websocket_client.receive_json()
+    assert msg == [{
+        'id': 5,
+        'type': const.TYPE_RESULT,
+        'success': True,
+        'result': None,
+    }]
+
+    await websocket_client.send_json({
+        'id': 6,
+        'type': 'subscribe_events',
+        'event_type': 'test_event',
+    })
+    msg = await websocket_client.receive_json()
+    assert msg[0]['success']
+
+    for idx in range(3):
+        hass.bus.async_fire('test_event', {'idx': idx})
+
+    msg = await websocket_client.receive_json()
+    assert [event['event']['data']['idx'] for event in msg] == [0, 1, 2]
+
+
+async def test_compress_remote_clients(hass, aiohttp_client):
+    """Test only remote clients negotiate compression."""
+    assert await async_setup_component(hass, 'websocket_api')
+    client = await aiohttp_client(hass.http.app)
+
+    websocket = await client.ws_connect(URL, compress=15)
+    assert not websocket.compress
+    await websocket.close()
+
+    with patch('homeassistant.components.websocket_api.http.is_local',
+               return_value=False):
+        websocket = await client.ws_connect(URL, compress=15)
+    assert websocket.compress == 15
+    await websocket.close()
@@ -0,0 +1,53 @@
+"""The tests for the zone index."""
+import random
+
+import pytest
+
+from homeassistant.components.zone.index import ZoneIndex
+from homeassistant.util.location import distance
+
+
+@pytest.mark.parametrize('latitude, longitude, radius', [
+    (32.8806, -117.237561, 250),
+    (0, 179.9999, 1000),
+    (-33.9, 0.0001, 5000),
+    (89.99, 10, 100),
+    (52.37, 4.89, 200000),
+])
+def test_candidates_contain_matching_zones(latitude, longitude, radius):
+    """Test the candidates include every zone containing a location."""
+    rnd = random.Random(42)
+    index = ZoneIndex()
+    zones = {}
+    for idx in range(300):
+        zone = (
+            max(-89.9, min(89.9, latitude + rnd.uniform(-0.5, 0.5))),
+            (longitude + rnd.uniform(-0.5, 0.5) + 180) % 360 - 180,
+            rnd.choice((50, 500, 5000)))
+        zones['zone.{}'.format(idx)] = zone
+        index.add('zone.{}'.format(idx), *zone)
+
+    for _ in range(50):
+        point = (
+            max(-89.9, min(89.9, latitude + rnd.uniform(-0.3, 0.3))),
+            (longitude + rnd.uniform(-0.3, 0.3) + 180) % 360 - 180)
+        candidates = index.candidates(point[0], point[1], radius)
+        assert candidates <= set(zones)
+
+        for entity_id, (zone_lat, zone_lon, zone_radius) in zones.items():
+            if distance(point[0], point[1], zone_lat, zone_lon) - radius \
+                    < zone_radius:
+                assert entity_id in candidates
+
+
+def test_candidates_exclude_distant_zones():
+    """Test zones far away from a location are not candidates."""
+    index = ZoneIndex()
+    index.add('zone.home', 32.8806, -117.237561, 250)
+    index.add('zone.work', 33.2, -116.9, 100)
+    index.add('zone.country', 32.8806, -117.237561, 500000)
+
+    assert index.candidates(32.8806, -117.237561) == {
+        'zone.home', 'zone.country'}
+    assert index.candidates(33.2, -116.9) == {'zone.work', 'zone.country'}
+    assert index.candidates(52.37, 4.89) == {'zone.country'}
@@ -221,3 +221,33 @@ class TestComponentZone(unittest.TestCase):
 
         assert zone.zone.in_zone(self.hass.states.get('zone.passive_zone'),
                                  latitude, longitude)
+
+
+async def test_active_zone_after_zone_changed(hass):
+    """Test the active zone follows changes of the zones."""
+    latitude = 32.880600
+    longitude = -117.237561
+    assert zone.zone.async_active_zone(hass, latitude, longitude) is None
+
+    hass.states.async_set('zone.work', 'zoning', {
+        'latitude': latitude,
+        'longitude': longitude,
+        'radius': 250,
+    })
+    await hass.async_block_till_done()
+    active = zone.zone.async_active_zone(hass, latitude, longitude)
+    assert active.entity_id == 'zone.work'
+
+    hass.states.async_set('zone.work', 'zoning', {
+        'latitude': 52.37,
+        'longitude': 4.89,
+        'radius': 250,
+    })
+    await hass.async_block_till_done()
+    assert zone.zone.async_active_zone(hass, latitude, longitude) is None
+    active = zone.zone.async_active_zone(hass, 52.37, 4.89)
+    assert active.entity_id == 'zone.work'
+
+    hass.states.async_remove('zone.work')
+    await hass.async_block_till_done()
+    assert zone.zone.async_active_zone(hass, 52.37, 4.89) is None
@@ -10,7 +10,7 @@ import pytest
 from homeassistant.core import callback
 from homeassistant.setup import setup_component
 import homeassistant.core as ha
-from homeassistant.const import MATCH_ALL
+from homeassistant.const import EVENT_TIME_CHANGED, MATCH_ALL
 from homeassistant.helpers.event import (
     async_call_later,
     call_later,
@@ -21,6 +21,7 @@ from homeassistant.helpers.event import (
     track_state_change,
     track_time_interval,
     track_template,
+    track_template_result,
     track_same_state,
     track_sunrise,
     track_sunset,
@@ -85,6 +86,31 @@ class TestEventHelpers(unittest.TestCase):
         self.hass.block_till_done()
         assert 2 == len(runs)
 
+    def test_track_point_in_time_shares_listener(self):
+        """Test time trackers share a single time changed listener."""
+        runs = []
+        before = self.hass.bus.listeners.get(EVENT_TIME_CHANGED, 0)
+        birthday = datetime(1987, 5, 10, 10, 0, 0, tzinfo=dt_util.UTC)
+
+        unsubs = [
+            track_point_in_utc_time(
+                self.hass, callback(lambda x: runs.append(x)),
+                birthday + timedelta(minutes=idx))
+            for idx in range(10)]
+        track_utc_time_change(
+            self.hass, callback(lambda x: runs.append(x)), second=30)
+
+        assert self.hass.bus.listeners[EVENT_TIME_CHANGED] <= before + 1
+
+        unsubs[1]()
+        self._send_time_changed(birthday + timedelta(minutes=2))
+        self.hass.block_till_done()
+        assert [birthday + timedelta(minutes=2)] * 2 == runs
+
+        self._send_time_changed(birthday + timedelta(minutes=2, seconds=30))
+        self.hass.block_till_done()
+        assert 3 == len(runs)
+
     def test_track_state_change(self):
         """Test track_state_change."""
         # 2 lists to track how often our callbacks get called
@@ -235,6 +261,109 @@ class TestEventHelpers(unittest.TestCase):
         assert 2 == len(wildcard_runs)
         assert 2 == len(wildercard_runs)
 
+    def test_track_template_result_domain(self):
+        """Test a template iterating a domain only renders on its changes."""
+        runs = []
+        template = Template(
+            "{{ states.light | selectattr('state', 'eq', 'on') "
+            "| list | length }}", self.hass)
+
+        @ha.callback
+        def result_callback(event, info):
+            runs.append(info.result)
+
+        remove = track_template_result(self.hass, template, result_callback)
+
+        self.hass.states.set('switch.test', 'on')
+        self.hass.block_till_done()
+        assert runs == []
+
+        self.hass.states.set('light.kitchen', 'on')
+        self.hass.block_till_done()
+        self.hass.states.set('light.hall', 'on')
+        self.hass.block_till_done()
+        assert runs == ['1', '2']
+
+        remove()
+        self.hass.states.set('light.hall', 'off')
+        self.hass.block_till_done()
+        assert runs == ['1', '2']
+
+    def test_track_template_result_entities(self):
+        """Test the listeners follow the entities read by the last render."""
+        runs = []
+        template = Template(
+            "{% if is_state('input_boolean.use_b', 'on') %}"
+            "{{ states('sensor.b') }}{% else %}{{ states('sensor.a') }}"
+            "{% endif %}", self.hass)
+
+        @ha.callback
+        def result_callback(event, info):
+            runs.append(info.result)
+
+        track_template_result(self.hass, template, result_callback)
+
+        self.hass.states.set('sensor.a', '1')
+        self.hass.block_till_done()
+        self.hass.states.set('sensor.b', '2')
+        self.hass.block_till_done()
+        assert runs == ['1']
+
+        self.hass.states.set('input_boolean.use_b', 'on')
+        self.hass.block_till_done()
+        self.hass.states.set('sensor.a', '3')
+        self.hass.block_till_done()
+        self.hass.states.set('sensor.b', '4')
+        self.hass.block_till_done()
+        assert runs == ['1', '2', '4']
+
+    def test_track_template_result_domain_listeners(self):
+        """Test a domain template does not listen to other domains."""
+        template = Template("{{ states.light | list | length }}", self.hass)
+
+        remove = track_template_result(
+            self.hass, template, lambda event, info: None)
+        assert self.hass.bus.listeners.get(ha.EVENT_STATE_CHANGED) == 1
+
+        with patch.object(self.hass, 'async_add_job') as add_job:
+            self.hass.states.set('switch.test', 'on')
+            self.hass.block_till_done()
+        assert not add_job.mock_calls
+
+        remove()
+        assert ha.EVENT_STATE_CHANGED not in self.hass.bus.listeners
+
+    def test_track_template_result_time(self):
+        """Test a template reading the time renders every minute."""
+        runs = []
+        template = Template(
+            "{{ states('sensor.x') }} {{ now().minute }}", self.hass)
+
+        @ha.callback
+        def result_callback(event, info):
+            runs.append(event.event_type)
+
+        remove = track_template_result(self.hass, template, result_callback)
+
+        self.hass.states.set('switch.test', 'on')
+        self.hass.block_till_done()
+        assert runs == []
+
+        self.hass.states.set('sensor.x', '1')
+        self.hass.block_till_done()
+        assert runs == [ha.EVENT_STATE_CHANGED]
+
+        fire_time_changed(
+            self.hass, dt_util.utcnow().replace(second=0) +
+            timedelta(minutes=1))
+        self.hass.block_till_done()
+        assert runs == [ha.EVENT_STATE_CHANGED, EVENT_TIME_CHANGED]
+
+        remove()
+        self.hass.states.set('sensor.x', '2')
+        self.hass.block_till_done()
+        assert len(runs) == 2
+
     def test_track_same_state_simple_trigger(self):
         """Test track_same_change with trigger simple."""
         thread_runs = []
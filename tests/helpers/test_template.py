@@ -1065,3 +1065,85 @@ def test_length_of_states(hass):
 
     tpl = template.Template('{{ states.sensor | length }}', hass)
     assert tpl.async_render() == '2'
+
+
+async def test_compiled_code_shared(hass):
+    """Test templates with the same source share the compiled code."""
+    tpl = template.Template('{{ 1 + 1 }}', hass)
+    tpl2 = template.Template('{{ 1 + 1 }}', hass)
+    tpl.ensure_valid()
+    tpl2.ensure_valid()
+
+    assert tpl._compiled_code is tpl2._compiled_code
+    assert tpl2.async_render() == '2'
+
+
+async def test_render_to_info_cached(hass):
+    """Test the render result is reused until a state it read changes."""
+    hass.states.async_set('light.kitchen', 'on')
+    hass.states.async_set('light.hall', 'off')
+    hass.states.async_set('sensor.other', '1')
+
+    tpl = template.Template(
+        '{{ states.light.kitchen.state }} {{ states("light.hall") }}', hass)
+
+    with patch.object(tpl, 'async_render',
+                      wraps=tpl.async_render) as mock_render:
+        info = tpl.async_render_to_info()
+        assert info.result == 'on off'
+        assert set(info.entities) == {'light.kitchen', 'light.hall'}
+
+        hass.states.async_set('sensor.other', '2')
+        assert tpl.async_render_to_info() is info
+        assert tpl.async_render_cached() == 'on off'
+        assert len(mock_render.mock_calls) == 1
+
+        hass.states.async_set('light.hall', 'on')
+        assert tpl.async_render_cached() == 'on on'
+        assert len(mock_render.mock_calls) == 2
+
+        assert tpl.async_render_cached({'unused': 1}) == 'on on'
+        assert len(mock_render.mock_calls) == 3
+
+
+async def test_render_to_info_domain(hass):
+    """Test a rendered domain is invalidated when its states change."""
+    hass.states.async_set('light.kitchen', 'on')
+    tpl = template.Template(
+        '{{ states.light | selectattr("state", "eq", "on") | list | length }}',
+        hass)
+
+    assert tpl.async_render_cached() == '1'
+    info = tpl.async_render_to_info()
+    assert info.domains == {'light': 1}
+
+    hass.states.async_set('sensor.other', '1')
+    assert tpl.async_render_to_info() is info
+
+    hass.states.async_set('light.hall', 'on')
+    assert tpl.async_render_cached() == '2'
+
+    hass.states.async_set('light.hall', 'off')
+    assert tpl.async_render_cached() == '1'
+
+
+async def test_render_to_info_time(hass):
+    """Test time dependent renders are never reused."""
+    tpl = template.Template('{{ now() }}', hass)
+
+    info = tpl.async_render_to_info()
+    assert info.has_time
+    assert tpl.async_render_to_info() is not info
+
+
+async def test_render_to_info_error(hass):
+    """Test render errors are kept on the render info."""
+    tpl = template.Template(
+        '{{ states.light.kitchen.attributes.missing.value }}', hass)
+    hass.states.async_set('light.kitchen', 'on')
+
+    info = tpl.async_render_to_info()
+    assert isinstance(info.exception, TemplateError)
+
+    with pytest.raises(TemplateError):
+        tpl.async_render_cached()
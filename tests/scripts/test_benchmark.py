@@ -0,0 +1,68 @@
+"""Test the benchmark script."""
+import json
+
+import pytest
+
+from homeassistant.scripts import benchmark
+
+
+def test_run_writes_json(tmpdir):
+    """Test running benchmarks and writing the results."""
+    path = str(tmpdir.join('results.json'))
+
+    assert benchmark.run([
+        'async_million_events', 'track_state_change_fanout',
+        '--size', '20', '--entities', '5', '--repeat', '2',
+        '--json', path]) == 0
+
+    with open(path) as fil:
+        data = json.load(fil)
+
+    results = data['benchmarks']
+    assert list(results) == [
+        'async_million_events', 'track_state_change_fanout']
+    result = results['track_state_change_fanout']
+    assert result['size'] == 20
+    assert result['entities'] == 5
+    assert len(result['runs']) == 2
+    assert result['min'] <= result['median'] <= result['max']
+
+
+def test_run_unknown_benchmark():
+    """Test an unknown benchmark is rejected."""
+    with pytest.raises(SystemExit):
+        benchmark.run(['not_a_benchmark'])
+
+
+def test_summarize():
+    """Test the statistical summary of runtimes."""
+    result = benchmark.summarize([1.0, 3.0, 2.0], 10, 1)
+
+    assert result['min'] == 1.0
+    assert result['max'] == 3.0
+    assert result['mean'] == 2.0
+    assert result['median'] == 2.0
+    assert result['stdev'] == 1.0
+    assert result['ops_per_sec'] == 5.0
+
+
+def test_compare(capsys):
+    """Test comparing results to previous results."""
+    previous = {
+        'async_million_events': benchmark.summarize([2.0], 10, 1),
+        'template_render': benchmark.summarize([1.0], 10, 1),
+    }
+    results = {
+        'async_million_events': benchmark.summarize([1.0], 10, 1),
+        'template_render': benchmark.summarize([1.0], 20, 1),
+        'json_serialize_states': benchmark.summarize([1.0], 10, 1),
+    }
+
+    benchmark.compare(previous, results)
+
+    lines = capsys.readouterr().out.splitlines()
+    assert lines == [
+        'Compare async_million_events: -50.0% median runtime',
+        'Compare template_render: sizes differ',
+        'Compare json_serialize_states: no previous result',
+    ]
@@ -315,6 +315,14 @@ class TestEvent(unittest.TestCase):
             },
         }
         assert expected == event.as_dict()
+        assert event.as_dict() is event.as_dict()
+
+    def test_immutable(self):
+        """Test events can not be changed."""
+        event = ha.Event('some_type')
+
+        with pytest.raises(AttributeError):
+            event.event_type = 'other_type'
 
 
 class TestEventBus(unittest.TestCase):
@@ -502,6 +510,46 @@ def test_state_dict_conversion():
     assert state == ha.State.from_dict(state.as_dict())
 
 
+def test_state_as_dict_cached():
+    """Test the dict of a state is created once."""
+    state = ha.State('domain.hello', 'world', {'some': 'attr'})
+    assert state.as_dict() is state.as_dict()
+
+
+def test_state_immutable():
+    """Test states can not be changed."""
+    state = ha.State('domain.hello', 'world')
+
+    with pytest.raises(AttributeError):
+        state.state = 'other'
+
+    with pytest.raises(AttributeError):
+        del state.attributes
+
+
+def test_state_evolve():
+    """Test copying a state with changes."""
+    state = ha.State('domain.hello', 'world', {'some': 'attr'})
+    now = dt_util.utcnow()
+
+    new_state = state.evolve(state=5, last_updated=now)
+    assert new_state.entity_id == 'domain.hello'
+    assert new_state.state == '5'
+    assert new_state.attributes is state.attributes
+    assert new_state.last_changed == state.last_changed
+    assert new_state.last_updated == now
+    assert new_state.context is state.context
+    assert state.state == 'world'
+
+    assert dict(state.evolve(attributes=None).attributes) == {}
+
+    with pytest.raises(InvalidStateError):
+        state.evolve(state='t' * 256)
+
+    with pytest.raises(TypeError):
+        state.evolve(entity_id='domain.other')
+
+
 def test_state_dict_conversion_with_wrong_data():
     """Test conversion with wrong data."""
     assert ha.State.from_dict(None) is None
@@ -1128,3 +1176,82 @@ def test_context():
     assert c.user_id == 23
     assert c.parent_id == 100
     assert c.id is not None
+
+
+async def test_listen_entity_state_changed(hass):
+    """Test state changed listeners only receive their entities."""
+    events = []
+
+    @ha.callback
+    def listener(event):
+        events.append(event)
+
+    unsub = hass.bus.async_listen_entity_state_changed(
+        ['light.kitchen', 'light.bedroom'], listener)
+    assert hass.bus.async_listeners()[EVENT_STATE_CHANGED] == 1
+
+    hass.states.async_set('light.kitchen', 'on')
+    hass.states.async_set('light.living_room', 'on')
+    hass.states.async_set('light.bedroom', 'on')
+    await hass.async_block_till_done()
+
+    assert [event.data['entity_id'] for event in events] == \
+        ['light.kitchen', 'light.bedroom']
+
+    unsub()
+    assert EVENT_STATE_CHANGED not in hass.bus.async_listeners()
+
+    hass.states.async_set('light.kitchen', 'off')
+    await hass.async_block_till_done()
+    assert len(events) == 2
+
+
+async def test_listen_domain_state_changed(hass):
+    """Test state changed listeners only receive their domains."""
+    events = []
+
+    @ha.callback
+    def listener(event):
+        events.append(event)
+
+    unsub = hass.bus.async_listen_domain_state_changed(
+        ['light', 'light', 'switch'], listener)
+    assert hass.bus.async_listeners()[EVENT_STATE_CHANGED] == 1
+
+    hass.states.async_set('light.kitchen', 'on')
+    hass.states.async_set('sensor.lightning', 'on')
+    hass.states.async_set('switch.fan', 'on')
+    await hass.async_block_till_done()
+
+    assert [event.data['entity_id'] for event in events] == \
+        ['light.kitchen', 'switch.fan']
+
+    unsub()
+    assert EVENT_STATE_CHANGED not in hass.bus.async_listeners()
+
+    hass.states.async_set('light.kitchen', 'off')
+    await hass.async_block_till_done()
+    assert len(events) == 2
+
+
+async def test_listen_entity_state_changed_duplicates(hass):
+    """Test entities passed several times are listened to once."""
+    events = []
+
+    @ha.callback
+    def listener(event):
+        events.append(event)
+
+    unsub = hass.bus.async_listen_entity_state_changed(
+        ['light.kitchen', 'light.kitchen', 'light.bedroom'], listener)
+
+    hass.states.async_set('light.kitchen', 'on')
+    await hass.async_block_till_done()
+    assert len(events) == 1
+
+    unsub()
+    assert EVENT_STATE_CHANGED not in hass.bus.async_listeners()
+
+    hass.states.async_set('light.kitchen', 'off')
+    await hass.async_block_till_done()
+    assert len(events) == 1
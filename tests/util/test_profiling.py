@@ -0,0 +1,38 @@
+"""Test the profiling util."""
+from homeassistant.util import profiling
+
+
+def test_latency_stats():
+    """Test collecting durations."""
+    stats = profiling.LatencyStats()
+    assert stats.mean == 0
+
+    for duration in (0.0005, 0.002, 0.2, 3):
+        stats.add(duration)
+
+    assert stats.count == 4
+    assert stats.max == 3
+    assert stats.mean == (0.0005 + 0.002 + 0.2 + 3) / 4
+    assert stats.as_dict()['histogram'] == {
+        '1ms': 1, '5ms': 1, '10ms': 0, '50ms': 0, '100ms': 0, '500ms': 1,
+        '1s': 0, 'slower': 1}
+
+
+def test_profiler():
+    """Test recording durations per category and job."""
+    profiler = profiling.Profiler(0)
+    assert not profiler.sample()
+    assert profiling.Profiler(1).sample()
+
+    profiler.record(profiling.CATEGORY_SERVICE, 'light.turn_on', 0.1)
+    profiler.record(profiling.CATEGORY_SERVICE, 'light.turn_off', 0.3)
+    profiler.record(profiling.CATEGORY_SERVICE, 'light.turn_on', 0.1)
+
+    assert [name for name, _ in profiler.top(
+        profiling.CATEGORY_SERVICE)] == ['light.turn_off', 'light.turn_on']
+    assert profiler.top(profiling.CATEGORY_LISTENER) == []
+    assert profiler.as_dict()['jobs'][profiling.CATEGORY_SERVICE][
+        'light.turn_on']['count'] == 2
+
+    profiler.reset()
+    assert profiler.jobs == {}